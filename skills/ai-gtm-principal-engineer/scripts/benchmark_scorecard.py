@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""Generate synthetic CRM exports and benchmark the scorecard pipeline against a baseline."""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime as dt
+import json
+import platform
+import random
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from build_scorecard_from_crm import (
+    DATE_FORMATS,
+    DEFAULT_MAPPING,
+    ENGINES,
+    ScorecardAggregator,
+    ScorecardError,
+    compute_metrics,
+    iter_record_rows,
+    load_targets,
+    open_text,
+    peak_rss_mb,
+    render_markdown,
+    row_columns,
+)
+
+
+TEMPLATE_COLUMNS = list(DEFAULT_MAPPING)
+ROW_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+PRESET_ROWS = ("10k", "1M", "10M")
+BAD_DATES = ("not a date", "2026-13-45", "TBD")
+BAD_NUMBERS = ("n/a", "unknown", "12k")
+# Weighted toward the canonical spelling, with the CRM variants the parser accepts.
+WON_LABELS = ("won",) * 8 + ("closed_won", "Closed Won")
+LOST_LABELS = ("lost",) * 8 + ("closed_lost", "Closed Lost")
+DEFAULT_TOLERANCE = 0.2
+
+
+def parse_row_count(value: str) -> int:
+    """Row counts such as ``10000``, ``10k``, ``1M`` or ``2.5m``."""
+    text = value.strip().lower().replace("_", "")
+    scale = ROW_SUFFIXES.get(text[-1:], 1)
+    if scale > 1:
+        text = text[:-1]
+    try:
+        rows = int(float(text) * scale)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid row count: {value!r}") from None
+    if rows <= 0:
+        raise argparse.ArgumentTypeError(f"Row count must be positive: {value!r}")
+    return rows
+
+
+class ExportGenerator:
+    """Deterministic synthetic rows following the crm-export template funnel.
+
+    Accounts move MQL -> SQL -> opportunity -> close and signup -> first
+    value -> proven value -> pilot -> production with realistic drop-off.
+    Fields are blanked at ``null_rate``, corrupted at ``bad_rate``, and dates
+    use a random DATE_FORMATS entry per cell when ``mixed_dates`` is set.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        null_rate: float = 0.05,
+        bad_rate: float = 0.01,
+        mixed_dates: bool = True,
+        start: dt.date = dt.date(2025, 1, 1),
+        span_days: int = 540,
+    ) -> None:
+        self.random = random.Random(seed)
+        self.null_rate = null_rate
+        self.bad_rate = bad_rate
+        self.mixed_dates = mixed_dates
+        self.start = start
+        self.span_days = span_days
+
+    def cell(self, value: Any, bad_values: tuple[str, ...]) -> str:
+        if value is None:
+            return ""
+        draw = self.random.random()
+        if draw < self.null_rate:
+            return ""
+        if draw < self.null_rate + self.bad_rate:
+            return self.random.choice(bad_values)
+        return str(value)
+
+    def date(self, value: dt.date | None) -> str:
+        if value is None:
+            return ""
+        fmt = self.random.choice(DATE_FORMATS) if self.mixed_dates else DATE_FORMATS[0]
+        return self.cell(value.strftime(fmt), BAD_DATES)
+
+    def after(self, date: dt.date | None, low: int, high: int, rate: float) -> dt.date | None:
+        if date is None or self.random.random() >= rate:
+            return None
+        return date + dt.timedelta(days=self.random.randint(low, high))
+
+    def row(self, index: int) -> list[str]:
+        rand = self.random
+        mql = self.start + dt.timedelta(days=rand.randrange(self.span_days))
+        sql = self.after(mql, 1, 21, 0.45)
+        opportunity = self.after(sql, 3, 30, 0.55)
+        close = self.after(opportunity, 10, 120, 0.7)
+        if close is not None:
+            status = rand.choice(WON_LABELS if rand.random() < 0.35 else LOST_LABELS)
+        else:
+            status = "" if opportunity is None else "open"
+        deal = round(rand.lognormvariate(10.5, 0.6), -2) if opportunity is not None else None
+
+        signup = self.after(mql, 0, 30, 0.6)
+        first_value = self.after(signup, 1, 20, 0.7)
+        proven_value = self.after(first_value, 3, 45, 0.6)
+        pilot = self.after(signup, 2, 25, 0.4)
+        production = self.after(pilot, 10, 60, 0.5)
+
+        sessions = int(rand.lognormvariate(6, 0.8)) if signup is not None else 0
+        audited = int(sessions * rand.uniform(0.2, 0.5))
+        return [
+            f"acct-{index:08d}",
+            self.date(mql),
+            self.date(sql),
+            self.date(opportunity),
+            self.date(close),
+            self.cell(status, ("pending?",)),
+            self.cell(None if deal is None else f"{deal:.0f}", BAD_NUMBERS),
+            self.date(signup),
+            self.date(first_value),
+            self.date(proven_value),
+            self.date(pilot),
+            self.date(production),
+            self.cell(sessions, BAD_NUMBERS),
+            self.cell(int(sessions * rand.uniform(0.01, 0.08)), BAD_NUMBERS),
+            self.cell(audited, BAD_NUMBERS),
+            self.cell(int(audited * rand.uniform(0.0, 0.05)), BAD_NUMBERS),
+        ]
+
+    def rows(self, count: int) -> Iterator[list[str]]:
+        for index in range(count):
+            yield self.row(index)
+
+
+def generate_export(path: Path, rows: int, generator: ExportGenerator) -> int:
+    """Stream ``rows`` synthetic rows to ``path``; returns the file size in bytes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(TEMPLATE_COLUMNS)
+        writer.writerows(generator.rows(rows))
+    return path.stat().st_size
+
+
+def timed(func: Any, *args: Any) -> tuple[Any, float]:
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def read_rows(f: Any, mapping: dict[str, str]) -> Iterator[dict[str, Any]]:
+    """Rows the way the scorecard reads them: csv.reader projected to the mapped columns."""
+    records = csv.reader(f)
+    return iter_record_rows(records, next(records, []), row_columns(mapping))
+
+
+def read_pass(path: Path, mapping: dict[str, str]) -> int:
+    with open_text(path) as f:
+        return sum(1 for _ in read_rows(f, mapping))
+
+
+def parse_pass(path: Path, mapping: dict[str, str]) -> int:
+    parse_row = ScorecardAggregator(mapping).parse_row
+    rows = 0
+    with open_text(path) as f:
+        for row in read_rows(f, mapping):
+            parse_row(row)
+            rows += 1
+    return rows
+
+
+def metrics_pass(path: Path, mapping: dict[str, str], engine: str) -> tuple[dict[str, float | None], dict[str, Any]]:
+    with open_text(path) as f:
+        return compute_metrics(read_rows(f, mapping), mapping, engine=engine)
+
+
+def benchmark(path: Path, engine: str = "python", mapping: dict[str, str] | None = None) -> dict[str, Any]:
+    """Time read, parse, aggregate and render for ``compute_metrics`` over one export.
+
+    Phases are measured as cumulative passes over the file (read; read +
+    parse; read + parse + aggregate) and differenced, so per-row timer
+    overhead never distorts the numbers. The numpy engine decodes inside
+    its aggregate step, so its parse phase is folded into aggregate.
+    """
+    mapping = mapping or dict(DEFAULT_MAPPING)
+    rows, read_s = timed(read_pass, path, mapping)
+    parse_s = None
+    parsed_s = read_s
+    if engine == "python":
+        _, parsed_s = timed(parse_pass, path, mapping)
+        parse_s = max(0.0, parsed_s - read_s)
+    (metrics, diagnostics), total_s = timed(metrics_pass, path, mapping, engine)
+    _, render_s = timed(render_markdown, path, "benchmark", metrics, load_targets(None), diagnostics)
+    total_s += render_s
+    return {
+        "dataset": {"path": str(path), "rows": rows, "bytes": path.stat().st_size},
+        "engine": engine,
+        "phases": {
+            "read_s": round(read_s, 4),
+            "parse_s": None if parse_s is None else round(parse_s, 4),
+            "aggregate_s": round(max(0.0, total_s - render_s - parsed_s), 4),
+            "render_s": round(render_s, 4),
+        },
+        "total_s": round(total_s, 4),
+        "rows_per_sec": round(rows / total_s, 1) if total_s else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "metrics": metrics,
+    }
+
+
+def report_key(report: dict[str, Any]) -> str:
+    return f"{Path(report['dataset']['path']).name}:{report['engine']}"
+
+
+def compare_to_baseline(report: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Regressions of ``report`` against a baseline entry for the same dataset and engine."""
+    problems: list[str] = []
+    speed, base_speed = report["rows_per_sec"], baseline.get("rows_per_sec")
+    if speed and base_speed and speed < base_speed * (1 - tolerance):
+        problems.append(f"rows/sec {speed:,.0f} < baseline {base_speed:,.0f} (-{1 - speed / base_speed:.0%})")
+    rss, base_rss = report["peak_rss_mb"], baseline.get("peak_rss_mb")
+    if rss and base_rss and rss > base_rss * (1 + tolerance):
+        problems.append(f"peak RSS {rss:.0f} MB > baseline {base_rss:.0f} MB (+{rss / base_rss - 1:.0%})")
+    if report["dataset"] == baseline.get("dataset") and report["metrics"] != baseline.get("metrics"):
+        changed = [key for key, value in report["metrics"].items() if baseline.get("metrics", {}).get(key) != value]
+        problems.append(f"metrics differ from baseline on the same dataset: {', '.join(changed)}")
+    return problems
+
+
+def format_report(report: dict[str, Any]) -> str:
+    phases = ", ".join(
+        f"{name[:-2]} {value:.2f}s" for name, value in report["phases"].items() if value is not None
+    )
+    rss = report["peak_rss_mb"]
+    return (
+        f"{report_key(report)}: {report['dataset']['rows']:,} rows in {report['total_s']:.2f}s "
+        f"({report['rows_per_sec']:,.0f} rows/s; {phases})" + ("" if rss is None else f", peak RSS {rss:.0f} MB")
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Synthetic CRM export generator and scorecard benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Write synthetic exports following crm-export.template.csv")
+    generate.add_argument("--out-dir", required=True, help="Directory for crm-export-<rows>.csv files")
+    generate.add_argument(
+        "--rows",
+        action="append",
+        type=parse_row_count,
+        help=f"Row count, e.g. 10k or 1M (repeatable; default {', '.join(PRESET_ROWS)})",
+    )
+    generate.add_argument("--seed", type=int, default=0, help="Random seed (default 0)")
+    generate.add_argument("--null-rate", type=float, default=0.05, help="Share of cells left blank (default 0.05)")
+    generate.add_argument("--bad-rate", type=float, default=0.01, help="Share of cells with unparseable values (default 0.01)")
+    generate.add_argument("--iso-dates", action="store_true", help="Write every date as YYYY-MM-DD instead of mixed formats")
+
+    run = commands.add_parser("run", help="Benchmark the scorecard pipeline on exports")
+    run.add_argument("--csv", required=True, nargs="+", help="Export CSV path(s) to benchmark")
+    run.add_argument("--engine", choices=ENGINES, action="append", help="Engine(s) to benchmark (default python)")
+    run.add_argument("--out-json", help="Write the benchmark reports to this JSON file")
+    run.add_argument("--baseline", help="Baseline JSON to compare against (written with --save-baseline)")
+    run.add_argument("--save-baseline", action="store_true", help="Store these reports as the new baseline")
+    run.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"Allowed slowdown / memory growth before flagging a regression (default {DEFAULT_TOLERANCE})",
+    )
+    return parser.parse_args()
+
+
+def run_generate(args: argparse.Namespace) -> int:
+    if not (0 <= args.null_rate <= 1 and 0 <= args.bad_rate <= 1 and args.null_rate + args.bad_rate <= 1):
+        raise ScorecardError("--null-rate and --bad-rate must be between 0 and 1 and sum to at most 1")
+    out_dir = Path(args.out_dir).expanduser().resolve()
+    for rows in args.rows or [parse_row_count(value) for value in PRESET_ROWS]:
+        generator = ExportGenerator(
+            seed=args.seed,
+            null_rate=args.null_rate,
+            bad_rate=args.bad_rate,
+            mixed_dates=not args.iso_dates,
+        )
+        path = out_dir / f"crm-export-{rows}.csv"
+        size = generate_export(path, rows, generator)
+        print(f"Generated {path} ({rows:,} rows, {size / (1 << 20):.1f} MiB)")
+    return 0
+
+
+def run_benchmark(args: argparse.Namespace) -> int:
+    baseline_path = Path(args.baseline).expanduser().resolve() if args.baseline else None
+    if args.save_baseline and baseline_path is None:
+        raise ScorecardError("--save-baseline needs --baseline")
+    baseline: dict[str, Any] = {}
+    if baseline_path is not None and baseline_path.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8")).get("reports", {})
+
+    reports: dict[str, dict[str, Any]] = {}
+    regressions = 0
+    for value in args.csv:
+        path = Path(value).expanduser().resolve()
+        if not path.exists():
+            raise ScorecardError(f"CSV not found: {path}")
+        for engine in args.engine or ["python"]:
+            report = benchmark(path, engine)
+            key = report_key(report)
+            reports[key] = report
+            print(format_report(report))
+            if key in baseline:
+                for problem in compare_to_baseline(report, baseline[key], args.tolerance):
+                    regressions += 1
+                    print(f"  REGRESSION {problem}")
+
+    document = {
+        "generated_at": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "reports": reports,
+    }
+    if args.out_json:
+        out_json = Path(args.out_json).expanduser().resolve()
+        out_json.parent.mkdir(parents=True, exist_ok=True)
+        out_json.write_text(json.dumps(document, indent=2), encoding="utf-8")
+        print(f"Benchmark JSON written: {out_json}")
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(document, indent=2), encoding="utf-8")
+        print(f"Baseline written: {baseline_path}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    args = parse_args()
+    if args.command == "generate":
+        return run_generate(args)
+    return run_benchmark(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,15 +4,51 @@
 from __future__ import annotations
 
 import argparse
+import bisect
+import bz2
+import concurrent.futures
+import contextlib
 import csv
 import datetime as dt
+import functools
+import glob
+import gzip
+import hashlib
+import io
+import itertools
 import json
+import math
+import mmap
+import operator
+import os
+import random
+import runpy
+import shutil
+import sqlite3
 import statistics
+import sys
+import tempfile
+import time
+import zlib
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass, replace
+from fractions import Fraction
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+try:
+    import numpy as np
+except ImportError:  # Optional: only the columnar engine needs it.
+    np = None
+
+try:
+    import resource
+except ImportError:  # Optional: --profile reports peak memory only on Unix.
+    resource = None
+
 
 DEFAULT_MAPPING = {
     "account_id": "account_id",
@@ -33,8 +69,11 @@ DEFAULT_MAPPING = {
     "ai_hallucinations": "ai_hallucinations",
 }
 
+DATE_FIELDS = tuple(key for key in DEFAULT_MAPPING if key.endswith("_date"))
+
 WON_STATUSES = {"won", "closed_won", "closed won", "won deal"}
 LOST_STATUSES = {"lost", "closed_lost", "closed lost", "lost deal"}
+CLOSED_STATUSES = WON_STATUSES | LOST_STATUSES
 
 PERCENT_METRICS = {
     "mql_to_sql_conversion",
@@ -106,6 +145,43 @@ def load_targets(path: Path | None) -> dict[str, float]:
     return targets
 
 
+DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+    "%m/%d/%Y %H:%M:%S",
+)
+
+# Pseudo-format for the ISO timestamp fallback in match_date_format.
+ISO_FORMAT = "iso"
+
+DATE_CACHE_SIZE = 4096
+
+
+def match_date_format(text: str, fmt: str) -> dt.date | None:
+    if fmt == ISO_FORMAT:
+        try:
+            # Support ISO timestamp strings like 2026-02-28T10:00:00Z.
+            normalized = text.replace("Z", "+00:00")
+            return dt.datetime.fromisoformat(normalized).date()
+        except ValueError:
+            return None
+
+    try:
+        return dt.datetime.strptime(text, fmt).date()
+    except ValueError:
+        return None
+
+
+def detect_date(text: str) -> tuple[dt.date | None, str | None]:
+    for fmt in (*DATE_FORMATS, ISO_FORMAT):
+        parsed = match_date_format(text, fmt)
+        if parsed is not None:
+            return parsed, fmt
+    return None, None
+
+
 def parse_date(value: Any) -> dt.date | None:
     if value is None:
         return None
@@ -114,24 +190,47 @@ def parse_date(value: Any) -> dt.date | None:
     if not text:
         return None
 
-    for fmt in (
-        "%Y-%m-%d",
-        "%Y-%m-%d %H:%M:%S",
-        "%Y/%m/%d",
-        "%m/%d/%Y",
-        "%m/%d/%Y %H:%M:%S",
-    ):
-        try:
-            return dt.datetime.strptime(text, fmt).date()
-        except ValueError:
-            pass
+    return detect_date(text)[0]
 
-    try:
-        # Support ISO timestamp strings like 2026-02-28T10:00:00Z.
-        normalized = text.replace("Z", "+00:00")
-        return dt.datetime.fromisoformat(normalized).date()
-    except ValueError:
-        return None
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def date_format_of(text: str) -> str | None:
+    """The DATE_FORMATS entry (or ISO fallback) that detect_date matches first; used by --profile."""
+    return detect_date(text)[1]
+
+
+class DateColumnParser:
+    """parse_date for a single CSV column, tuned for repetitive exports.
+
+    The first format that matches is remembered and tried first for the next
+    new value, and recent results are held in an LRU cache because exports
+    repeat a small set of distinct days. The accepted formats never overlap,
+    so results are identical to parse_date.
+    """
+
+    def __init__(self, cache_size: int = DATE_CACHE_SIZE) -> None:
+        self.format: str | None = None
+        self._parse_text = functools.lru_cache(maxsize=cache_size)(self._parse_uncached)
+
+    def __call__(self, value: Any) -> dt.date | None:
+        if value is None:
+            return None
+
+        text = value.strip() if isinstance(value, str) else str(value).strip()
+        if not text:
+            return None
+        return self._parse_text(text)
+
+    def _parse_uncached(self, text: str) -> dt.date | None:
+        if self.format is not None:
+            parsed = match_date_format(text, self.format)
+            if parsed is not None:
+                return parsed
+
+        parsed, fmt = detect_date(text)
+        if fmt is not None:
+            self.format = fmt
+        return parsed
 
 
 def parse_float(value: Any) -> float | None:
@@ -152,20 +251,10 @@ def safe_div(numerator: float, denominator: float) -> float | None:
     return numerator / denominator
 
 
-def median(values: list[float]) -> float | None:
-    if not values:
-        return None
-    return statistics.median(values)
-
-
 def get_value(row: dict[str, Any], key: str, mapping: dict[str, str]) -> Any:
     return row.get(mapping[key])
 
 
-def has_date(row: dict[str, Any], key: str, mapping: dict[str, str]) -> bool:
-    return parse_date(get_value(row, key, mapping)) is not None
-
-
 def normalize_status(value: Any) -> str:
     if value is None:
         return ""
@@ -193,12 +282,25 @@ def format_metric(metric: str, value: float | None) -> str:
     return f"{value:.3f}"
 
 
-def evaluate_status(metric: str, current: float | None, target: float | None, direction: str) -> str:
+def evaluate_status(
+    metric: str,
+    current: float | None,
+    target: float | None,
+    direction: str,
+    interval: list[float] | None = None,
+) -> str:
     if current is None:
         return "no-data"
     if target is None:
         return "no-target"
 
+    # With a confidence interval: on/off track only when the whole interval clears/misses the target.
+    if interval is not None:
+        low, high = interval
+        if direction == "up":
+            return "on-track" if low >= target else "off-track" if high < target else "watch"
+        return "on-track" if high <= target else "off-track" if low > target else "watch"
+
     # 5% tolerance band for watch state.
     if direction == "up":
         if current >= target:
@@ -214,329 +316,4457 @@ def evaluate_status(metric: str, current: float | None, target: float | None, di
     return "off-track"
 
 
+# Intermediate aggregate (ScorecardAggregator attribute) -> canonical fields it is folded from.
+AGGREGATE_FIELDS: dict[str, tuple[str, ...]] = {
+    "row_count": (),
+    "mql": ("mql_date",),
+    "sql": ("sql_date",),
+    "opp": ("opportunity_date",),
+    "mql_sql": ("mql_date", "sql_date"),
+    "sql_opp": ("sql_date", "opportunity_date"),
+    "won": ("close_status",),
+    "lost": ("close_status",),
+    "cycle_days": ("opportunity_date", "close_date", "close_status"),
+    "deal_sizes": ("opportunity_date", "deal_amount"),
+    "signups": ("signup_date",),
+    "activated": ("signup_date", "first_value_date"),
+    "ttfv_days": ("signup_date", "first_value_date"),
+    "ttpv_days": ("signup_date", "proven_value_date"),
+    "pilots": ("pilot_start_date",),
+    "produced": ("pilot_start_date", "production_date"),
+    "ai_sessions_total": ("ai_sessions",),
+    "ai_escalations_total": ("ai_escalations",),
+    "ai_audited_total": ("ai_audited_responses",),
+    "ai_hallucinations_total": ("ai_hallucinations",),
+}
+# Diagnostic count -> aggregate it reports; with --metrics, counts over undecoded fields are left out.
+DIAGNOSTIC_AGGREGATES = {
+    "mql_accounts": "mql",
+    "sql_accounts": "sql",
+    "opportunity_accounts": "opp",
+    "won_opportunities": "won",
+    "lost_opportunities": "lost",
+    "pilot_accounts": "pilots",
+    "production_accounts": "produced",
+    "ai_sessions_total": "ai_sessions_total",
+    "ai_escalations_total": "ai_escalations_total",
+    "ai_audited_responses_total": "ai_audited_total",
+    "ai_hallucinations_total": "ai_hallucinations_total",
+}
+METRIC_DIRECTIONS = ("up", "down")
+METRIC_UNITS = {"percent": PERCENT_METRICS, "days": DAY_METRICS, "currency": CURRENCY_METRICS}
+
+
+@dataclass(frozen=True)
+class MetricDefinition:
+    """One scorecard metric and what it needs.
+
+    ``compute`` gets the aggregator and the values of already computed
+    metrics, including everything listed in ``metrics``. ``aggregates`` names
+    the aggregator attributes it reads, which decides the CSV columns a
+    --metrics run has to decode.
+    """
+
+    key: str
+    label: str
+    direction: str
+    definition: str
+    compute: Callable[[ScorecardAggregator, dict[str, float | None]], float | None]
+    aggregates: tuple[str, ...] = ()
+    metrics: tuple[str, ...] = ()
+
+
+METRICS: dict[str, MetricDefinition] = {}
+
+
+def register_metric(
+    key: str,
+    label: str,
+    direction: str,
+    definition: str,
+    compute: Callable[[ScorecardAggregator, dict[str, float | None]], float | None],
+    aggregates: tuple[str, ...] = (),
+    metrics: tuple[str, ...] = (),
+    unit: str | None = None,
+) -> MetricDefinition:
+    """Add a metric to the registry (the scorecard row order).
+
+    Metric dependencies must be registered first, so registry order is always
+    a valid computation order and the dependency graph cannot have cycles.
+    ``unit`` ("percent", "days" or "currency") picks the display format.
+    """
+    if key in METRICS:
+        raise ScorecardError(f"Metric already registered: {key}")
+    if direction not in METRIC_DIRECTIONS:
+        raise ScorecardError(f"Metric {key}: direction must be one of {', '.join(METRIC_DIRECTIONS)}")
+    unknown = [name for name in aggregates if name not in AGGREGATE_FIELDS]
+    if unknown:
+        raise ScorecardError(f"Metric {key}: unknown aggregate(s) {', '.join(unknown)}")
+    missing = [name for name in metrics if name not in METRICS]
+    if missing:
+        raise ScorecardError(f"Metric {key}: register {', '.join(missing)} first")
+    if unit is not None:
+        if unit not in METRIC_UNITS:
+            raise ScorecardError(f"Metric {key}: unit must be one of {', '.join(METRIC_UNITS)}")
+        METRIC_UNITS[unit].add(key)
+    metric = MetricDefinition(key, label, direction, definition, compute, tuple(aggregates), tuple(metrics))
+    METRICS[key] = metric
+    return metric
+
+
+def pipeline_velocity(aggregator: ScorecardAggregator, metrics: dict[str, float | None]) -> float | None:
+    win_rate = metrics["opportunity_win_rate"]
+    avg_deal = metrics["avg_deal_size"]
+    avg_cycle = metrics["avg_sales_cycle_days"]
+    if avg_cycle is None or avg_cycle <= 0 or avg_deal is None or win_rate is None:
+        return None
+    return (float(aggregator.opp) * win_rate * avg_deal) / avg_cycle
+
+
+register_metric(
+    "mql_to_sql_conversion",
+    "MQL -> SQL conversion",
+    "up",
+    "SQL accounts / MQL accounts",
+    lambda a, m: safe_div(float(a.mql_sql), float(a.mql)),
+    aggregates=("mql_sql", "mql"),
+)
+register_metric(
+    "sql_to_opportunity_conversion",
+    "SQL -> Opportunity conversion",
+    "up",
+    "Opportunity accounts / SQL accounts",
+    lambda a, m: safe_div(float(a.sql_opp), float(a.sql)),
+    aggregates=("sql_opp", "sql"),
+)
+register_metric(
+    "opportunity_win_rate",
+    "Opportunity win rate",
+    "up",
+    "Won opportunities / closed opportunities",
+    lambda a, m: safe_div(float(a.won), float(a.won + a.lost)),
+    aggregates=("won", "lost"),
+)
+register_metric(
+    "avg_sales_cycle_days",
+    "Average sales cycle days",
+    "down",
+    "Average days from opportunity_date to close_date",
+    lambda a, m: a.cycle_days.mean(),
+    aggregates=("cycle_days",),
+)
+register_metric(
+    "avg_deal_size",
+    "Average deal size",
+    "up",
+    "Average deal amount for opportunity rows",
+    lambda a, m: a.deal_sizes.mean(),
+    aggregates=("deal_sizes",),
+)
+register_metric(
+    "pipeline_velocity",
+    "Pipeline velocity",
+    "up",
+    "(Qualified opportunities * win rate * avg deal size) / avg sales cycle days",
+    pipeline_velocity,
+    aggregates=("opp",),
+    metrics=("opportunity_win_rate", "avg_deal_size", "avg_sales_cycle_days"),
+)
+register_metric(
+    "activation_rate",
+    "Activation rate",
+    "up",
+    "Accounts with first_value_date / accounts with signup_date",
+    lambda a, m: safe_div(float(a.activated), float(a.signups)),
+    aggregates=("activated", "signups"),
+)
+register_metric(
+    "ttfv_days",
+    "TTFV (median days)",
+    "down",
+    "Median days from signup_date to first_value_date",
+    lambda a, m: a.ttfv_days.median(),
+    aggregates=("ttfv_days",),
+)
+register_metric(
+    "ttpv_days",
+    "TTPV (median days)",
+    "down",
+    "Median days from signup_date to proven_value_date",
+    lambda a, m: a.ttpv_days.median(),
+    aggregates=("ttpv_days",),
+)
+register_metric(
+    "pilot_to_production_conversion",
+    "Pilot -> Production conversion",
+    "up",
+    "Accounts with production_date / accounts with pilot_start_date",
+    lambda a, m: safe_div(float(a.produced), float(a.pilots)),
+    aggregates=("produced", "pilots"),
+)
+register_metric(
+    "escalation_rate",
+    "Escalation rate",
+    "down",
+    "Total ai_escalations / total ai_sessions",
+    lambda a, m: safe_div(a.ai_escalations_total.total(), a.ai_sessions_total.total()),
+    aggregates=("ai_escalations_total", "ai_sessions_total"),
+)
+register_metric(
+    "hallucination_rate",
+    "Hallucination rate",
+    "down",
+    "Total ai_hallucinations / total ai_audited_responses",
+    lambda a, m: safe_div(a.ai_hallucinations_total.total(), a.ai_audited_total.total()),
+    aggregates=("ai_hallucinations_total", "ai_audited_total"),
+)
+register_metric(
+    "grounded_response_rate",
+    "Grounded response rate",
+    "up",
+    "1 - hallucination_rate",
+    lambda a, m: None if m["hallucination_rate"] is None else max(0.0, 1.0 - m["hallucination_rate"]),
+    metrics=("hallucination_rate",),
+)
+
+
 def metric_definitions() -> dict[str, dict[str, str]]:
     return {
-        "mql_to_sql_conversion": {
-            "label": "MQL -> SQL conversion",
-            "direction": "up",
-            "definition": "SQL accounts / MQL accounts",
-        },
-        "sql_to_opportunity_conversion": {
-            "label": "SQL -> Opportunity conversion",
-            "direction": "up",
-            "definition": "Opportunity accounts / SQL accounts",
-        },
-        "opportunity_win_rate": {
-            "label": "Opportunity win rate",
-            "direction": "up",
-            "definition": "Won opportunities / closed opportunities",
-        },
-        "avg_sales_cycle_days": {
-            "label": "Average sales cycle days",
-            "direction": "down",
-            "definition": "Average days from opportunity_date to close_date",
-        },
-        "avg_deal_size": {
-            "label": "Average deal size",
-            "direction": "up",
-            "definition": "Average deal amount for opportunity rows",
-        },
-        "pipeline_velocity": {
-            "label": "Pipeline velocity",
-            "direction": "up",
-            "definition": "(Qualified opportunities * win rate * avg deal size) / avg sales cycle days",
-        },
-        "activation_rate": {
-            "label": "Activation rate",
-            "direction": "up",
-            "definition": "Accounts with first_value_date / accounts with signup_date",
-        },
-        "ttfv_days": {
-            "label": "TTFV (median days)",
-            "direction": "down",
-            "definition": "Median days from signup_date to first_value_date",
-        },
-        "ttpv_days": {
-            "label": "TTPV (median days)",
-            "direction": "down",
-            "definition": "Median days from signup_date to proven_value_date",
-        },
-        "pilot_to_production_conversion": {
-            "label": "Pilot -> Production conversion",
-            "direction": "up",
-            "definition": "Accounts with production_date / accounts with pilot_start_date",
-        },
-        "escalation_rate": {
-            "label": "Escalation rate",
-            "direction": "down",
-            "definition": "Total ai_escalations / total ai_sessions",
-        },
-        "hallucination_rate": {
-            "label": "Hallucination rate",
-            "direction": "down",
-            "definition": "Total ai_hallucinations / total ai_audited_responses",
-        },
-        "grounded_response_rate": {
-            "label": "Grounded response rate",
-            "direction": "up",
-            "definition": "1 - hallucination_rate",
-        },
+        key: {"label": metric.label, "direction": metric.direction, "definition": metric.definition}
+        for key, metric in METRICS.items()
     }
 
 
-def compute_metrics(rows: list[dict[str, Any]], mapping: dict[str, str]) -> tuple[dict[str, float | None], dict[str, Any]]:
-    mql = 0
-    sql = 0
-    opp = 0
-    mql_sql = 0
-    sql_opp = 0
+def resolve_metrics(selection: Iterable[str]) -> list[str]:
+    """``selection`` plus every metric it depends on, in computation order (all metrics if empty)."""
+    pending = list(selection)
+    if not pending:
+        return list(METRICS)
+    needed: set[str] = set()
+    while pending:
+        key = pending.pop()
+        if key in needed:
+            continue
+        if key not in METRICS:
+            raise ScorecardError(f"Unknown metric: {key!r} (known: {', '.join(METRICS)})")
+        needed.add(key)
+        pending.extend(METRICS[key].metrics)
+    return [key for key in METRICS if key in needed]
 
-    won = 0
-    lost = 0
 
-    cycle_days: list[float] = []
-    deal_sizes: list[float] = []
+def selected_metrics(selection: Iterable[str]) -> list[str]:
+    """The metrics a scorecard reports, in registry order (all metrics if ``selection`` is empty)."""
+    chosen = set(selection)
+    return [key for key in METRICS if key in chosen] if chosen else list(METRICS)
 
-    signups = 0
-    activated = 0
-    ttfv_values: list[float] = []
-    ttpv_values: list[float] = []
 
-    pilots = 0
-    produced = 0
+def metric_fields(selection: Iterable[str]) -> tuple[str, ...]:
+    """Canonical fields the selected metrics (and their dependencies) read; empty means all of them."""
+    selection = tuple(selection)
+    if not selection:
+        return ()
+    fields = {
+        field
+        for key in resolve_metrics(selection)
+        for aggregate in METRICS[key].aggregates
+        for field in AGGREGATE_FIELDS[aggregate]
+    }
+    return tuple(field for field in DEFAULT_MAPPING if field in fields)
 
-    ai_sessions_total = 0.0
-    ai_escalations_total = 0.0
-    ai_audited_total = 0.0
-    ai_hallucinations_total = 0.0
 
-    for row in rows:
-        has_mql = has_date(row, "mql_date", mapping)
-        has_sql = has_date(row, "sql_date", mapping)
-        has_opp = has_date(row, "opportunity_date", mapping)
+def load_metric_plugins(paths: list[str]) -> None:
+    """Run --metric-plugin files, which call register_metric() to add custom metrics."""
+    # Plugins import this module by name; make sure that finds the running copy, even as __main__.
+    sys.modules.setdefault("build_scorecard_from_crm", sys.modules[__name__])
+    for value in paths:
+        path = Path(value).expanduser().resolve()
+        if not path.is_file():
+            raise ScorecardError(f"Metric plugin not found: {path}")
+        runpy.run_path(str(path), run_name="scorecard_metric_plugin")
 
-        if has_mql:
-            mql += 1
-        if has_sql:
-            sql += 1
-        if has_opp:
-            opp += 1
 
-        if has_mql and has_sql:
-            mql_sql += 1
-        if has_sql and has_opp:
-            sql_opp += 1
+class ExactSum:
+    """Running sum that rounds like ``statistics.mean`` without keeping the values."""
 
-        status = normalize_status(get_value(row, "close_status", mapping))
-        if status in WON_STATUSES:
-            won += 1
-        elif status in LOST_STATUSES:
-            lost += 1
+    def __init__(self) -> None:
+        # Shewchuk partials: non-overlapping floats whose exact sum is the total.
+        self.partials: list[float] = []
+        self.nonfinite = 0.0
+        self.count = 0
 
-        deal_amount = parse_float(get_value(row, "deal_amount", mapping))
-        if has_opp and deal_amount is not None and deal_amount > 0:
-            deal_sizes.append(deal_amount)
+    def add(self, value: float) -> None:
+        self.count += 1
+        self._accumulate(value)
 
-        opp_date = parse_date(get_value(row, "opportunity_date", mapping))
-        close_date = parse_date(get_value(row, "close_date", mapping))
-        cycle = days_between(opp_date, close_date)
-        if cycle is not None and status in WON_STATUSES.union(LOST_STATUSES):
-            cycle_days.append(cycle)
+    def add_total(self, total: float, count: int) -> None:
+        """Fold in ``count`` values whose sum is exactly ``total``."""
+        self.count += count
+        self._accumulate(total)
 
-        signup_date = parse_date(get_value(row, "signup_date", mapping))
-        first_value_date = parse_date(get_value(row, "first_value_date", mapping))
-        proven_value_date = parse_date(get_value(row, "proven_value_date", mapping))
+    def add_many(self, value: float, count: int) -> None:
+        """Add ``value`` ``count`` times, exactly (for pre-aggregated value histograms)."""
+        if count <= 0:
+            return
+        self.count += count
+        if count == 1 or not math.isfinite(value):
+            self._accumulate(value)
+            return
+        # The product may need more than 53 bits; peel it into non-overlapping
+        # floats. Denominators are powers of two, so integer math stays exact.
+        numerator, denominator = value.as_integer_ratio()
+        numerator *= count
+        while numerator:
+            part = numerator / denominator
+            self._accumulate(part)
+            part_numerator, part_denominator = part.as_integer_ratio()
+            common = max(denominator, part_denominator)
+            numerator = numerator * (common // denominator) - part_numerator * (common // part_denominator)
+            denominator = common
 
-        if signup_date is not None:
-            signups += 1
+    def _accumulate(self, value: float) -> None:
+        if not math.isfinite(value):
+            self.nonfinite += value
+            return
 
-        if signup_date is not None and first_value_date is not None:
-            activated += 1
-            ttfv = days_between(signup_date, first_value_date)
-            if ttfv is not None:
-                ttfv_values.append(ttfv)
+        partials = self.partials
+        i = 0
+        for other in partials:
+            if abs(value) < abs(other):
+                value, other = other, value
+            hi = value + other
+            lo = other - (hi - value)
+            if lo:
+                partials[i] = lo
+                i += 1
+            value = hi
+        partials[i:] = [value]
 
-        if signup_date is not None and proven_value_date is not None:
-            ttpv = days_between(signup_date, proven_value_date)
-            if ttpv is not None:
-                ttpv_values.append(ttpv)
+    def merge(self, other: ExactSum) -> None:
+        for value in other.partials:
+            self._accumulate(value)
+        self.nonfinite += other.nonfinite
+        self.count += other.count
 
-        pilot_date = parse_date(get_value(row, "pilot_start_date", mapping))
-        production_date = parse_date(get_value(row, "production_date", mapping))
+    def total(self) -> float:
+        if self.nonfinite or math.isnan(self.nonfinite):
+            return self.nonfinite
+        return math.fsum(self.partials)
 
-        if pilot_date is not None:
-            pilots += 1
-        if pilot_date is not None and production_date is not None:
-            produced += 1
-
-        ai_sessions_total += parse_float(get_value(row, "ai_sessions", mapping)) or 0.0
-        ai_escalations_total += parse_float(get_value(row, "ai_escalations", mapping)) or 0.0
-        ai_audited_total += parse_float(get_value(row, "ai_audited_responses", mapping)) or 0.0
-        ai_hallucinations_total += parse_float(get_value(row, "ai_hallucinations", mapping)) or 0.0
-
-    win_rate = safe_div(float(won), float(won + lost))
-    avg_cycle = statistics.mean(cycle_days) if cycle_days else None
-    avg_deal = statistics.mean(deal_sizes) if deal_sizes else None
-
-    pipeline_velocity = None
-    if avg_cycle is not None and avg_cycle > 0 and avg_deal is not None and win_rate is not None:
-        pipeline_velocity = (float(opp) * win_rate * avg_deal) / avg_cycle
-
-    activation_rate = safe_div(float(activated), float(signups))
-    ttfv_days = median(ttfv_values)
-    ttpv_days = median(ttpv_values)
-
-    pilot_to_prod = safe_div(float(produced), float(pilots))
-
-    escalation_rate = safe_div(ai_escalations_total, ai_sessions_total)
-    hallucination_rate = safe_div(ai_hallucinations_total, ai_audited_total)
-    grounded_rate = None if hallucination_rate is None else max(0.0, 1.0 - hallucination_rate)
-
-    metrics: dict[str, float | None] = {
-        "mql_to_sql_conversion": safe_div(float(mql_sql), float(mql)),
-        "sql_to_opportunity_conversion": safe_div(float(sql_opp), float(sql)),
-        "opportunity_win_rate": win_rate,
-        "avg_sales_cycle_days": avg_cycle,
-        "avg_deal_size": avg_deal,
-        "pipeline_velocity": pipeline_velocity,
-        "activation_rate": activation_rate,
-        "ttfv_days": ttfv_days,
-        "ttpv_days": ttpv_days,
-        "pilot_to_production_conversion": pilot_to_prod,
-        "escalation_rate": escalation_rate,
-        "hallucination_rate": hallucination_rate,
-        "grounded_response_rate": grounded_rate,
-    }
+    def to_state(self) -> dict[str, Any]:
+        return {"partials": list(self.partials), "nonfinite": self.nonfinite, "count": self.count}
 
-    diagnostics = {
-        "row_count": len(rows),
-        "mql_accounts": mql,
-        "sql_accounts": sql,
-        "opportunity_accounts": opp,
-        "won_opportunities": won,
-        "lost_opportunities": lost,
-        "pilot_accounts": pilots,
-        "production_accounts": produced,
-        "ai_sessions_total": ai_sessions_total,
-        "ai_escalations_total": ai_escalations_total,
-        "ai_audited_responses_total": ai_audited_total,
-        "ai_hallucinations_total": ai_hallucinations_total,
-    }
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> ExactSum:
+        total = cls()
+        total.partials = [float(p) for p in state["partials"]]
+        total.nonfinite = float(state["nonfinite"])
+        total.count = int(state["count"])
+        return total
 
-    return metrics, diagnostics
+    def mean(self) -> float | None:
+        if self.count == 0:
+            return None
+        if self.nonfinite or math.isnan(self.nonfinite):
+            return self.nonfinite
+        total = sum((Fraction(p) for p in self.partials), Fraction(0))
+        return float(total / self.count)
 
 
-def render_markdown(
-    input_csv: Path,
-    generated_at: str,
-    metrics: dict[str, float | None],
-    targets: dict[str, float],
-    diagnostics: dict[str, Any],
-) -> str:
-    defs = metric_definitions()
+def counter_median(counts: Counter[float]) -> float | None:
+    """Median of a value -> occurrences histogram, matching ``statistics.median``."""
+    n = sum(counts.values())
+    if n == 0:
+        return None
 
-    lines = [
-        "# Auto GTM Scorecard (CRM Export)",
-        "",
-        f"Generated: {generated_at}",
-        f"Input: `{input_csv}`",
-        "",
-        "| Metric | Current | Target | Status | Definition |",
-        "|---|---:|---:|---|---|",
-    ]
+    lower_index = (n - 1) // 2
+    upper_index = n // 2
+    lower = upper = None
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if lower is None and seen > lower_index:
+            lower = value
+        if seen > upper_index:
+            upper = value
+            break
 
-    for key, meta in defs.items():
-        current = metrics.get(key)
-        target = targets.get(key)
-        status = evaluate_status(key, current, target, meta["direction"])
-        lines.append(
-            "| {label} | {current} | {target} | {status} | {definition} |".format(
-                label=meta["label"],
-                current=format_metric(key, current),
-                target=format_metric(key, target),
-                status=status,
-                definition=meta["definition"],
-            )
+    if lower_index == upper_index:
+        return upper
+    return (lower + upper) / 2
+
+
+def counter_quantile(counts: Counter[float], q: float) -> float | None:
+    """Linearly interpolated quantile of a value -> occurrences histogram."""
+    n = sum(counts.values())
+    if n == 0:
+        return None
+
+    position = (n - 1) * q
+    lower_index = math.floor(position)
+    upper_index = math.ceil(position)
+    frac = position - lower_index
+    lower = upper = None
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if lower is None and seen > lower_index:
+            lower = value
+        if seen > upper_index:
+            upper = value
+            break
+
+    if frac == 0:
+        return lower
+    return lower * (1 - frac) + upper * frac
+
+
+QUANTILE_MODES = ("exact", "sketch")
+DEFAULT_SKETCH_ERROR = 0.01
+PERCENTILES = (0.5, 0.75, 0.9)
+
+
+class ExactDistribution:
+    """Exact quantiles from a value -> occurrences histogram."""
+
+    kind = "exact"
+
+    def __init__(self) -> None:
+        self.counts: Counter[float] = Counter()
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts.values())
+
+    def add(self, value: float, count: int = 1) -> None:
+        self.counts[value] += count
+
+    def merge(self, other: ExactDistribution) -> None:
+        self.counts.update(other.counts)
+
+    def median(self) -> float | None:
+        return counter_median(self.counts)
+
+    def quantile(self, q: float) -> float | None:
+        return counter_quantile(self.counts, q)
+
+    def histogram(self) -> list[tuple[float, int]]:
+        return sorted(self.counts.items())
+
+    def to_state(self) -> dict[str, Any]:
+        return {"kind": self.kind, "counts": sorted(self.counts.items())}
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> ExactDistribution:
+        distribution = cls()
+        distribution.counts = Counter({float(value): int(count) for value, count in state["counts"]})
+        return distribution
+
+
+class QuantileSketch:
+    """Mergeable log-bucket quantile sketch (DDSketch-style).
+
+    Every non-negative value lands in a bucket whose bounds are within
+    ``relative_error`` of each other, so any reported quantile is within that
+    relative error of a true sample value. Memory grows with the log of the
+    value range, not the number of samples.
+    """
+
+    kind = "sketch"
+
+    def __init__(self, relative_error: float = DEFAULT_SKETCH_ERROR) -> None:
+        if not 0 < relative_error < 1:
+            raise ScorecardError("Sketch relative error must be between 0 and 1")
+        self.relative_error = relative_error
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: Counter[int] = Counter()
+        self.zeros = 0
+        self.infinite = 0
+
+    @property
+    def count(self) -> int:
+        return self.zeros + sum(self.buckets.values()) + self.infinite
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value <= 0:
+            self.zeros += count
+        elif math.isinf(value):
+            self.infinite += count
+        else:
+            self.buckets[math.ceil(math.log(value) / self.log_gamma)] += count
+
+    def merge(self, other: QuantileSketch) -> None:
+        if other.relative_error != self.relative_error:
+            raise ScorecardError("Cannot merge quantile sketches with different error bounds")
+        self.buckets.update(other.buckets)
+        self.zeros += other.zeros
+        self.infinite += other.infinite
+
+    def median(self) -> float | None:
+        return self.quantile(0.5)
+
+    def quantile(self, q: float) -> float | None:
+        n = self.count
+        if n == 0:
+            return None
+
+        rank = q * (n - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * self.gamma**index / (self.gamma + 1)
+        return math.inf
+
+    def histogram(self) -> list[tuple[float, int]]:
+        """(bucket representative value, count) pairs in value order."""
+        pairs = [(0.0, self.zeros)] if self.zeros else []
+        pairs += [(2 * self.gamma**index / (self.gamma + 1), self.buckets[index]) for index in sorted(self.buckets)]
+        if self.infinite:
+            pairs.append((math.inf, self.infinite))
+        return pairs
+
+    def to_state(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "relative_error": self.relative_error,
+            "zeros": self.zeros,
+            "infinite": self.infinite,
+            "buckets": sorted(self.buckets.items()),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> QuantileSketch:
+        sketch = cls(float(state["relative_error"]))
+        sketch.zeros = int(state["zeros"])
+        sketch.infinite = int(state["infinite"])
+        sketch.buckets = Counter({int(index): int(count) for index, count in state["buckets"]})
+        return sketch
+
+
+Distribution = ExactDistribution | QuantileSketch
+
+
+def distribution_from_state(state: dict[str, Any]) -> Distribution:
+    if state["kind"] == QuantileSketch.kind:
+        return QuantileSketch.from_state(state)
+    return ExactDistribution.from_state(state)
+
+
+@dataclass(frozen=True)
+class ScorecardOptions:
+    """Aggregation settings that must match across shards and saved state."""
+
+    quantiles: str = "exact"
+    sketch_error: float = DEFAULT_SKETCH_ERROR
+    percentiles: bool = False
+    # Each entry is one breakdown: the CSV columns that form its group key.
+    group_by: tuple[tuple[str, ...], ...] = ()
+    # Date field whose week/month buckets get their own cohort aggregates.
+    cohort_by: str | None = None
+    cohort_period: str = "month"
+    # --profile: collect ScanProfile timings and parse telemetry (not part of saved state).
+    profile: bool = False
+    # --intervals: keep the value and (denominator, numerator) histograms confidence intervals resample.
+    intervals: bool = False
+    # --metrics: metrics to report (empty: all registered) and the canonical fields they need decoded
+    # (empty: all). Fields are resolved up front so shard workers never need the metric registry.
+    metrics: tuple[str, ...] = ()
+    fields: tuple[str, ...] = ()
+    # --quarantine / --max-bad-rate: validate mapped cells and keep bad rows out of the aggregates.
+    validate: bool = False
+    # Directory for the spool files that become the --quarantine CSV (None: count bad rows only).
+    quarantine_dir: str | None = None
+    max_bad_rate: float | None = None
+    quarantine_samples: int = 5
+    # --funnel: stage transition counts and latency histograms over every date field.
+    funnel: bool = False
+    # --survival / --as-of: censored TTFV/TTPV histograms, and the ISO date censoring runs to (None: from the data).
+    survival: bool = False
+    as_of: str | None = None
+
+    def for_group(self) -> ScorecardOptions:
+        """Options for a child aggregator inside a breakdown (no nested breakdowns, profiling, validation or funnels)."""
+        return replace(
+            self,
+            group_by=(),
+            cohort_by=None,
+            profile=False,
+            validate=False,
+            quarantine_dir=None,
+            funnel=False,
+            survival=False,
         )
 
-    lines.extend(
-        [
-            "",
-            "## Diagnostics",
-            f"- Rows processed: {diagnostics['row_count']}",
-            f"- MQL accounts: {diagnostics['mql_accounts']}",
-            f"- SQL accounts: {diagnostics['sql_accounts']}",
-            f"- Opportunity accounts: {diagnostics['opportunity_accounts']}",
-            f"- Closed won / lost: {diagnostics['won_opportunities']} / {diagnostics['lost_opportunities']}",
-            f"- Pilot accounts: {diagnostics['pilot_accounts']}",
-            f"- Production accounts: {diagnostics['production_accounts']}",
-            f"- AI sessions / escalations: {diagnostics['ai_sessions_total']:.0f} / {diagnostics['ai_escalations_total']:.0f}",
-            f"- Audited responses / hallucinations: {diagnostics['ai_audited_responses_total']:.0f} / {diagnostics['ai_hallucinations_total']:.0f}",
-            "",
-        ]
-    )
+    def new_distribution(self) -> Distribution:
+        if self.quantiles == "sketch":
+            return QuantileSketch(self.sketch_error)
+        return ExactDistribution()
 
-    return "\n".join(lines)
 
+AI_COUNTER_FIELDS = ("ai_sessions", "ai_escalations", "ai_audited_responses", "ai_hallucinations")
+PROFILE_PHASES = ("parse", "aggregate")
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Build GTM scorecard from CRM/export CSV")
-    parser.add_argument("--csv", required=True, help="Input CRM/export CSV path")
-    parser.add_argument("--out-md", required=True, help="Output markdown path")
-    parser.add_argument("--out-json", help="Optional output JSON path")
-    parser.add_argument("--mapping", help="Optional YAML/JSON file mapping canonical field names to CSV columns")
-    parser.add_argument("--targets", help="Optional YAML/JSON file with metric targets")
-    return parser.parse_args()
 
+def is_blank(value: Any) -> bool:
+    return value is None or not str(value).strip()
 
-def main() -> int:
-    args = parse_args()
 
-    input_csv = Path(args.csv).expanduser().resolve()
-    out_md = Path(args.out_md).expanduser().resolve()
+class ScanProfile:
+    """--profile telemetry for one scan: hot-path timings and parse failures.
 
-    if not input_csv.exists():
-        raise ScorecardError(f"CSV not found: {input_csv}")
+    Seconds spent parsing cells and folding parsed rows, per-field counts of
+    non-empty cells that did not parse as a date or number, and which date
+    format each field's cells matched. Counters add up, so shard and block
+    profiles merge like the aggregates.
+    """
 
-    mapping_path = Path(args.mapping).expanduser().resolve() if args.mapping else None
-    targets_path = Path(args.targets).expanduser().resolve() if args.targets else None
+    def __init__(self) -> None:
+        self.seconds: Counter[str] = Counter()
+        self.bad_dates: Counter[str] = Counter()
+        self.bad_numbers: Counter[str] = Counter()
+        self.date_formats: dict[str, Counter[str]] = {}
 
-    mapping = load_mapping(mapping_path)
-    targets = load_targets(targets_path)
+    def record_date(self, field: str, value: Any, parsed: dt.date | None, count: int = 1) -> None:
+        if parsed is not None:
+            formats = self.date_formats.get(field)
+            if formats is None:
+                formats = self.date_formats[field] = Counter()
+            formats[date_format_of(str(value).strip())] += count
+        elif not is_blank(value):
+            self.bad_dates[field] += count
 
-    with input_csv.open("r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
-        rows = [dict(r) for r in reader]
+    def record_number(self, field: str, value: Any, parsed: float | None, count: int = 1) -> None:
+        if parsed is None and not is_blank(value):
+            self.bad_numbers[field] += count
 
-    if not rows:
-        raise ScorecardError("CSV has no data rows")
+    def merge(self, other: ScanProfile) -> None:
+        self.seconds.update(other.seconds)
+        self.bad_dates.update(other.bad_dates)
+        self.bad_numbers.update(other.bad_numbers)
+        for field, formats in other.date_formats.items():
+            self.date_formats.setdefault(field, Counter()).update(formats)
 
-    metrics, diagnostics = compute_metrics(rows, mapping)
-    generated_at = dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    def to_state(self) -> dict[str, Any]:
+        return {
+            "seconds": dict(self.seconds),
+            "bad_dates": dict(self.bad_dates),
+            "bad_numbers": dict(self.bad_numbers),
+            "date_formats": {field: dict(formats) for field, formats in self.date_formats.items()},
+        }
 
-    out_md.parent.mkdir(parents=True, exist_ok=True)
-    out_md.write_text(
-        render_markdown(
-            input_csv=input_csv,
-            generated_at=generated_at,
-            metrics=metrics,
-            targets=targets,
-            diagnostics=diagnostics,
-        ),
-        encoding="utf-8",
-    )
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> ScanProfile:
+        profile = cls()
+        profile.seconds = Counter({name: float(value) for name, value in state["seconds"].items()})
+        profile.bad_dates = Counter(state["bad_dates"])
+        profile.bad_numbers = Counter(state["bad_numbers"])
+        profile.date_formats = {field: Counter(formats) for field, formats in state["date_formats"].items()}
+        return profile
 
-    if args.out_json:
-        out_json = Path(args.out_json).expanduser().resolve()
-        out_json.parent.mkdir(parents=True, exist_ok=True)
-        payload = {
-            "generated_at": generated_at,
-            "input_csv": str(input_csv),
-            "metrics": metrics,
-            "targets": targets,
-            "diagnostics": diagnostics,
+    def telemetry(self, mapping: dict[str, str]) -> dict[str, Any]:
+        """Parse-failure counts and date-format histograms keyed by CSV column."""
+        return {
+            "unparseable_dates": {mapping[field]: count for field, count in sorted(self.bad_dates.items())},
+            "unparseable_numbers": {mapping[field]: count for field, count in sorted(self.bad_numbers.items())},
+            "date_formats": {
+                mapping[field]: dict(formats.most_common()) for field, formats in sorted(self.date_formats.items())
+            },
         }
-        out_json.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+QUALITY_REASONS = ("unparseable_date", "unparseable_number", "short_row")
+# Rows checked before --max-bad-rate may abort mid-scan; the full-scan rate is always checked.
+FAIL_FAST_MIN_ROWS = 10_000
+QUARANTINE_REASON_COLUMN = "quarantine_reason"
+
+
+class Reservoir:
+    """Uniform sample of at most ``size`` values from a stream (Algorithm R).
+
+    Two reservoirs merge into a uniform sample of their combined streams, so
+    shard samples combine like the counters next to them.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.seen = 0
+        self.values: list[Any] = []
+
+    def add(self, value: Any, rng: random.Random) -> None:
+        self.seen += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+            return
+        slot = rng.randrange(self.seen)
+        if slot < self.size:
+            self.values[slot] = value
+
+    def merge(self, other: Reservoir, rng: random.Random) -> None:
+        # Draw without replacement, picking a side in proportion to the stream it still stands for.
+        mine, theirs = list(self.values), list(other.values)
+        left, right = self.seen, other.seen
+        merged: list[Any] = []
+        while len(merged) < self.size and (mine or theirs):
+            if theirs and (not mine or rng.randrange(left + right) >= left):
+                merged.append(theirs.pop(rng.randrange(len(theirs))))
+                right -= 1
+            else:
+                merged.append(mine.pop(rng.randrange(len(mine))))
+                left -= 1
+        self.seen += other.seen
+        self.values = merged
+
+    def to_state(self) -> dict[str, Any]:
+        return {"size": self.size, "seen": self.seen, "values": list(self.values)}
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> Reservoir:
+        reservoir = cls(int(state["size"]))
+        reservoir.seen = int(state["seen"])
+        reservoir.values = list(state["values"])
+        return reservoir
+
+
+class RowQuality:
+    """Ingest validation for one scan (--quarantine, --max-bad-rate).
+
+    A row is bad when a mapped date or number cell is non-blank but does not
+    parse, or is missing because the record ends before its column
+    (short_row; a record cut off after the last mapped column passes). Bad
+    rows are kept out of the aggregates and counted per reason and per CSV
+    column, each column keeps a reservoir of sample bad cells, and with a
+    quarantine directory the rows are appended to a spool CSV there.
+    Everything merges in shard order.
+    """
+
+    def __init__(self, mapping: dict[str, str], options: ScorecardOptions) -> None:
+        fields = options.fields or DEFAULT_MAPPING
+        self.mapping = mapping
+        self.dates = [(key, mapping[key]) for key in DATE_FIELDS if key in fields]
+        self.numbers = [(key, mapping[key]) for key in NUMERIC_FIELDS if key in fields]
+        self.parsed_dates = tuple_getter([key for key, _ in self.dates])
+        self.parsed_numbers = tuple_getter([key for key, _ in self.numbers])
+        # Spool layout: the CSV columns a row keeps, and the columnar block key holding each.
+        self.columns = row_columns(mapping, options)
+        self.block_keys = {column: key for key, column in block_columns(mapping, options).items()}
+        self.spool_dir = options.quarantine_dir
+        self.max_bad_rate = options.max_bad_rate
+        self.sample_size = options.quarantine_samples
+
+        self.rows = 0
+        self.bad_rows = 0
+        self.reasons: Counter[str] = Counter()
+        self.bad_cells: Counter[str] = Counter()
+        self.samples: dict[str, Reservoir] = {}
+        self.spools: list[str] = []
+        self.random = random.Random(0)
+        self._spool: io.TextIOBase | None = None
+        self._writer: Any = None
+        # Columnar engine: block key -> {bad distinct cell: reason}, filled by decode_block observers.
+        self.pending: dict[str, dict[Any, str]] = {}
+
+    @staticmethod
+    def problem(key: str, value: Any) -> str | None:
+        """Why a cell whose field did not parse makes its row bad (None: the cell is just blank)."""
+        if value is None:
+            return "short_row"
+        if not str(value).strip():
+            return None
+        return "unparseable_date" if key in DATE_FIELDS else "unparseable_number"
+
+    def check(self, row: dict[str, Any], parsed: dict[str, Any]) -> bool:
+        """Validate one parsed row; a bad row is recorded and False returned."""
+        self.rows += 1
+        dates = self.parsed_dates(parsed)
+        numbers = self.parsed_numbers(parsed)
+        # Fast path: every date parsed and every number is non-zero.
+        if None not in dates and all(numbers):
+            return True
+
+        problems: list[tuple[str, str, Any]] = []
+        for (key, column), date in zip(self.dates, dates):
+            if date is None:
+                value = row.get(column, "")
+                if value != "":
+                    problem = self.problem(key, value)
+                    if problem is not None:
+                        problems.append((problem, column, value))
+        for (key, column), number in zip(self.numbers, numbers):
+            # AI counters decode blank and bad cells alike to 0.0, so re-check those cells.
+            if not number:
+                value = row.get(column, "")
+                if value != "" and parse_float(value) is None:
+                    problem = self.problem(key, value)
+                    if problem is not None:
+                        problems.append((problem, column, value))
+        if not problems:
+            return True
+        self.reject(problems, [row.get(column) for column in self.columns])
+        self.check_rate()
+        return False
+
+    def observe(self, key: str, value: Any) -> None:
+        """decode_block observer: a distinct cell of ``key`` that did not parse."""
+        problem = self.problem(key, value)
+        if problem is not None:
+            self.pending.setdefault(key, {})[value] = problem
+
+    def check_block(self, columns: dict[str, list[Any]], rows: int) -> list[bool] | None:
+        """Record the bad rows of a block decoded with this object's observers.
+
+        Returns a keep-mask over the block's rows, or None when every row is good.
+        """
+        self.rows += rows
+        pending, self.pending = self.pending, {}
+        if not pending:
+            return None
+        problems: dict[int, list[tuple[str, str, Any]]] = {}
+        for key, bad in pending.items():
+            column = self.mapping[key]
+            for i, value in enumerate(columns[key]):
+                if value in bad:
+                    problems.setdefault(i, []).append((bad[value], column, value))
+        keep = [True] * rows
+        for i in sorted(problems):
+            keep[i] = False
+            self.reject(problems[i], [columns[self.block_keys[column]][i] for column in self.columns])
+        self.check_rate()
+        return keep
+
+    def reject(self, problems: list[tuple[str, str, Any]], cells: list[Any]) -> None:
+        self.bad_rows += 1
+        reasons = {problem for problem, _, _ in problems}
+        self.reasons.update(reasons)
+        labels = []
+        for problem, column, value in problems:
+            if problem == "short_row":
+                continue
+            self.bad_cells[column] += 1
+            sample = self.samples.get(column)
+            if sample is None:
+                sample = self.samples[column] = Reservoir(self.sample_size)
+            sample.add(value, self.random)
+            labels.append(f"{problem}:{column}")
+        if "short_row" in reasons:
+            labels.append("short_row")
+        if self.spool_dir is not None:
+            if self._writer is None:
+                handle, path = tempfile.mkstemp(prefix="quarantine-", suffix=".csv", dir=self.spool_dir)
+                self._spool = os.fdopen(handle, "w", encoding="utf-8", newline="")
+                self._writer = csv.writer(self._spool)
+                self.spools.append(path)
+            self._writer.writerow(["; ".join(labels), *cells])
+
+    def sample_values(self, column: str) -> list[Any]:
+        """Distinct sampled bad cells of a column, in reservoir order."""
+        return list(dict.fromkeys(self.samples[column].values))
+
+    def bad_rate(self) -> float:
+        return self.bad_rows / self.rows if self.rows else 0.0
+
+    def check_rate(self, final: bool = False) -> None:
+        """Fail fast once the bad-row share passes --max-bad-rate (after FAIL_FAST_MIN_ROWS rows)."""
+        if self.max_bad_rate is None or self.bad_rows <= self.max_bad_rate * self.rows:
+            return
+        if not final and self.rows < FAIL_FAST_MIN_ROWS:
+            return
+        reasons = ", ".join(f"{reason} {count}" for reason, count in sorted(self.reasons.items()))
+        samples = "; ".join(
+            f"{column}: {', '.join(repr(value) for value in self.sample_values(column))}"
+            for column, _ in self.bad_cells.most_common(3)
+        )
+        raise ScorecardError(
+            f"{self.bad_rows} of {self.rows} rows ({self.bad_rate():.1%}) failed validation, "
+            f"above --max-bad-rate {self.max_bad_rate:.1%} ({reasons})" + (f". Samples: {samples}" if samples else "")
+        )
+
+    def close(self) -> None:
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+            self._writer = None
+
+    def merge(self, other: RowQuality) -> None:
+        self.rows += other.rows
+        self.bad_rows += other.bad_rows
+        self.reasons.update(other.reasons)
+        self.bad_cells.update(other.bad_cells)
+        for column, sample in other.samples.items():
+            mine = self.samples.get(column)
+            if mine is None:
+                mine = self.samples[column] = Reservoir(self.sample_size)
+            mine.merge(sample, self.random)
+        self.spools.extend(other.spools)
+
+    def to_state(self) -> dict[str, Any]:
+        """Counters, samples and spool paths; closes the open spool so another process can read it."""
+        self.close()
+        return {
+            "rows": self.rows,
+            "bad_rows": self.bad_rows,
+            "reasons": dict(self.reasons),
+            "bad_cells": dict(self.bad_cells),
+            "samples": {column: sample.to_state() for column, sample in self.samples.items()},
+            "spools": list(self.spools),
+        }
+
+    def load_state(self, state: dict[str, Any]) -> None:
+        self.rows = int(state["rows"])
+        self.bad_rows = int(state["bad_rows"])
+        self.reasons = Counter(state["reasons"])
+        self.bad_cells = Counter(state["bad_cells"])
+        self.samples = {column: Reservoir.from_state(sample) for column, sample in state["samples"].items()}
+        self.spools = list(state["spools"])
+
+    def summary(self, quarantine: Path | None = None) -> dict[str, Any]:
+        """diagnostics["quality"]: bad-row counts per reason and column, with sample bad cells."""
+        return {
+            "rows_checked": self.rows,
+            "bad_rows": self.bad_rows,
+            "bad_row_rate": self.bad_rate(),
+            "max_bad_rate": self.max_bad_rate,
+            "reasons": {reason: self.reasons[reason] for reason in QUALITY_REASONS if self.reasons[reason]},
+            "bad_cells": dict(self.bad_cells.most_common()),
+            "samples": {column: self.sample_values(column) for column, _ in self.bad_cells.most_common()},
+            "quarantine": str(quarantine) if quarantine is not None else None,
+        }
+
+
+def write_quarantine(path: Path, quality: RowQuality) -> None:
+    """Concatenate the spool files, in scan order, into the --quarantine CSV."""
+    quality.close()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as out:
+        csv.writer(out).writerow([QUARANTINE_REASON_COLUMN, *quality.columns])
+        for spool in quality.spools:
+            with open(spool, "r", encoding="utf-8", newline="") as f:
+                shutil.copyfileobj(f, out)
+
+
+# --funnel: every mapped date field is a stage, in DEFAULT_MAPPING order.
+FUNNEL_STAGES = DATE_FIELDS
+# Upper edges (days) of the latency buckets; bucket 0 holds negative latencies (dates out of order).
+FUNNEL_LATENCY_EDGES = (0, 1, 7, 14, 30, 60, 90, 180, 365)
+FUNNEL_TRANSITIONS = tuple((i, j) for i in range(len(FUNNEL_STAGES)) for j in range(i + 1, len(FUNNEL_STAGES)))
+
+
+def latency_bucket_labels() -> list[str]:
+    labels = ["<0"]
+    for low, high in zip(FUNNEL_LATENCY_EDGES, FUNNEL_LATENCY_EDGES[1:]):
+        labels.append(str(low) if high == low + 1 else f"{low}-{high - 1}")
+    labels.append(f"{FUNNEL_LATENCY_EDGES[-1]}+")
+    return labels
+
+
+class FunnelStats:
+    """--funnel aggregates: stage reach, stage-to-stage transitions and their latency histograms.
+
+    A row reaches a stage when it has that date. Every pair of stages a row
+    reached counts as a transition from the earlier stage (in FUNNEL_STAGES
+    order) to the later one, with its day latency added to a fixed-bucket
+    histogram; a row's furthest stage is the last one it reached. Memory is
+    a few hundred counters however many rows are folded in, and everything
+    adds up, so shard and block funnels merge like the aggregates.
+    """
+
+    def __init__(self) -> None:
+        stages = len(FUNNEL_STAGES)
+        self.index = [[-1] * stages for _ in range(stages)]
+        for transition, (i, j) in enumerate(FUNNEL_TRANSITIONS):
+            self.index[i][j] = transition
+        self.reached = [0] * stages
+        self.furthest = [0] * stages
+        self.latency = [[0] * (len(FUNNEL_LATENCY_EDGES) + 1) for _ in FUNNEL_TRANSITIONS]
+        # Summed non-negative latency days per transition, for the mean.
+        self.days = [0] * len(FUNNEL_TRANSITIONS)
+
+    def add(self, parsed: dict[str, Any]) -> None:
+        stages = [(i, date.toordinal()) for i, date in enumerate(map(parsed.__getitem__, FUNNEL_STAGES)) if date is not None]
+        if not stages:
+            return
+        for i, _ in stages:
+            self.reached[i] += 1
+        self.furthest[stages[-1][0]] += 1
+        latency = self.latency
+        total = self.days
+        for n, (i, start) in enumerate(stages):
+            index = self.index[i]
+            for j, end in stages[n + 1 :]:
+                transition = index[j]
+                days = end - start
+                latency[transition][bisect.bisect_right(FUNNEL_LATENCY_EDGES, days)] += 1
+                if days > 0:
+                    total[transition] += days
+
+    def add_block(self, decoded: dict[str, Any]) -> None:
+        """Vectorized add() over a decoded columnar block."""
+        present = np.stack([~np.isnat(decoded[key]) for key in FUNNEL_STAGES])
+        ordinals = np.stack([decoded[key].astype(np.int64) for key in FUNNEL_STAGES])
+        stages = np.arange(len(FUNNEL_STAGES))
+        last = np.where(present, stages[:, None], -1).max(axis=0)
+        furthest = np.bincount(last[last >= 0], minlength=len(stages))
+        self.reached = [a + b for a, b in zip(self.reached, present.sum(axis=1).tolist())]
+        self.furthest = [a + b for a, b in zip(self.furthest, furthest.tolist())]
+        edges = np.array(FUNNEL_LATENCY_EDGES)
+        for transition, (i, j) in enumerate(FUNNEL_TRANSITIONS):
+            both = present[i] & present[j]
+            if not both.any():
+                continue
+            deltas = ordinals[j][both] - ordinals[i][both]
+            counts = np.bincount(np.searchsorted(edges, deltas, side="right"), minlength=len(edges) + 1)
+            latency = self.latency[transition]
+            for bucket, count in enumerate(counts.tolist()):
+                latency[bucket] += count
+            self.days[transition] += int(deltas[deltas > 0].sum())
+
+    def merge(self, other: FunnelStats) -> None:
+        self.reached = [a + b for a, b in zip(self.reached, other.reached)]
+        self.furthest = [a + b for a, b in zip(self.furthest, other.furthest)]
+        self.latency = [[a + b for a, b in zip(mine, theirs)] for mine, theirs in zip(self.latency, other.latency)]
+        self.days = [a + b for a, b in zip(self.days, other.days)]
+
+    def to_state(self) -> dict[str, Any]:
+        return {"reached": self.reached, "furthest": self.furthest, "latency": self.latency, "days": self.days}
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> FunnelStats:
+        funnel = cls()
+        funnel.reached = [int(count) for count in state["reached"]]
+        funnel.furthest = [int(count) for count in state["furthest"]]
+        funnel.latency = [[int(count) for count in counts] for counts in state["latency"]]
+        funnel.days = [int(days) for days in state["days"]]
+        return funnel
+
+    def summary(self, row_count: int) -> dict[str, Any]:
+        """diagnostics["funnel"]: reach and furthest stage per stage, and every observed transition."""
+        transitions = []
+        for transition, (i, j) in enumerate(FUNNEL_TRANSITIONS):
+            latency = self.latency[transition]
+            accounts = sum(latency)
+            if not accounts:
+                continue
+            ordered = accounts - latency[0]
+            transitions.append(
+                {
+                    "from": FUNNEL_STAGES[i],
+                    "to": FUNNEL_STAGES[j],
+                    "accounts": accounts,
+                    "conversion": safe_div(accounts, self.reached[i]),
+                    "mean_days": safe_div(self.days[transition], ordered),
+                    "latency_days": dict(zip(latency_bucket_labels(), latency)),
+                }
+            )
+        return {
+            "stages": list(FUNNEL_STAGES),
+            "reached": dict(zip(FUNNEL_STAGES, self.reached)),
+            "furthest": dict(zip(FUNNEL_STAGES, self.furthest)),
+            "no_stage": row_count - sum(self.furthest),
+            "transitions": transitions,
+        }
+
+
+# --survival: time-to-value metric -> the date that ends it (each starts at signup_date).
+SURVIVAL_FIELDS = {"ttfv_days": "first_value_date", "ttpv_days": "proven_value_date"}
+# Days at which the report reads off the share of accounts that reached value.
+SURVIVAL_HORIZONS = (30, 90)
+# datetime64[D] counts days from 1970-01-01; date.toordinal() from 0001-01-01.
+EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+
+
+def kaplan_meier(events: Counter[int], censored: Counter[int]) -> list[tuple[int, int, int, float]]:
+    """Kaplan-Meier survival at every event day: (day, at risk, events, survival).
+
+    One sort of the distinct durations, then a single walk that shrinks the
+    at-risk count, so the cost is O(k log k) in distinct days on top of the
+    O(n) histogram build. Accounts censored on an event day count as at risk
+    on that day.
+    """
+    at_risk = sum(events.values()) + sum(censored.values())
+    survival = 1.0
+    curve = []
+    for day in sorted(events.keys() | censored.keys()):
+        reached = events.get(day, 0)
+        if reached:
+            survival *= 1 - reached / at_risk
+            curve.append((day, at_risk, reached, survival))
+        at_risk -= reached + censored.get(day, 0)
+    return curve
+
+
+class SurvivalStats:
+    """--survival: TTFV/TTPV histograms that keep the accounts still waiting for value.
+
+    Accounts with a signup that reached value are counted by days to value;
+    the others are counted by signup day and censored at the as-of date when
+    the curve is built, since it is only known once the scan is done (the
+    latest signup or value date seen, unless --as-of is given). Memory
+    follows the number of distinct days, and everything adds up, so shard
+    and block histograms merge like the aggregates.
+    """
+
+    def __init__(self) -> None:
+        self.events: dict[str, Counter[int]] = {metric: Counter() for metric in SURVIVAL_FIELDS}
+        # Signup day ordinal -> accounts without the value date yet.
+        self.waiting: dict[str, Counter[int]] = {metric: Counter() for metric in SURVIVAL_FIELDS}
+        self.latest: int | None = None
+
+    def add(self, parsed: dict[str, Any]) -> None:
+        signup = parsed["signup_date"]
+        dates = [date for date in (signup, *map(parsed.__getitem__, SURVIVAL_FIELDS.values())) if date is not None]
+        if dates:
+            latest = max(dates).toordinal()
+            if self.latest is None or latest > self.latest:
+                self.latest = latest
+        if signup is None:
+            return
+        for metric, key in SURVIVAL_FIELDS.items():
+            value = parsed[key]
+            if value is None:
+                self.waiting[metric][signup.toordinal()] += 1
+            elif value >= signup:
+                self.events[metric][(value - signup).days] += 1
+
+    def add_block(self, decoded: dict[str, Any]) -> None:
+        """Vectorized add() over a decoded columnar block."""
+        signup = decoded["signup_date"]
+        for column in (signup, *(decoded[key] for key in SURVIVAL_FIELDS.values())):
+            dates = column[~np.isnat(column)]
+            if dates.size:
+                latest = int(dates.max().astype(np.int64)) + EPOCH_ORDINAL
+                if self.latest is None or latest > self.latest:
+                    self.latest = latest
+
+        has_signup = ~np.isnat(signup)
+        for metric, key in SURVIVAL_FIELDS.items():
+            value = decoded[key]
+            reached = has_signup & ~np.isnat(value)
+            days = (value[reached] - signup[reached]).astype(np.int64)
+            unique, counts = np.unique(days[days >= 0], return_counts=True)
+            self.events[metric].update(dict(zip(unique.tolist(), counts.tolist())))
+            waiting = signup[has_signup & np.isnat(value)].astype(np.int64) + EPOCH_ORDINAL
+            unique, counts = np.unique(waiting, return_counts=True)
+            self.waiting[metric].update(dict(zip(unique.tolist(), counts.tolist())))
+
+    def merge(self, other: SurvivalStats) -> None:
+        for metric in SURVIVAL_FIELDS:
+            self.events[metric].update(other.events[metric])
+            self.waiting[metric].update(other.waiting[metric])
+        if other.latest is not None and (self.latest is None or other.latest > self.latest):
+            self.latest = other.latest
+
+    def to_state(self) -> dict[str, Any]:
+        return {
+            "events": {metric: sorted(counts.items()) for metric, counts in self.events.items()},
+            "waiting": {metric: sorted(counts.items()) for metric, counts in self.waiting.items()},
+            "latest": self.latest,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> SurvivalStats:
+        survival = cls()
+        for metric in SURVIVAL_FIELDS:
+            survival.events[metric] = Counter({int(day): int(count) for day, count in state["events"][metric]})
+            survival.waiting[metric] = Counter({int(day): int(count) for day, count in state["waiting"][metric]})
+        survival.latest = state["latest"]
+        return survival
+
+    def summary(self, as_of: str | None = None) -> dict[str, Any]:
+        """diagnostics["survival"]: censored medians, horizon shares and the curve for each metric."""
+        if as_of is not None:
+            end = dt.date.fromisoformat(as_of).toordinal()
+        elif self.latest is not None:
+            end = self.latest
+        else:
+            return {"as_of": None, "as_of_source": "no dates", "metrics": {}}
+
+        report: dict[str, Any] = {}
+        for metric in SURVIVAL_FIELDS:
+            events = self.events[metric]
+            censored: Counter[int] = Counter()
+            excluded = 0
+            for signup, count in self.waiting[metric].items():
+                if signup <= end:
+                    censored[end - signup] += count
+                else:
+                    excluded += count
+            curve = kaplan_meier(events, censored)
+            median = next((day for day, _, _, survival in curve if survival <= 0.5), None)
+            reached_by = {}
+            for horizon in SURVIVAL_HORIZONS:
+                survival = next((point[3] for point in reversed(curve) if point[0] <= horizon), 1.0)
+                reached_by[str(horizon)] = 1 - survival if curve or censored else None
+            report[metric] = {
+                "accounts": sum(events.values()) + sum(censored.values()),
+                "reached": sum(events.values()),
+                "censored": sum(censored.values()),
+                "signed_up_after_as_of": excluded,
+                "median_days": None if median is None else float(median),
+                "reached_only_median_days": None if not events else float(counter_median(events)),
+                "reached_by": reached_by,
+                "curve": [
+                    {"day": day, "at_risk": at_risk, "reached": reached, "survival": survival}
+                    for day, at_risk, reached, survival in curve
+                ],
+            }
+        return {
+            "as_of": dt.date.fromordinal(end).isoformat(),
+            "as_of_source": "--as-of" if as_of is not None else "latest signup/value date",
+            "metrics": report,
+        }
+
+
+BLANK_GROUP = "(blank)"
+# Columnar block keys for --group-by columns, kept apart from canonical keys.
+GROUP_COLUMN_PREFIX = "group:"
+
+
+def group_value(value: Any) -> str:
+    text = "" if value is None else str(value).strip()
+    return text or BLANK_GROUP
+
+
+def group_label(spec: tuple[str, ...]) -> str:
+    return ",".join(spec)
+
+
+COHORT_PERIODS = ("week", "month")
+
+
+def cohort_bucket(date: dt.date, period: str) -> str:
+    """Sortable label for the cohort bucket containing ``date`` (ISO week or month)."""
+    if period == "week":
+        year, week, _ = date.isocalendar()
+        return f"{year}-W{week:02d}"
+    return f"{date.year}-{date.month:02d}"
+
+
+# ScorecardAggregator state, grouped by how two partial aggregates merge.
+COUNT_FIELDS = (
+    "row_count",
+    "mql",
+    "sql",
+    "opp",
+    "mql_sql",
+    "sql_opp",
+    "won",
+    "lost",
+    "signups",
+    "activated",
+    "pilots",
+    "produced",
+)
+EXACT_SUM_FIELDS = (
+    "cycle_days",
+    "deal_sizes",
+    "ai_sessions_total",
+    "ai_escalations_total",
+    "ai_audited_total",
+    "ai_hallucinations_total",
+)
+DISTRIBUTION_FIELDS = ("ttfv_days", "ttpv_days")
+# Only tracked when ScorecardOptions.percentiles or .intervals is set.
+PERCENTILE_FIELDS = ("cycle_day_values", "deal_size_values")
+# Only tracked when ScorecardOptions.intervals is set: (denominator, numerator) -> rows, for the AI ratios.
+PAIR_FIELDS = ("escalation_pairs", "hallucination_pairs")
+
+# Percentile report name -> distribution field, label, and metric used for formatting.
+PERCENTILE_REPORTS = {
+    "sales_cycle_days": ("cycle_day_values", "Sales cycle days", "avg_sales_cycle_days"),
+    "deal_size": ("deal_size_values", "Deal size", "avg_deal_size"),
+    "ttfv_days": ("ttfv_days", "TTFV days", "ttfv_days"),
+    "ttpv_days": ("ttpv_days", "TTPV days", "ttpv_days"),
+}
+
+
+class ScorecardAggregator:
+    """Running aggregates for every scorecard metric.
+
+    Rows are folded in one at a time, so memory stays bounded no matter how
+    large the export is: counts and sums for the rates, exact sums for the
+    averages, and day-value histograms (or quantile sketches) for the medians.
+    """
+
+    def __init__(self, mapping: dict[str, str], options: ScorecardOptions | None = None) -> None:
+        self.mapping = mapping
+        self.options = options or ScorecardOptions()
+        self.date_parsers = {key: DateColumnParser() for key in DATE_FIELDS}
+        # Canonical fields to decode; the rest parse as blank, so their aggregates stay empty.
+        self.fields = frozenset(self.options.fields or DEFAULT_MAPPING)
+        self.row_count = 0
+
+        self.mql = 0
+        self.sql = 0
+        self.opp = 0
+        self.mql_sql = 0
+        self.sql_opp = 0
+
+        self.won = 0
+        self.lost = 0
+
+        self.cycle_days = ExactSum()
+        self.deal_sizes = ExactSum()
+
+        self.signups = 0
+        self.activated = 0
+        self.ttfv_days = self.options.new_distribution()
+        self.ttpv_days = self.options.new_distribution()
+
+        self.cycle_day_values: Distribution | None = None
+        self.deal_size_values: Distribution | None = None
+        if self.options.percentiles or self.options.intervals:
+            self.cycle_day_values = self.options.new_distribution()
+            self.deal_size_values = self.options.new_distribution()
+
+        self.pilots = 0
+        self.produced = 0
+
+        self.ai_sessions_total = ExactSum()
+        self.ai_escalations_total = ExactSum()
+        self.ai_audited_total = ExactSum()
+        self.ai_hallucinations_total = ExactSum()
+        self.escalation_pairs: Counter[tuple[float, float]] | None = None
+        self.hallucination_pairs: Counter[tuple[float, float]] | None = None
+        if self.options.intervals:
+            self.escalation_pairs = Counter()
+            self.hallucination_pairs = Counter()
+
+        # --group-by breakdowns: column spec -> group key -> child aggregator.
+        self.groups: dict[tuple[str, ...], dict[tuple[str, ...], ScorecardAggregator]] = {
+            spec: {} for spec in self.options.group_by
+        }
+        # --cohort-by buckets: period label -> child aggregator.
+        self.cohorts: dict[str, ScorecardAggregator] = {}
+        self.profile = ScanProfile() if self.options.profile else None
+        self.quality = RowQuality(mapping, self.options) if self.options.validate else None
+        self.funnel = FunnelStats() if self.options.funnel else None
+        self.survival = SurvivalStats() if self.options.survival else None
+
+    def parse_row(self, row: dict[str, Any]) -> dict[str, Any]:
+        """Decode the mapped cells of one row: dates, normalized status, and floats."""
+        mapping = self.mapping
+        fields = self.fields
+        parsed: dict[str, Any] = {
+            key: parse(get_value(row, key, mapping)) if key in fields else None for key, parse in self.date_parsers.items()
+        }
+        parsed["close_status"] = normalize_status(get_value(row, "close_status", mapping)) if "close_status" in fields else ""
+        parsed["deal_amount"] = parse_float(get_value(row, "deal_amount", mapping)) if "deal_amount" in fields else None
+        for key in AI_COUNTER_FIELDS:
+            parsed[key] = (parse_float(get_value(row, key, mapping)) or 0.0) if key in fields else 0.0
+        return parsed
+
+    def parse_row_profiled(self, row: dict[str, Any]) -> dict[str, Any]:
+        """parse_row that also records parse failures and matched date formats."""
+        mapping = self.mapping
+        fields = self.fields
+        profile = self.profile
+        parsed: dict[str, Any] = {}
+        for key, parser in self.date_parsers.items():
+            parsed[key] = None
+            if key in fields:
+                value = get_value(row, key, mapping)
+                parsed[key] = parser(value)
+                profile.record_date(key, value, parsed[key])
+        parsed["close_status"] = normalize_status(get_value(row, "close_status", mapping)) if "close_status" in fields else ""
+        for key in ("deal_amount", *AI_COUNTER_FIELDS):
+            parsed[key] = None
+            if key in fields:
+                value = get_value(row, key, mapping)
+                parsed[key] = parse_float(value)
+                profile.record_number(key, value, parsed[key])
+        for key in AI_COUNTER_FIELDS:
+            parsed[key] = parsed[key] or 0.0
+        return parsed
+
+    def add_row(self, row: dict[str, Any]) -> None:
+        if self.profile is not None:
+            started = time.perf_counter()
+            parsed = self.parse_row_profiled(row)
+            parsed_at = time.perf_counter()
+            if self.quality is None or self.quality.check(row, parsed):
+                self.add_parsed(parsed)
+                self.add_breakdowns(row, parsed)
+            self.profile.seconds["parse"] += parsed_at - started
+            self.profile.seconds["aggregate"] += time.perf_counter() - parsed_at
+            return
+
+        parsed = self.parse_row(row)
+        if self.quality is not None and not self.quality.check(row, parsed):
+            return
+        self.add_parsed(parsed)
+        self.add_breakdowns(row, parsed)
+
+    def add_breakdowns(self, row: dict[str, Any], parsed: dict[str, Any]) -> None:
+        """Fold a parsed row into its --group-by and --cohort-by children."""
+        for spec, groups in self.groups.items():
+            key = tuple(group_value(row.get(column)) for column in spec)
+            child = groups.get(key)
+            if child is None:
+                child = self.group(spec, key)
+            child.add_parsed(parsed)
+
+        cohort_by = self.options.cohort_by
+        if cohort_by is not None and parsed[cohort_by] is not None:
+            self.cohort(cohort_bucket(parsed[cohort_by], self.options.cohort_period)).add_parsed(parsed)
+
+    def add_parsed(self, parsed: dict[str, Any]) -> None:
+        self.row_count += 1
+
+        has_mql = parsed["mql_date"] is not None
+        has_sql = parsed["sql_date"] is not None
+        has_opp = parsed["opportunity_date"] is not None
+
+        if has_mql:
+            self.mql += 1
+        if has_sql:
+            self.sql += 1
+        if has_opp:
+            self.opp += 1
+
+        if has_mql and has_sql:
+            self.mql_sql += 1
+        if has_sql and has_opp:
+            self.sql_opp += 1
+
+        status = parsed["close_status"]
+        if status in WON_STATUSES:
+            self.won += 1
+        elif status in LOST_STATUSES:
+            self.lost += 1
+
+        deal_amount = parsed["deal_amount"]
+        if has_opp and deal_amount is not None and deal_amount > 0:
+            self.deal_sizes.add(deal_amount)
+            if self.deal_size_values is not None:
+                self.deal_size_values.add(deal_amount)
+
+        cycle = days_between(parsed["opportunity_date"], parsed["close_date"])
+        if cycle is not None and status in CLOSED_STATUSES:
+            self.cycle_days.add(cycle)
+            if self.cycle_day_values is not None:
+                self.cycle_day_values.add(cycle)
+
+        signup_date = parsed["signup_date"]
+        first_value_date = parsed["first_value_date"]
+        proven_value_date = parsed["proven_value_date"]
+
+        if signup_date is not None:
+            self.signups += 1
+
+        if signup_date is not None and first_value_date is not None:
+            self.activated += 1
+            ttfv = days_between(signup_date, first_value_date)
+            if ttfv is not None:
+                self.ttfv_days.add(ttfv)
+
+        if signup_date is not None and proven_value_date is not None:
+            ttpv = days_between(signup_date, proven_value_date)
+            if ttpv is not None:
+                self.ttpv_days.add(ttpv)
+
+        pilot_date = parsed["pilot_start_date"]
+        production_date = parsed["production_date"]
+
+        if pilot_date is not None:
+            self.pilots += 1
+        if pilot_date is not None and production_date is not None:
+            self.produced += 1
+
+        self.ai_sessions_total.add(parsed["ai_sessions"])
+        self.ai_escalations_total.add(parsed["ai_escalations"])
+        self.ai_audited_total.add(parsed["ai_audited_responses"])
+        self.ai_hallucinations_total.add(parsed["ai_hallucinations"])
+        if self.escalation_pairs is not None:
+            self.escalation_pairs[(parsed["ai_sessions"], parsed["ai_escalations"])] += 1
+            self.hallucination_pairs[(parsed["ai_audited_responses"], parsed["ai_hallucinations"])] += 1
+        if self.funnel is not None:
+            self.funnel.add(parsed)
+        if self.survival is not None:
+            self.survival.add(parsed)
+
+    def group(self, spec: tuple[str, ...], key: tuple[str, ...]) -> ScorecardAggregator:
+        """Aggregator for one group of a --group-by breakdown, created on first use."""
+        groups = self.groups[spec]
+        child = groups.get(key)
+        if child is None:
+            child = ScorecardAggregator(self.mapping, self.options.for_group())
+            child.date_parsers = self.date_parsers
+            groups[key] = child
+        return child
+
+    def cohort(self, label: str) -> ScorecardAggregator:
+        """Aggregator for one --cohort-by time bucket, created on first use."""
+        child = self.cohorts.get(label)
+        if child is None:
+            child = ScorecardAggregator(self.mapping, self.options.for_group())
+            child.date_parsers = self.date_parsers
+            self.cohorts[label] = child
+        return child
+
+    def merge(self, other: ScorecardAggregator) -> None:
+        for name in COUNT_FIELDS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in EXACT_SUM_FIELDS:
+            getattr(self, name).merge(getattr(other, name))
+        for name in DISTRIBUTION_FIELDS + PERCENTILE_FIELDS:
+            distribution = getattr(self, name)
+            if distribution is not None:
+                distribution.merge(getattr(other, name))
+        for name in PAIR_FIELDS:
+            pairs = getattr(self, name)
+            if pairs is not None:
+                pairs.update(getattr(other, name))
+        for spec, groups in other.groups.items():
+            for key, child in groups.items():
+                self.group(spec, key).merge(child)
+        for label, child in other.cohorts.items():
+            self.cohort(label).merge(child)
+        if self.profile is not None and other.profile is not None:
+            self.profile.merge(other.profile)
+        if self.quality is not None and other.quality is not None:
+            self.quality.merge(other.quality)
+        if self.funnel is not None and other.funnel is not None:
+            self.funnel.merge(other.funnel)
+        if self.survival is not None and other.survival is not None:
+            self.survival.merge(other.survival)
+
+    def to_state(self) -> dict[str, Any]:
+        """Plain JSON/pickle-friendly snapshot of the running aggregates."""
+        state: dict[str, Any] = {name: getattr(self, name) for name in COUNT_FIELDS}
+        for name in EXACT_SUM_FIELDS:
+            state[name] = getattr(self, name).to_state()
+        for name in DISTRIBUTION_FIELDS + PERCENTILE_FIELDS:
+            distribution = getattr(self, name)
+            state[name] = None if distribution is None else distribution.to_state()
+        for name in PAIR_FIELDS:
+            pairs = getattr(self, name)
+            state[name] = None if pairs is None else [[x, y, count] for (x, y), count in sorted(pairs.items())]
+        state["groups"] = [
+            {"by": list(spec), "groups": [[list(key), child.to_state()] for key, child in groups.items()]}
+            for spec, groups in self.groups.items()
+        ]
+        state["cohorts"] = [[label, child.to_state()] for label, child in self.cohorts.items()]
+        if self.profile is not None:
+            state["profile"] = self.profile.to_state()
+        if self.quality is not None:
+            state["quality"] = self.quality.to_state()
+        if self.funnel is not None:
+            state["funnel"] = self.funnel.to_state()
+        if self.survival is not None:
+            state["survival"] = self.survival.to_state()
+        return state
+
+    @classmethod
+    def from_state(
+        cls,
+        mapping: dict[str, str],
+        state: dict[str, Any],
+        options: ScorecardOptions | None = None,
+    ) -> ScorecardAggregator:
+        aggregator = cls(mapping, options)
+        for name in COUNT_FIELDS:
+            setattr(aggregator, name, int(state[name]))
+        for name in EXACT_SUM_FIELDS:
+            setattr(aggregator, name, ExactSum.from_state(state[name]))
+        for name in DISTRIBUTION_FIELDS + PERCENTILE_FIELDS:
+            if state.get(name) is not None:
+                setattr(aggregator, name, distribution_from_state(state[name]))
+        for name in PAIR_FIELDS:
+            if state.get(name) is not None:
+                setattr(aggregator, name, Counter({(float(x), float(y)): int(count) for x, y, count in state[name]}))
+        for breakdown in state.get("groups", []):
+            spec = tuple(breakdown["by"])
+            if spec not in aggregator.groups:
+                continue
+            for key, child_state in breakdown["groups"]:
+                child = aggregator.group(spec, tuple(key))
+                child.merge(cls.from_state(mapping, child_state, child.options))
+        if aggregator.options.cohort_by is not None:
+            for label, child_state in state.get("cohorts", []):
+                child = aggregator.cohort(label)
+                child.merge(cls.from_state(mapping, child_state, child.options))
+        if aggregator.profile is not None and state.get("profile") is not None:
+            aggregator.profile = ScanProfile.from_state(state["profile"])
+        if aggregator.quality is not None and state.get("quality") is not None:
+            aggregator.quality.load_state(state["quality"])
+        if aggregator.funnel is not None and state.get("funnel") is not None:
+            aggregator.funnel = FunnelStats.from_state(state["funnel"])
+        if aggregator.survival is not None and state.get("survival") is not None:
+            aggregator.survival = SurvivalStats.from_state(state["survival"])
+        return aggregator
+
+    def spawn(self) -> ScorecardAggregator:
+        """Empty aggregator with the same mapping and options, sharing date parsers."""
+        aggregator = ScorecardAggregator(self.mapping, self.options)
+        aggregator.date_parsers = self.date_parsers
+        return aggregator
+
+    def group_results(self, intervals: IntervalSpec | None = None) -> dict[str, list[dict[str, Any]]]:
+        """Per-group metrics and diagnostics for every --group-by breakdown, with intervals if requested."""
+        results: dict[str, list[dict[str, Any]]] = {}
+        for spec, groups in self.groups.items():
+            entries = []
+            for key in sorted(groups):
+                metrics, diagnostics = groups[key].result()
+                entry = {"key": dict(zip(spec, key)), "metrics": metrics, "diagnostics": diagnostics}
+                if intervals is not None:
+                    entry["intervals"] = metric_intervals(groups[key], replace(intervals, workers=1))
+                entries.append(entry)
+            results[group_label(spec)] = entries
+        return results
+
+    def cohort_results(self) -> dict[str, Any] | None:
+        """Per-metric time series over the --cohort-by buckets, oldest first."""
+        if self.options.cohort_by is None:
+            return None
+
+        buckets = sorted(self.cohorts)
+        results = [self.cohorts[label].result() for label in buckets]
+        return {
+            "anchor": self.options.cohort_by,
+            "period": self.options.cohort_period,
+            "buckets": buckets,
+            "row_counts": [diagnostics["row_count"] for _, diagnostics in results],
+            "series": {key: [metrics[key] for metrics, _ in results] for key in selected_metrics(self.options.metrics)},
+        }
+
+    def percentiles(self) -> dict[str, dict[str, Any]]:
+        report: dict[str, dict[str, Any]] = {}
+        for name, (field, _, _) in PERCENTILE_REPORTS.items():
+            distribution = getattr(self, field)
+            if distribution is None:
+                continue
+            entry: dict[str, Any] = {f"p{round(q * 100)}": distribution.quantile(q) for q in PERCENTILES}
+            entry["samples"] = distribution.count
+            entry["mode"] = distribution.kind
+            report[name] = entry
+        return report
+
+    def result(self) -> tuple[dict[str, float | None], dict[str, Any]]:
+        """Registered metrics (only the --metrics selection, if any) and the diagnostic counts."""
+        ai_sessions_total = self.ai_sessions_total.total()
+        ai_escalations_total = self.ai_escalations_total.total()
+        ai_audited_total = self.ai_audited_total.total()
+        ai_hallucinations_total = self.ai_hallucinations_total.total()
+
+        values: dict[str, float | None] = {}
+        for key in resolve_metrics(self.options.metrics):
+            values[key] = METRICS[key].compute(self, values)
+        metrics = {key: values[key] for key in selected_metrics(self.options.metrics)}
+
+        counts = {
+            "mql_accounts": self.mql,
+            "sql_accounts": self.sql,
+            "opportunity_accounts": self.opp,
+            "won_opportunities": self.won,
+            "lost_opportunities": self.lost,
+            "pilot_accounts": self.pilots,
+            "production_accounts": self.produced,
+            "ai_sessions_total": ai_sessions_total,
+            "ai_escalations_total": ai_escalations_total,
+            "ai_audited_responses_total": ai_audited_total,
+            "ai_hallucinations_total": ai_hallucinations_total,
+        }
+        diagnostics: dict[str, Any] = {"row_count": self.row_count}
+        for key, value in counts.items():
+            if self.fields.issuperset(AGGREGATE_FIELDS[DIAGNOSTIC_AGGREGATES[key]]):
+                diagnostics[key] = value
+        if self.options.percentiles:
+            diagnostics["percentiles"] = self.percentiles()
+        if self.options.fields:
+            diagnostics["fields_decoded"] = list(self.options.fields)
+        if self.funnel is not None:
+            diagnostics["funnel"] = self.funnel.summary(self.row_count)
+        if self.survival is not None:
+            diagnostics["survival"] = self.survival.summary(self.options.as_of)
+
+        return metrics, diagnostics
+
+
+ENGINES = ("python", "numpy")
+DECODED_FIELDS = (*DATE_FIELDS, "close_status", "deal_amount", *AI_COUNTER_FIELDS)
+COLUMNAR_CHUNK_ROWS = 65536
+
+STATUS_OTHER = 0
+STATUS_WON = 1
+STATUS_LOST = 2
+
+
+def status_code(value: Any) -> int:
+    status = normalize_status(value)
+    if status in WON_STATUSES:
+        return STATUS_WON
+    if status in LOST_STATUSES:
+        return STATUS_LOST
+    return STATUS_OTHER
+
+
+def require_numpy() -> Any:
+    if np is None:
+        raise ScorecardError("The numpy engine requires numpy (pip install numpy)")
+    return np
+
+
+def decode_column(
+    values: list[Any],
+    convert: Callable[[Any], Any],
+    dtype: Any,
+    observe: Callable[[Any, int], None] | None = None,
+) -> Any:
+    """Convert each distinct cell once and scatter the results into a typed array.
+
+    ``observe`` is called with each distinct cell and its number of occurrences.
+    """
+    index = {value: i for i, value in enumerate(dict.fromkeys(values))}
+    table = np.array([convert(value) for value in index], dtype=dtype)
+    codes = np.fromiter(map(index.__getitem__, values), dtype=np.intp, count=len(values))
+    if observe is not None:
+        for value, count in zip(index, np.bincount(codes, minlength=len(index)).tolist()):
+            observe(value, count)
+    return table[codes]
+
+
+def array_exact_sum(values: Any) -> ExactSum:
+    """ExactSum of a float64 array, built with math.fsum instead of a Python loop."""
+    total = ExactSum()
+    total.count = int(values.size)
+    finite = np.isfinite(values)
+    if not finite.all():
+        total.nonfinite = float(values[~finite].sum())
+        values = values[finite]
+
+    # Peel off the correctly rounded sum until the exact remainder is zero.
+    items = values.tolist()
+    while True:
+        part = math.fsum(items)
+        if not part:
+            break
+        total._accumulate(part)
+        items.append(-part)
+    return total
+
+
+def day_deltas(start: Any, end: Any, mask: Any) -> Any:
+    """Non-negative day differences (as float64) where both dates are present."""
+    valid = mask & ~np.isnat(start) & ~np.isnat(end)
+    deltas = (end[valid] - start[valid]).astype(np.int64)
+    return deltas[deltas >= 0].astype(np.float64)
+
+
+def add_array(distribution: Distribution, values: Any) -> None:
+    unique, counts = np.unique(values, return_counts=True)
+    for value, count in zip(unique.tolist(), counts.tolist()):
+        distribution.add(value, count)
+
+
+def add_pairs(pairs: Counter[tuple[float, float]], x: Any, y: Any) -> None:
+    unique, counts = np.unique(np.column_stack((x, y)), axis=0, return_counts=True)
+    for (a, b), count in zip(unique.tolist(), counts.tolist()):
+        pairs[(a, b)] += count
+
+
+def ai_counter(value: Any) -> float:
+    return parse_float(value) or 0.0
+
+
+def decode_block(
+    columns: dict[str, list[Any]],
+    date_parsers: dict[str, DateColumnParser],
+    profile: ScanProfile | None = None,
+    quality: RowQuality | None = None,
+) -> dict[str, Any]:
+    """Typed arrays for every mapped field of a block, keyed like ScorecardAggregator.parse_row.
+
+    With a ``profile``, parse failures and date formats are counted per distinct cell;
+    with a ``quality``, distinct cells that make a row bad are handed to it.
+    """
+
+    def date_observer(key: str) -> Callable[[Any, int], None] | None:
+        if profile is None and quality is None:
+            return None
+        parser = date_parsers[key]
+
+        def observe(value: Any, count: int) -> None:
+            parsed = parser(value)
+            if profile is not None:
+                profile.record_date(key, value, parsed, count)
+            if quality is not None and parsed is None:
+                quality.observe(key, value)
+
+        return observe
+
+    def number_observer(key: str) -> Callable[[Any, int], None] | None:
+        if profile is None and quality is None:
+            return None
+
+        def observe(value: Any, count: int) -> None:
+            parsed = parse_float(value)
+            if profile is not None:
+                profile.record_number(key, value, parsed, count)
+            if quality is not None and parsed is None:
+                quality.observe(key, value)
+
+        return observe
+
+    decoded = {
+        key: decode_column(columns[key], date_parsers[key], "datetime64[D]", date_observer(key))
+        for key in DATE_FIELDS
+        if key in columns
+    }
+    if "close_status" in columns:
+        decoded["close_status"] = decode_column(columns["close_status"], status_code, np.int8)
+    if "deal_amount" in columns:
+        decoded["deal_amount"] = decode_column(columns["deal_amount"], parse_float, np.float64, number_observer("deal_amount"))
+    for key in AI_COUNTER_FIELDS:
+        if key in columns:
+            decoded[key] = decode_column(columns[key], ai_counter, np.float64, number_observer(key))
+    return decoded
+
+
+def blank_field(key: str, rows: int) -> Any:
+    """Decoded array for a field outside the --metrics projection: every cell blank."""
+    if key in DATE_FIELDS:
+        return np.full(rows, np.datetime64("NaT"), dtype="datetime64[D]")
+    if key == "close_status":
+        return np.full(rows, STATUS_OTHER, dtype=np.int8)
+    if key == "deal_amount":
+        return np.full(rows, np.nan)
+    return np.zeros(rows)
+
+
+def block_rows(decoded: dict[str, Any], columns: dict[str, list[Any]]) -> int:
+    for values in (*decoded.values(), *columns.values()):
+        return len(values)
+    return 0
+
+
+def reduce_block(decoded: dict[str, Any], part: ScorecardAggregator) -> None:
+    """Vectorized equivalent of ScorecardAggregator.add_parsed into an empty aggregator."""
+    part.row_count = len(decoded["close_status"])
+
+    present = {key: ~np.isnat(decoded[key]) for key in DATE_FIELDS}
+    has_mql = present["mql_date"]
+    has_sql = present["sql_date"]
+    has_opp = present["opportunity_date"]
+
+    part.mql = int(has_mql.sum())
+    part.sql = int(has_sql.sum())
+    part.opp = int(has_opp.sum())
+    part.mql_sql = int((has_mql & has_sql).sum())
+    part.sql_opp = int((has_sql & has_opp).sum())
+
+    status = decoded["close_status"]
+    part.won = int((status == STATUS_WON).sum())
+    part.lost = int((status == STATUS_LOST).sum())
+
+    deal_amount = decoded["deal_amount"]
+    deal_sizes = deal_amount[has_opp & (deal_amount > 0)]
+    part.deal_sizes = array_exact_sum(deal_sizes)
+
+    closed = status != STATUS_OTHER
+    cycle_days = day_deltas(decoded["opportunity_date"], decoded["close_date"], closed)
+    part.cycle_days = array_exact_sum(cycle_days)
+
+    if part.deal_size_values is not None:
+        add_array(part.deal_size_values, deal_sizes)
+    if part.cycle_day_values is not None:
+        add_array(part.cycle_day_values, cycle_days)
+
+    has_signup = present["signup_date"]
+    part.signups = int(has_signup.sum())
+    part.activated = int((has_signup & present["first_value_date"]).sum())
+    add_array(part.ttfv_days, day_deltas(decoded["signup_date"], decoded["first_value_date"], has_signup))
+    add_array(part.ttpv_days, day_deltas(decoded["signup_date"], decoded["proven_value_date"], has_signup))
+
+    has_pilot = present["pilot_start_date"]
+    part.pilots = int(has_pilot.sum())
+    part.produced = int((has_pilot & present["production_date"]).sum())
+
+    part.ai_sessions_total = array_exact_sum(decoded["ai_sessions"])
+    part.ai_escalations_total = array_exact_sum(decoded["ai_escalations"])
+    part.ai_audited_total = array_exact_sum(decoded["ai_audited_responses"])
+    part.ai_hallucinations_total = array_exact_sum(decoded["ai_hallucinations"])
+    if part.escalation_pairs is not None:
+        add_pairs(part.escalation_pairs, decoded["ai_sessions"], decoded["ai_escalations"])
+        add_pairs(part.hallucination_pairs, decoded["ai_audited_responses"], decoded["ai_hallucinations"])
+
+
+def aggregate_columns(columns: dict[str, list[Any]], total: ScorecardAggregator) -> ScorecardAggregator:
+    """Vectorized equivalent of ScorecardAggregator.add_row over a block of columns.
+
+    Returns a partial aggregate for ``total`` to merge, reusing its date
+    parsers. Each block is decoded once; --group-by breakdowns reduce
+    row subsets of the decoded arrays.
+    """
+    if total.profile is None and total.quality is None:
+        return aggregate_decoded(decode_block(columns, total.date_parsers), columns, total)
+
+    profile = ScanProfile() if total.profile is not None else None
+    started = time.perf_counter()
+    decoded = decode_block(columns, total.date_parsers, profile, total.quality)
+    if total.quality is not None:
+        decoded, columns = drop_bad_rows(decoded, columns, total.quality)
+    decoded_at = time.perf_counter()
+    part = aggregate_decoded(decoded, columns, total)
+    if profile is not None:
+        profile.seconds["parse"] += decoded_at - started
+        profile.seconds["aggregate"] += time.perf_counter() - decoded_at
+        part.profile.merge(profile)
+    return part
+
+
+def drop_bad_rows(
+    decoded: dict[str, Any],
+    columns: dict[str, list[Any]],
+    quality: RowQuality,
+) -> tuple[dict[str, Any], dict[str, list[Any]]]:
+    """Hand a decoded block to ``quality`` and keep only its good rows."""
+    keep = quality.check_block(columns, block_rows(decoded, columns))
+    if keep is None:
+        return decoded, columns
+    mask = np.array(keep, dtype=bool)
+    decoded = {key: values[mask] for key, values in decoded.items()}
+    columns = {key: list(itertools.compress(values, keep)) for key, values in columns.items()}
+    return decoded, columns
+
+
+def aggregate_decoded(decoded: dict[str, Any], columns: dict[str, list[Any]], total: ScorecardAggregator) -> ScorecardAggregator:
+    """Partial aggregate of an already decoded block; ``columns`` supplies the --group-by values."""
+    part = total.spawn()
+    if len(decoded) < len(DECODED_FIELDS):
+        rows = block_rows(decoded, columns)
+        decoded = {key: decoded[key] if key in decoded else blank_field(key, rows) for key in DECODED_FIELDS}
+    reduce_block(decoded, part)
+    if part.funnel is not None:
+        part.funnel.add_block(decoded)
+    if part.survival is not None:
+        part.survival.add_block(decoded)
+
+    for spec in part.groups:
+        keys = list(zip(*(map(group_value, columns[GROUP_COLUMN_PREFIX + column]) for column in spec)))
+        index = {key: i for i, key in enumerate(dict.fromkeys(keys))}
+        codes = np.fromiter(map(index.__getitem__, keys), dtype=np.intp, count=len(keys))
+        for key, rows in zip(index, split_rows(codes, len(index))):
+            reduce_block({name: values[rows] for name, values in decoded.items()}, part.group(spec, key))
+
+    if part.options.cohort_by is not None:
+        labels, codes = cohort_codes(decoded[part.options.cohort_by], part.options.cohort_period)
+        for label, rows in zip(labels, split_rows(codes, len(labels))):
+            reduce_block({name: values[rows] for name, values in decoded.items()}, part.cohort(label))
+    return part
+
+
+def split_rows(codes: Any, count: int) -> list[Any]:
+    """Row indexes for each code in ``range(count)``; negative codes are dropped."""
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(count + 1))
+    return [order[bounds[i] : bounds[i + 1]] for i in range(count)]
+
+
+def cohort_codes(dates: Any, period: str) -> tuple[list[str], Any]:
+    """Cohort labels for a datetime64[D] column and each row's label index (-1 if no date)."""
+    valid = ~np.isnat(dates)
+    if period == "week":
+        days = dates[valid].astype(np.int64)
+        # 1970-01-01 was a Thursday; shift back to the Monday that starts the ISO week.
+        starts = (days - (days + 3) % 7).astype("datetime64[D]")
+    else:
+        starts = dates[valid].astype("datetime64[M]").astype("datetime64[D]")
+
+    unique, inverse = np.unique(starts, return_inverse=True)
+    codes = np.full(len(dates), -1, dtype=np.intp)
+    codes[valid] = inverse.reshape(-1)
+    return [cohort_bucket(day, period) for day in unique.astype(object)], codes
+
+
+def block_columns(mapping: dict[str, str], options: ScorecardOptions | None = None) -> dict[str, str]:
+    """Block key -> CSV column for everything the columnar engine reads (only --metrics fields, if set)."""
+    options = options or ScorecardOptions()
+    columns = {key: column for key, column in mapping.items() if key in options.fields} if options.fields else dict(mapping)
+    if options.validate:
+        # Quarantined rows always carry their account.
+        columns = {"account_id": mapping["account_id"], **columns}
+    for spec in options.group_by:
+        for column in spec:
+            columns[GROUP_COLUMN_PREFIX + column] = column
+    return columns
+
+
+def iter_row_blocks(
+    rows: Iterable[dict[str, Any]],
+    columns: dict[str, str],
+    chunk_rows: int = COLUMNAR_CHUNK_ROWS,
+) -> Iterator[dict[str, list[Any]]]:
+    iterator = iter(rows)
+    while True:
+        block = list(itertools.islice(iterator, chunk_rows))
+        if not block:
+            return
+        # Columns missing from a row are blank; None is left for short records.
+        yield {key: [row.get(column, "") for row in block] for key, column in columns.items()}
+
+
+def iter_record_blocks(
+    records: Iterator[list[str]],
+    header: list[str],
+    columns: dict[str, str],
+    chunk_rows: int = COLUMNAR_CHUNK_ROWS,
+) -> Iterator[dict[str, list[Any]]]:
+    """Turn csv.reader records into per-column blocks, skipping unused columns."""
+    # Later duplicates win, like csv.DictReader.
+    positions = {name: i for i, name in enumerate(header)}
+    width = len(header)
+    while True:
+        batch = list(itertools.islice(records, chunk_rows))
+        if not batch:
+            return
+
+        block = [record for record in batch if record]
+        if not block:
+            continue
+        if min(map(len, block)) < width:
+            for record in block:
+                record.extend([None] * (width - len(record)))
+
+        values: dict[str, list[Any]] = {}
+        for key, column in columns.items():
+            index = positions.get(column)
+            if index is None:
+                values[key] = [""] * len(block)
+            else:
+                values[key] = list(map(operator.itemgetter(index), block))
+        yield values
+
+
+def tuple_getter(keys: list[Any]) -> Callable[[Any], tuple[Any, ...]]:
+    """operator.itemgetter that returns a tuple for any number of keys."""
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda item: (item[key],)
+    return operator.itemgetter(*keys) if keys else (lambda item: ())
+
+
+def iter_record_rows(
+    records: Iterable[list[str]],
+    header: list[str],
+    columns: Iterable[str],
+) -> Iterator[dict[str, Any]]:
+    """csv.reader records as row dicts holding only ``columns``.
+
+    Column positions are resolved once from the header, so the other (often
+    hundreds of) export columns are never copied into a per-row dict. Rows
+    match csv.DictReader: later duplicate names win, short records read as
+    None and blank lines are skipped.
+    """
+    positions = {name: i for i, name in enumerate(header)}
+    present = [column for column in dict.fromkeys(columns) if column in positions]
+    indexes = [positions[column] for column in present]
+    width = max(indexes, default=-1) + 1
+    getter = tuple_getter(indexes)
+    for record in records:
+        if not record:
+            continue
+        if len(record) < width:
+            record = record + [None] * (width - len(record))
+        yield dict(zip(present, getter(record)))
+
+
+def row_columns(mapping: dict[str, str], options: ScorecardOptions | None = None) -> list[str]:
+    """CSV columns the row engine reads: the --metrics fields' columns plus --group-by columns."""
+    return list(dict.fromkeys(block_columns(mapping, options).values()))
+
+
+def aggregate_columnar(
+    blocks: Iterable[dict[str, list[Any]]],
+    mapping: dict[str, str],
+    options: ScorecardOptions | None = None,
+) -> ScorecardAggregator:
+    """Columnar NumPy engine: same aggregates as add_row, computed per block of rows.
+
+    Each block maps canonical keys to raw column values. Every mapped column
+    is decoded into a typed array (datetime64 dates, float64 amounts and
+    counters, int8 status codes) and the block is reduced with vectorized
+    masks. Blocks merge exactly, so memory stays bounded by the block size and
+    results match the Python engine.
+    """
+    require_numpy()
+    total = ScorecardAggregator(mapping, options)
+    for columns in blocks:
+        total.merge(aggregate_columns(columns, total))
+    return total
+
+
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".zst")
+INPUT_SUFFIXES = (".csv", *(".csv" + suffix for suffix in COMPRESSED_SUFFIXES))
+
+
+def is_compressed(path: Path) -> bool:
+    return path.suffix.lower() in COMPRESSED_SUFFIXES
+
+
+def open_text(path: Path) -> io.TextIOBase:
+    """Open a CSV export for text reading, decompressing .gz/.bz2/.zst by suffix."""
+    suffix = path.suffix.lower()
+    if suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    if suffix == ".bz2":
+        return bz2.open(path, "rt", encoding="utf-8", newline="")
+    if suffix == ".zst":
+        try:
+            import zstandard
+        except ImportError as exc:  # Optional: only .zst inputs need it.
+            raise ScorecardError(f"Reading {path.name} requires the zstandard package") from exc
+        stream = zstandard.ZstdDecompressor().stream_reader(path.open("rb"), read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    return path.open("r", encoding="utf-8", newline="")
+
+
+def resolve_inputs(values: list[str]) -> list[Path]:
+    """Expand --csv values (files, globs, directories) into an ordered, de-duplicated file list."""
+    paths: dict[Path, None] = {}
+    for value in values:
+        expanded = os.path.expanduser(value)
+        if glob.has_magic(expanded):
+            matches = [Path(match) for match in sorted(glob.glob(expanded, recursive=True))]
+            if not matches:
+                raise ScorecardError(f"No CSV files match: {value}")
+        elif Path(expanded).is_dir():
+            matches = sorted(
+                child for child in Path(expanded).iterdir() if child.name.lower().endswith(INPUT_SUFFIXES)
+            )
+            if not matches:
+                raise ScorecardError(f"No CSV files in directory: {value}")
+        else:
+            matches = [Path(expanded)]
+        for match in matches:
+            path = match.resolve()
+            if not path.is_file():
+                raise ScorecardError(f"CSV not found: {path}")
+            paths.setdefault(path, None)
+    return list(paths)
+
+
+def read_input_header(path: Path) -> list[str]:
+    """Header fields of a plain or compressed CSV export."""
+    with open_text(path) as f:
+        return next(csv.reader(f), None) or []
+
+
+SHARD_MIN_BYTES = 1 << 20
+# Bytes of a memory-mapped CSV decoded and parsed at a time (rounded to whole rows).
+MMAP_WINDOW_BYTES = 8 << 20
+
+
+@contextlib.contextmanager
+def map_csv(path: Path) -> Iterator[mmap.mmap | bytes]:
+    """Read-only memory map of a plain CSV (empty bytes for an empty file, which mmap rejects)."""
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def next_row_start(buffer: mmap.mmap | bytes, position: int, end: int, quoted: bool = False) -> int:
+    """Offset just past the first newline at or after ``position`` that is outside a quoted field.
+
+    ``quoted`` says whether ``position`` itself lies inside quotes. Quotes are
+    paired RFC 4180 style (an escaped quote is two), so the quoting state
+    flips with every odd count of quote bytes between newlines.
+    """
+    while position < end:
+        newline = buffer.find(b"\n", position, end)
+        if newline < 0:
+            return end
+        if buffer[position:newline].count(b'"') % 2:
+            quoted = not quoted
+        position = newline + 1
+        if not quoted:
+            return position
+    return end
+
+
+def is_quoted_at(buffer: mmap.mmap | bytes, row_start: int, position: int) -> bool:
+    """Whether ``position`` is inside a quoted field, counting quotes from a known row start."""
+    quotes = 0
+    for offset in range(row_start, position, MMAP_WINDOW_BYTES):
+        quotes += buffer[offset : min(offset + MMAP_WINDOW_BYTES, position)].count(b'"')
+    return quotes % 2 == 1
+
+
+def read_csv_header(path: Path) -> tuple[list[str], int]:
+    """Return the header fields and the byte offset where data rows start."""
+    with map_csv(path) as buffer:
+        offset = next_row_start(buffer, 0, len(buffer))
+        line = buffer[:offset]
+    fields = next(csv.reader(io.StringIO(line.decode("utf-8"), newline="")), None)
+    return fields or [], offset
+
+
+def plan_byte_ranges(path: Path, start: int, shards: int, min_bytes: int = SHARD_MIN_BYTES) -> list[tuple[int, int]]:
+    """Split [start, EOF) into at most ``shards`` ranges that each end on a row boundary.
+
+    ``start`` must be a row boundary. Each cut moves forward to the next
+    newline outside quotes, so rows with quoted line breaks are never split.
+    """
+    size = path.stat().st_size
+    if size <= start:
+        return []
+
+    shards = max(1, min(shards, (size - start) // min_bytes))
+    step = (size - start) // shards
+    bounds = [start]
+    with map_csv(path) as buffer:
+        for i in range(1, shards):
+            candidate = max(start + i * step, bounds[-1])
+            position = next_row_start(buffer, candidate, size, is_quoted_at(buffer, bounds[-1], candidate))
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def window_end(buffer: mmap.mmap | bytes, start: int, end: int) -> int:
+    """End of the next parse window from row boundary ``start``: about MMAP_WINDOW_BYTES of whole rows."""
+    limit = start + MMAP_WINDOW_BYTES
+    if limit >= end:
+        return end
+    newline = buffer.rfind(b"\n", start, limit)
+    if newline < 0:
+        return next_row_start(buffer, start, end)
+    if buffer[start:newline].count(b'"') % 2 == 0:
+        return newline + 1
+    return next_row_start(buffer, newline + 1, end, quoted=True)
+
+
+def split_lines(text: str) -> Iterable[str]:
+    """Lines of a decoded window for csv.reader.
+
+    str.splitlines() is the fast path, but it also breaks on \\x0c, \\x85,
+    \\u2028 and friends that csv keeps inside a field; when the line count
+    does not match the \\r/\\n count the window goes through io.StringIO.
+    """
+    lines = text.splitlines(True)
+    breaks = text.count("\n") + text.count("\r") - text.count("\r\n") + (text[-1:] not in ("\n", "\r"))
+    return lines if len(lines) == breaks else io.StringIO(text, newline="")
+
+
+def iter_range_records(path: Path, start: int, end: int) -> Iterator[list[str]]:
+    """csv records of the byte range [start, end), read through a memory map.
+
+    The range is decoded a window of whole rows at a time straight from the
+    mapped pages, so there is no per-line read or decode; ``start`` and
+    ``end`` must be row boundaries.
+    """
+    with map_csv(path) as buffer:
+        view = memoryview(buffer)
+        try:
+            position = start
+            while position < end:
+                stop = window_end(buffer, position, end)
+                text = str(view[position:stop], "utf-8")
+                position = stop
+                yield from csv.reader(split_lines(text))
+        finally:
+            view.release()
+
+
+def iter_input_records(path: Path) -> Iterator[list[str]]:
+    """csv records of a whole input file, header first, streamed (plain or compressed).
+
+    A full sequential scan is as fast through the buffered text reader as
+    through mmap windows, so the map is kept for byte ranges.
+    """
+    with open_text(path) as f:
+        yield from csv.reader(f)
+
+
+def aggregate_records(
+    records: Iterator[list[str]],
+    header: list[str],
+    mapping: dict[str, str],
+    engine: str = "python",
+    options: ScorecardOptions | None = None,
+) -> ScorecardAggregator:
+    """Aggregate csv.reader data records (header already consumed) with the chosen engine."""
+    if engine == "numpy":
+        blocks = iter_record_blocks(records, header, block_columns(mapping, options))
+        return aggregate_columnar(blocks, mapping, options)
+
+    aggregator = ScorecardAggregator(mapping, options)
+    for row in iter_record_rows(records, header, row_columns(mapping, options)):
+        aggregator.add_row(row)
+    return aggregator
+
+
+def aggregate_byte_range(
+    path: Path,
+    header: list[str],
+    start: int,
+    end: int,
+    mapping: dict[str, str],
+    engine: str,
+    options: ScorecardOptions,
+) -> dict[str, Any]:
+    """Process-pool worker: aggregate one row-aligned slice of the CSV."""
+    return aggregate_records(iter_range_records(path, start, end), header, mapping, engine, options).to_state()
+
+
+def aggregate_csv(
+    path: Path,
+    mapping: dict[str, str],
+    engine: str = "python",
+    workers: int = 1,
+    start: int | None = None,
+    options: ScorecardOptions | None = None,
+) -> ScorecardAggregator:
+    """Aggregate a CSV export, optionally sharded across a process pool.
+
+    With ``workers > 1`` the data rows are split into byte ranges that end
+    on row boundaries (quoted line breaks included), each worker
+    memory-maps and parses its own range and returns its partial aggregate
+    state, and the partials are merged in file order.
+    ``start`` resumes from a byte offset on a row boundary instead of the
+    first data row.
+    """
+    if engine == "numpy":
+        require_numpy()
+    options = options or ScorecardOptions()
+
+    header, data_start = read_csv_header(path)
+    if start is None:
+        start = data_start
+
+    ranges = plan_byte_ranges(path, start, max(workers, 1))
+    if len(ranges) <= 1:
+        if start == data_start:
+            records = iter_input_records(path)
+            next(records, None)
+        else:
+            records = iter_range_records(path, start, path.stat().st_size)
+        return aggregate_records(records, header, mapping, engine, options)
+
+    total = ScorecardAggregator(mapping, options)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(aggregate_byte_range, path, header, range_start, range_end, mapping, engine, options)
+            for range_start, range_end in ranges
+        ]
+        for future in futures:
+            total.merge(ScorecardAggregator.from_state(mapping, future.result(), options))
+    return total
+
+
+def aggregate_file(
+    path: Path,
+    mapping: dict[str, str],
+    engine: str = "python",
+    options: ScorecardOptions | None = None,
+) -> ScorecardAggregator:
+    """Aggregate one plain or compressed CSV export in a single streaming pass."""
+    records = iter_input_records(path)
+    header = next(records, None) or []
+    return aggregate_records(records, header, mapping, engine, options)
+
+
+def aggregate_file_state(
+    path: Path,
+    mapping: dict[str, str],
+    engine: str,
+    options: ScorecardOptions,
+) -> dict[str, Any]:
+    """Process-pool worker: aggregate one whole input file."""
+    return aggregate_file(path, mapping, engine, options).to_state()
+
+
+def aggregate_inputs(
+    paths: list[Path],
+    mapping: dict[str, str],
+    engine: str = "python",
+    workers: int = 1,
+    options: ScorecardOptions | None = None,
+) -> ScorecardAggregator:
+    """Aggregate one or more exports as if they were a single concatenated CSV.
+
+    A lone uncompressed file keeps byte-range sharding. Otherwise each file
+    is one unit of work (compressed streams cannot be split), spread across
+    the pool when ``workers > 1``; partials are merged in input order.
+    """
+    if engine == "numpy":
+        require_numpy()
+    options = options or ScorecardOptions()
+    if len(paths) == 1 and not is_compressed(paths[0]):
+        return aggregate_csv(paths[0], mapping, engine=engine, workers=workers, options=options)
+
+    total = ScorecardAggregator(mapping, options)
+    if workers <= 1 or len(paths) == 1:
+        for path in paths:
+            total.merge(aggregate_file(path, mapping, engine, options))
+        return total
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        futures = [pool.submit(aggregate_file_state, path, mapping, engine, options) for path in paths]
+        for future in futures:
+            total.merge(ScorecardAggregator.from_state(mapping, future.result(), options))
+    return total
+
+
+CACHE_VERSION = 1
+CACHE_META = "meta.json"
+DEFAULT_CACHE_MAX_MB = 1024
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "gtm-scorecard"
+
+
+def cache_key(paths: list[Path], columns: dict[str, str]) -> str:
+    """Hash of the input bytes plus the resolved column projection."""
+    digest = hashlib.sha256(json.dumps({"version": CACHE_VERSION, "columns": columns}, sort_keys=True).encode("utf-8"))
+    for path in paths:
+        digest.update(b"\0file\0")
+        with path.open("rb") as f:
+            for chunk in iter(functools.partial(f.read, 1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_input_blocks(paths: list[Path], columns: dict[str, str]) -> Iterator[dict[str, list[Any]]]:
+    for path in paths:
+        records = iter_input_records(path)
+        header = next(records, None) or []
+        yield from iter_record_blocks(records, header, columns)
+
+
+def write_cache_entry(
+    entry: Path,
+    blocks: Iterable[dict[str, list[Any]]],
+    total: ScorecardAggregator,
+) -> None:
+    """Decode blocks into ``total`` while appending each typed column to a flat binary file.
+
+    Dates, amounts, counters and status codes are stored as raw arrays;
+    --group-by columns as int32 codes into a label list kept in the metadata,
+    along with the parse telemetry so --profile can report it on later hits.
+    The entry is built in a temporary directory and renamed into place.
+    """
+    tmp = entry.with_name(entry.name + f".tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    files: dict[str, Any] = {}
+    dtypes: dict[str, str] = {}
+    labels: dict[str, dict[str, int]] = {}
+    telemetry = ScanProfile()
+    rows = 0
+    try:
+        for columns in blocks:
+            started = time.perf_counter()
+            decoded = decode_block(columns, total.date_parsers, telemetry)
+            telemetry.seconds["parse"] += time.perf_counter() - started
+            arrays = dict(decoded)
+            for key, values in columns.items():
+                if key.startswith(GROUP_COLUMN_PREFIX):
+                    index = labels.setdefault(key, {})
+                    arrays[key] = np.fromiter(
+                        (index.setdefault(group_value(value), len(index)) for value in values),
+                        dtype=np.int32,
+                        count=len(values),
+                    )
+            for key, array in arrays.items():
+                if key not in files:
+                    files[key] = (tmp / f"col{len(files)}.bin").open("wb")
+                    dtypes[key] = array.dtype.str
+                files[key].write(array.tobytes())
+            rows += block_rows(decoded, columns)
+            started = time.perf_counter()
+            total.merge(aggregate_decoded(decoded, columns, total))
+            telemetry.seconds["aggregate"] += time.perf_counter() - started
+    finally:
+        for handle in files.values():
+            handle.close()
+    if total.profile is not None:
+        total.profile.merge(telemetry)
+    telemetry.seconds.clear()
+
+    meta = {
+        "version": CACHE_VERSION,
+        "rows": rows,
+        "columns": {key: {"file": Path(handle.name).name, "dtype": dtypes[key]} for key, handle in files.items()},
+        "labels": {key: list(index) for key, index in labels.items()},
+        "telemetry": telemetry.to_state(),
+    }
+    (tmp / CACHE_META).write_text(json.dumps(meta), encoding="utf-8")
+    try:
+        os.replace(tmp, entry)
+    except OSError:  # Another run stored the same entry first.
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def aggregate_cache_entry(
+    entry: Path,
+    mapping: dict[str, str],
+    options: ScorecardOptions,
+    chunk_rows: int = COLUMNAR_CHUNK_ROWS,
+) -> ScorecardAggregator:
+    """Reduce a cached entry by memory-mapping its columns, one block of rows at a time."""
+    meta = json.loads((entry / CACHE_META).read_text(encoding="utf-8"))
+    rows = meta["rows"]
+    arrays = {
+        key: np.memmap(entry / column["file"], dtype=np.dtype(column["dtype"]), mode="r", shape=(rows,))
+        if rows
+        else np.empty(0, dtype=np.dtype(column["dtype"]))
+        for key, column in meta["columns"].items()
+    }
+    labels = meta["labels"]
+    total = ScorecardAggregator(mapping, options)
+    if total.profile is not None and meta.get("telemetry") is not None:
+        total.profile = ScanProfile.from_state(meta["telemetry"])
+    started = time.perf_counter()
+    for start in range(0, rows, chunk_rows):
+        decoded: dict[str, Any] = {}
+        columns: dict[str, list[Any]] = {}
+        for key, array in arrays.items():
+            block = np.asarray(array[start : start + chunk_rows])
+            if key in labels:
+                columns[key] = [labels[key][code] for code in block.tolist()]
+            else:
+                decoded[key] = block
+        total.merge(aggregate_decoded(decoded, columns, total))
+    if total.profile is not None:
+        total.profile.seconds["aggregate"] += time.perf_counter() - started
+    return total
+
+
+def cache_entry_size(entry: Path) -> int:
+    return sum(child.stat().st_size for child in entry.iterdir())
+
+
+def evict_cache(cache_dir: Path, max_bytes: int, keep: Path) -> list[Path]:
+    """Delete least recently used entries until the cache fits in ``max_bytes``."""
+    entries = [entry for entry in cache_dir.iterdir() if (entry / CACHE_META).is_file()]
+    entries.sort(key=lambda entry: (entry / CACHE_META).stat().st_mtime)
+    used = sum(cache_entry_size(entry) for entry in entries)
+    evicted = []
+    for entry in entries:
+        if used <= max_bytes:
+            break
+        if entry == keep:
+            continue
+        used -= cache_entry_size(entry)
+        shutil.rmtree(entry, ignore_errors=True)
+        evicted.append(entry)
+    return evicted
+
+
+def aggregate_cached(
+    paths: list[Path],
+    mapping: dict[str, str],
+    cache_dir: Path,
+    max_bytes: int,
+    options: ScorecardOptions | None = None,
+) -> tuple[ScorecardAggregator, bool]:
+    """Aggregate through the parsed-export cache; returns the aggregator and whether it was a hit.
+
+    Entries are keyed by the input bytes and the resolved mapping (plus any
+    --group-by columns), so changing targets, quantile settings or output
+    formatting reuses the decoded columns instead of reparsing the CSV.
+    """
+    require_numpy()
+    options = options or ScorecardOptions()
+    columns = block_columns(mapping, options)
+    entry = cache_dir / cache_key(paths, columns)
+    meta_path = entry / CACHE_META
+    if meta_path.is_file():
+        os.utime(meta_path)
+        return aggregate_cache_entry(entry, mapping, options), True
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    total = ScorecardAggregator(mapping, options)
+    write_cache_entry(entry, iter_input_blocks(paths, columns), total)
+    evict_cache(cache_dir, max_bytes, entry)
+    return total, False
+
+
+INCREMENTAL_STATE_VERSION = 2
+FINGERPRINT_TAIL_BYTES = 64 * 1024
+
+
+def options_state(options: ScorecardOptions) -> dict[str, Any]:
+    """ScorecardOptions as they round-trip through JSON (tuples become lists), minus the report-only settings."""
+    state = json.loads(json.dumps(asdict(options)))
+    state.pop("profile", None)
+    # --as-of only moves where --survival censors; the saved histograms don't depend on it.
+    state.pop("as_of", None)
+    return state
+
+
+def default_state_path(path: Path) -> Path:
+    return path.with_name(path.name + ".scorecard-state.json")
+
+
+def file_fingerprint(path: Path, size: int) -> dict[str, Any]:
+    """Identify the first ``size`` bytes of a file by its header and tail."""
+    with path.open("rb") as f:
+        header = f.readline()
+        f.seek(max(0, size - FINGERPRINT_TAIL_BYTES))
+        tail = f.read(min(size, FINGERPRINT_TAIL_BYTES))
+    return {
+        "size": size,
+        "header_sha256": hashlib.sha256(header).hexdigest(),
+        "tail_sha256": hashlib.sha256(tail).hexdigest(),
+    }
+
+
+def load_incremental_state(
+    state_path: Path,
+    input_csv: Path,
+    mapping: dict[str, str],
+    options: ScorecardOptions,
+) -> dict[str, Any] | None:
+    """Return the saved state if the CSV is an append-only extension of what it covers."""
+    if not state_path.exists():
+        return None
+    try:
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(state, dict) or state.get("version") != INCREMENTAL_STATE_VERSION:
+        return None
+    if state.get("mapping") != mapping or state.get("options") != options_state(options):
+        return None
+
+    if not extends_fingerprint(input_csv, state.get("fingerprint") or {}):
+        return None
+    return state
+
+
+def extends_fingerprint(path: Path, fingerprint: dict[str, Any]) -> bool:
+    """Whether ``path`` still starts with the bytes ``fingerprint`` describes, plus only whole appended rows."""
+    offset = fingerprint.get("size")
+    size = path.stat().st_size
+    if not isinstance(offset, int) or offset > size:
+        return False
+    if file_fingerprint(path, offset) != fingerprint:
+        return False
+
+    if size > offset:
+        # Appended bytes must start a new row, not continue an unterminated one.
+        with path.open("rb") as f:
+            f.seek(offset - 1)
+            if f.read(1) not in (b"\n", b"\r"):
+                return False
+    return True
+
+
+def save_incremental_state(
+    state_path: Path,
+    input_csv: Path,
+    mapping: dict[str, str],
+    size: int,
+    aggregator: ScorecardAggregator,
+) -> None:
+    state = {
+        "version": INCREMENTAL_STATE_VERSION,
+        "input_csv": str(input_csv),
+        "mapping": mapping,
+        "options": options_state(aggregator.options),
+        "fingerprint": file_fingerprint(input_csv, size),
+        "aggregates": aggregator.to_state(),
+    }
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_name(state_path.name + ".tmp")
+    tmp_path.write_text(json.dumps(state), encoding="utf-8")
+    tmp_path.replace(state_path)
+
+
+def aggregate_csv_incremental(
+    input_csv: Path,
+    mapping: dict[str, str],
+    state_path: Path,
+    engine: str = "python",
+    workers: int = 1,
+    options: ScorecardOptions | None = None,
+) -> tuple[ScorecardAggregator, int]:
+    """Fold only the bytes appended since the last run into the saved aggregates.
+
+    Falls back to a full rebuild when the state is missing, was built with a
+    different mapping or options, or the file was truncated or rewritten.
+    Returns the aggregator and the number of bytes scanned.
+    """
+    options = options or ScorecardOptions()
+    size = input_csv.stat().st_size
+    state = load_incremental_state(state_path, input_csv, mapping, options)
+    if state is None:
+        aggregator = aggregate_csv(input_csv, mapping, engine=engine, workers=workers, options=options)
+        scanned = size
+    else:
+        offset = state["fingerprint"]["size"]
+        aggregator = ScorecardAggregator.from_state(mapping, state["aggregates"], options)
+        if aggregator.profile is not None:
+            # Profile only what this run scans.
+            aggregator.profile = ScanProfile()
+        if size > offset:
+            appended = aggregate_csv(input_csv, mapping, engine=engine, workers=workers, start=offset, options=options)
+            aggregator.merge(appended)
+        scanned = size - offset
+
+    save_incremental_state(state_path, input_csv, mapping, size, aggregator)
+    return aggregator, scanned
+
+
+def compute_metrics(
+    rows: Iterable[dict[str, Any]],
+    mapping: dict[str, str],
+    engine: str = "python",
+    options: ScorecardOptions | None = None,
+) -> tuple[dict[str, float | None], dict[str, Any]]:
+    if engine == "numpy":
+        blocks = iter_row_blocks(rows, block_columns(mapping, options))
+        return aggregate_columnar(blocks, mapping, options).result()
+
+    aggregator = ScorecardAggregator(mapping, options)
+    for row in rows:
+        aggregator.add_row(row)
+    return aggregator.result()
+
+
+def iter_csv_rows(paths: list[Path], columns: list[str]) -> Iterator[dict[str, Any]]:
+    """Rows of every input file in order, projected to ``columns`` by each file's own header."""
+    for path in paths:
+        records = iter_input_records(path)
+        header = next(records, None)
+        if header is not None:
+            yield from iter_record_rows(records, header, columns)
+
+
+DEDUP_MERGE_POLICIES = ("nonempty", "max", "min")
+NUMERIC_FIELDS = ("deal_amount", *AI_COUNTER_FIELDS)
+
+
+@dataclass(frozen=True)
+class DedupSpec:
+    """How to collapse snapshot rows to one row per account_id."""
+
+    # Keep the row with the latest value of this date field; None keeps the last row.
+    latest_by: str | None = None
+    # (canonical field, policy) overrides applied on top of the kept row.
+    merge: tuple[tuple[str, str], ...] = ()
+    # Spill rows to this many hash partitions on disk instead of one in-memory index.
+    partitions: int = 0
+
+
+@dataclass
+class DedupStats:
+    input_rows: int = 0
+    accounts: int = 0
+    rows_without_account_id: int = 0
+
+    def summary(self) -> dict[str, int]:
+        output_rows = self.accounts + self.rows_without_account_id
+        return {
+            "input_rows": self.input_rows,
+            "output_rows": output_rows,
+            "accounts": self.accounts,
+            "duplicates_dropped": self.input_rows - output_rows,
+            "rows_without_account_id": self.rows_without_account_id,
+        }
+
+
+def dedup_sort_key(field: str, value: Any) -> Any:
+    """Comparable form of a cell for max/min merges and latest-row selection; None if empty."""
+    if field in DATE_FIELDS:
+        return parse_date(value)
+    if field in NUMERIC_FIELDS:
+        return parse_float(value)
+    text = normalize_status(value)
+    return text or None
+
+
+def dedup_rows(
+    rows: Iterable[dict[str, Any]],
+    mapping: dict[str, str],
+    spec: DedupSpec,
+    stats: DedupStats,
+) -> Iterator[dict[str, Any]]:
+    """Yield one row per account_id using an in-memory hash index.
+
+    Rows without an account_id cannot be matched and pass straight through.
+    Everything else is held until the input is exhausted: per account the
+    kept row (last seen, or latest by ``spec.latest_by``; ties go to the
+    later row) plus the running winners of each merge policy.
+    """
+    account_column = mapping["account_id"]
+    rank_column = mapping[spec.latest_by] if spec.latest_by else None
+    merges = [(mapping[field], field, policy) for field, policy in spec.merge]
+    index: dict[str, list[Any]] = {}
+
+    for row in rows:
+        stats.input_rows += 1
+        account = str(row.get(account_column) or "").strip()
+        if not account:
+            stats.rows_without_account_id += 1
+            yield row
+            continue
+
+        rank = None
+        if rank_column is not None:
+            ranked = dedup_sort_key(spec.latest_by, row.get(rank_column))
+            rank = (ranked is not None, ranked or dt.date.min)
+
+        entry = index.get(account)
+        if entry is None:
+            entry = index[account] = [row, rank, {}]
+        elif rank is None or rank >= entry[1]:
+            entry[0] = row
+            entry[1] = rank
+
+        merged = entry[2]
+        for column, field, policy in merges:
+            value = row.get(column)
+            key = dedup_sort_key(field, value)
+            if key is None:
+                continue
+            current = merged.get(column)
+            if (
+                current is None
+                or policy == "nonempty"
+                or (policy == "max" and key >= current[1])
+                or (policy == "min" and key < current[1])
+            ):
+                merged[column] = (value, key)
+
+    stats.accounts += len(index)
+    for row, _, merged in index.values():
+        if merged:
+            row = dict(row)
+            for column, (value, _) in merged.items():
+                row[column] = value
+        yield row
+
+
+SPILL_NONE_COLUMN = "__none__"
+
+
+def spilled_row(columns: list[str], record: list[str]) -> dict[str, Any]:
+    row: dict[str, Any] = dict(zip(columns, record))
+    for i in record[-1].split():
+        row[columns[int(i)]] = None
+    return row
+
+
+def dedup_rows_spilled(
+    rows: Iterable[dict[str, Any]],
+    mapping: dict[str, str],
+    spec: DedupSpec,
+    stats: DedupStats,
+    columns: list[str],
+) -> Iterator[dict[str, Any]]:
+    """External-memory variant of dedup_rows for very high-cardinality exports.
+
+    Rows are hash-partitioned on account_id into ``spec.partitions`` temporary
+    CSV files (keeping only ``columns``), then each partition is deduplicated
+    on its own. Every account lands in exactly one partition in file order,
+    so the result matches the in-memory index while holding one partition at
+    a time. A trailing spill column lists the cells that were None (short
+    records), which CSV alone would read back as blank.
+    """
+    account_column = mapping["account_id"]
+    with tempfile.TemporaryDirectory(prefix="scorecard-dedup-") as tmp:
+        paths = [Path(tmp) / f"part-{i:04d}.csv" for i in range(spec.partitions)]
+        handles = [path.open("w", encoding="utf-8", newline="") for path in paths]
+        try:
+            writers = [csv.writer(handle) for handle in handles]
+            for writer in writers:
+                writer.writerow([*columns, SPILL_NONE_COLUMN])
+            for row in rows:
+                account = str(row.get(account_column) or "").strip()
+                if not account:
+                    stats.input_rows += 1
+                    stats.rows_without_account_id += 1
+                    yield row
+                    continue
+                partition = zlib.crc32(account.encode("utf-8")) % spec.partitions
+                values = [row.get(column) for column in columns]
+                writers[partition].writerow([*values, " ".join(str(i) for i, value in enumerate(values) if value is None)])
+        finally:
+            for handle in handles:
+                handle.close()
+
+        for path in paths:
+            with path.open("r", encoding="utf-8", newline="") as f:
+                records = csv.reader(f)
+                next(records, None)
+                yield from dedup_rows((spilled_row(columns, record) for record in records), mapping, spec, stats)
+            path.unlink()
+
+
+def dedup_columns(mapping: dict[str, str], options: ScorecardOptions) -> list[str]:
+    """CSV columns a deduplicated row must keep: mapped fields plus --group-by columns."""
+    columns = dict.fromkeys(mapping.values())
+    for spec in options.group_by:
+        columns.update(dict.fromkeys(spec))
+    return list(columns)
+
+
+def iter_deduped_rows(
+    paths: list[Path],
+    mapping: dict[str, str],
+    spec: DedupSpec,
+    stats: DedupStats,
+    options: ScorecardOptions,
+) -> Iterator[dict[str, Any]]:
+    columns = dedup_columns(mapping, options)
+    projected = iter_csv_rows(paths, columns)
+    if spec.partitions > 0:
+        return dedup_rows_spilled(projected, mapping, spec, stats, columns)
+    return dedup_rows(projected, mapping, spec, stats)
+
+
+def parse_dedup_merge(values: list[str]) -> tuple[tuple[str, str], ...]:
+    merges: dict[str, str] = {}
+    for value in values:
+        field, _, policy = value.partition("=")
+        field = field.strip()
+        policy = policy.strip().lower()
+        if field not in DEFAULT_MAPPING or field == "account_id":
+            raise ScorecardError(f"--dedup-merge field must be a canonical field other than account_id: {field!r}")
+        if policy not in DEDUP_MERGE_POLICIES:
+            raise ScorecardError(f"--dedup-merge policy must be one of {', '.join(DEDUP_MERGE_POLICIES)}: {value!r}")
+        merges[field] = policy
+    return tuple(merges.items())
+
+
+def cpu_seconds() -> float:
+    """CPU time of this process plus its finished worker processes."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+class PhaseTimer:
+    """Wall and CPU seconds for consecutive --profile phases."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, dict[str, float]] = {}
+        self._wall = time.perf_counter()
+        self._cpu = cpu_seconds()
+
+    def lap(self, name: str) -> None:
+        wall, cpu = time.perf_counter(), cpu_seconds()
+        self.phases[name] = {"wall_s": round(wall - self._wall, 4), "cpu_s": round(cpu - self._cpu, 4)}
+        self._wall, self._cpu = wall, cpu
+
+
+def profile_summary(
+    timer: PhaseTimer,
+    profile: ScanProfile,
+    row_count: int,
+    engine: str,
+    workers: int,
+) -> dict[str, Any]:
+    """diagnostics["profile"]: phase timings, the scan's read/parse/aggregate split, throughput and memory.
+
+    Parse and aggregate seconds are summed over worker processes; the read
+    share (I/O and CSV decoding) is the scan's remaining wall time and is
+    only reported for single-process scans.
+    """
+    scan = timer.phases["scan"]["wall_s"]
+    parse = profile.seconds["parse"]
+    aggregate = profile.seconds["aggregate"]
+    return {
+        "engine": engine,
+        "workers": workers,
+        "phases": dict(timer.phases),
+        "scan_s": {
+            "read": round(max(0.0, scan - parse - aggregate), 4) if workers == 1 else None,
+            "parse": round(parse, 4),
+            "aggregate": round(aggregate, 4),
+        },
+        "rows_per_sec": round(row_count / scan, 1) if scan > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def render_profile(profile: dict[str, Any], telemetry: dict[str, Any]) -> list[str]:
+    scan = profile["phases"]["scan"]
+    split = profile["scan_s"]
+    read = "n/a" if split["read"] is None else f"{split['read']:.2f}s"
+
+    def counts(values: dict[str, int]) -> str:
+        return ", ".join(f"{column} ({count})" for column, count in values.items()) or "none"
+
+    lines = [
+        "## Profile",
+        "",
+        f"- Scan: {scan['wall_s']:.2f}s wall / {scan['cpu_s']:.2f}s CPU ({profile['rows_per_sec'] or 0:,.0f} rows/s)",
+        f"- Read / parse / aggregate: {read} / {split['parse']:.2f}s / {split['aggregate']:.2f}s",
+        f"- Unparseable dates: {counts(telemetry['unparseable_dates'])}",
+        f"- Unparseable numbers: {counts(telemetry['unparseable_numbers'])}",
+    ]
+    if profile["peak_rss_mb"] is not None:
+        lines.insert(4, f"- Peak memory: {profile['peak_rss_mb']:.0f} MB")
+    lines.append("")
+    return lines
+
+
+def render_quality(quality: dict[str, Any]) -> list[str]:
+    reasons = ", ".join(f"{reason} ({count})" for reason, count in quality["reasons"].items()) or "none"
+    lines = [
+        "## Data quality",
+        "",
+        f"- Rows checked / quarantined: {quality['rows_checked']} / {quality['bad_rows']} ({quality['bad_row_rate']:.2%})",
+        f"- Reasons: {reasons}",
+    ]
+    if quality["max_bad_rate"] is not None:
+        lines.append(f"- Max bad-row rate: {quality['max_bad_rate']:.2%}")
+    if quality["quarantine"] is not None:
+        lines.append(f"- Quarantine: `{quality['quarantine']}`")
+    if quality["bad_cells"]:
+        lines.extend(["", "| Column | Bad cells | Sample values |", "|---|---:|---|"])
+        for column, count in quality["bad_cells"].items():
+            samples = ", ".join(f"`{value}`".replace("|", "\\|") for value in quality["samples"].get(column, []))
+            lines.append(f"| {column} | {count} | {samples} |")
+    lines.append("")
+    return lines
+
+
+def render_funnel(funnel: dict[str, Any]) -> list[str]:
+    """Transition matrix (reach on the diagonal), per-transition latency histograms and furthest stage."""
+    stages = funnel["stages"]
+    names = [stage.removesuffix("_date") for stage in stages]
+    accounts = {(entry["from"], entry["to"]): entry["accounts"] for entry in funnel["transitions"]}
+    lines = [
+        "## Funnel",
+        "",
+        "Rows reaching both stages; the diagonal is rows reaching the stage.",
+        "",
+        "| From \\ to | " + " | ".join(names) + " |",
+        "|---|" + "---:|" * len(stages),
+    ]
+    for i, stage in enumerate(stages):
+        cells = [
+            str(funnel["reached"][stage]) if j == i else str(accounts.get((stage, other), 0)) if j > i else ""
+            for j, other in enumerate(stages)
+        ]
+        lines.append(f"| {names[i]} | " + " | ".join(cells) + " |")
+
+    buckets = latency_bucket_labels()
+    lines.extend(
+        [
+            "",
+            "| Transition | Rows | Conversion | Mean days | " + " | ".join(f"{bucket}d" for bucket in buckets) + " |",
+            "|---|---:|---:|---:|" + "---:|" * len(buckets),
+        ]
+    )
+    for entry in funnel["transitions"]:
+        conversion = "n/a" if entry["conversion"] is None else f"{entry['conversion'] * 100:.1f}%"
+        mean = "n/a" if entry["mean_days"] is None else f"{entry['mean_days']:.1f}"
+        histogram = " | ".join(str(entry["latency_days"][bucket]) for bucket in buckets)
+        name = f"{entry['from'].removesuffix('_date')} -> {entry['to'].removesuffix('_date')}"
+        lines.append(f"| {name} | {entry['accounts']} | {conversion} | {mean} | {histogram} |")
+
+    lines.extend(["", "| Stage | Reached | Furthest stage |", "|---|---:|---:|"])
+    for stage, name in zip(stages, names):
+        lines.append(f"| {name} | {funnel['reached'][stage]} | {funnel['furthest'][stage]} |")
+    lines.extend([f"| (none) | | {funnel['no_stage']} |", ""])
+    return lines
+
+
+def render_survival(survival: dict[str, Any]) -> list[str]:
+    """Censored (Kaplan-Meier) medians and horizon shares next to the reached-only medians."""
+    lines = ["## Time to value (Kaplan-Meier)", ""]
+    if survival["as_of"] is None:
+        lines.extend(["No signup or value dates to censor at.", ""])
+        return lines
+    horizons = [f"Reached by {horizon}d" for horizon in SURVIVAL_HORIZONS]
+    lines.extend(
+        [
+            f"Accounts without the value date are censored at {survival['as_of']} ({survival['as_of_source']}).",
+            "",
+            "| Metric | Accounts | Reached | Censored | KM median days | Reached-only median | " + " | ".join(horizons) + " |",
+            "|---|---:|---:|---:|---:|---:|" + "---:|" * len(horizons),
+        ]
+    )
+    labels = metric_definitions()
+    for metric, entry in survival["metrics"].items():
+        shares = [
+            "n/a" if share is None else f"{share * 100:.1f}%"
+            for share in (entry["reached_by"][str(horizon)] for horizon in SURVIVAL_HORIZONS)
+        ]
+        lines.append(
+            f"| {labels.get(metric, {}).get('label', metric)} | {entry['accounts']} | {entry['reached']} | {entry['censored']} "
+            f"| {format_metric(metric, entry['median_days'])} | {format_metric(metric, entry['reached_only_median_days'])} | "
+            + " | ".join(shares)
+            + " |"
+        )
+    lines.append("")
+    return lines
+
+
+INTERVAL_METHODS = ("bootstrap", "analytic")
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_RESAMPLES = 2000
+# Resamples per bootstrap batch; each batch has its own seed, so results don't depend on --workers.
+BOOTSTRAP_BATCH = 250
+# Histograms with more distinct values are merged into this many equal-count bins before resampling.
+BOOTSTRAP_MAX_SUPPORT = 4096
+# Cap on multinomial draws held in memory at once (resamples x distinct values).
+BOOTSTRAP_MAX_CELLS = 1 << 22
+
+# Rate metric -> (successes, trials) count fields; the win rate's trials are won + lost.
+RATE_INPUTS = {
+    "mql_to_sql_conversion": ("mql_sql", "mql"),
+    "sql_to_opportunity_conversion": ("sql_opp", "sql"),
+    "activation_rate": ("activated", "signups"),
+    "pilot_to_production_conversion": ("produced", "pilots"),
+}
+MEAN_INPUTS = {"avg_sales_cycle_days": "cycle_day_values", "avg_deal_size": "deal_size_values"}
+MEDIAN_INPUTS = {"ttfv_days": "ttfv_days", "ttpv_days": "ttpv_days"}
+RATIO_INPUTS = {"escalation_rate": "escalation_pairs", "hallucination_rate": "hallucination_pairs"}
+
+
+@dataclass(frozen=True)
+class IntervalSpec:
+    """--intervals settings."""
+
+    method: str = "bootstrap"
+    confidence: float = DEFAULT_CONFIDENCE
+    resamples: int = DEFAULT_RESAMPLES
+    seed: int = 0
+    workers: int = 1
+    # "interval" grades status by the interval instead of the 5% band.
+    status: str = "band"
+
+    def settings(self) -> dict[str, Any]:
+        """How the intervals were computed, for the diagnostics."""
+        settings: dict[str, Any] = {"method": self.method, "confidence": self.confidence, "status": self.status}
+        if self.method == "bootstrap":
+            settings.update(resamples=self.resamples, seed=self.seed)
+        return settings
+
+
+def interval_inputs(aggregator: ScorecardAggregator) -> dict[str, Any]:
+    """The counts and histograms every metric's interval is computed from (plain, picklable)."""
+    rates = {metric: (getattr(aggregator, hits), getattr(aggregator, trials)) for metric, (hits, trials) in RATE_INPUTS.items()}
+    rates["opportunity_win_rate"] = (aggregator.won, aggregator.won + aggregator.lost)
+    return {
+        "rates": rates,
+        "opportunities": (aggregator.opp, aggregator.row_count),
+        "means": {metric: getattr(aggregator, field).histogram() for metric, field in MEAN_INPUTS.items()},
+        "medians": {metric: getattr(aggregator, field).histogram() for metric, field in MEDIAN_INPUTS.items()},
+        "ratios": {
+            metric: [(x, y, count) for (x, y), count in sorted(getattr(aggregator, field).items())]
+            for metric, field in RATIO_INPUTS.items()
+        },
+    }
+
+
+def normal_quantile(confidence: float) -> float:
+    return statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+def histogram_moments(histogram: list[tuple[float, int]]) -> tuple[int, float, float] | None:
+    """(n, mean, sample variance) of a value histogram."""
+    n = sum(count for _, count in histogram)
+    if n == 0:
+        return None
+    mean = math.fsum(value * count for value, count in histogram) / n
+    if n == 1:
+        return n, mean, 0.0
+    return n, mean, math.fsum(count * (value - mean) ** 2 for value, count in histogram) / (n - 1)
+
+
+def histogram_value_at(histogram: list[tuple[float, int]], rank: int) -> float:
+    """Value of the 0-based ``rank``-th smallest sample."""
+    seen = 0
+    for value, count in histogram:
+        seen += count
+        if seen > rank:
+            return value
+    return histogram[-1][0]
+
+
+def wilson_interval(successes: int, trials: int, z: float) -> list[float] | None:
+    if trials == 0:
+        return None
+    p = successes / trials
+    center = (p + z * z / (2 * trials)) / (1 + z * z / trials)
+    spread = z / (1 + z * z / trials) * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials))
+    return [max(0.0, center - spread), min(1.0, center + spread)]
+
+
+def ratio_moments(pairs: list[tuple[float, float, int]]) -> tuple[float, float] | None:
+    """Ratio of sums and its delta-method standard error from (denominator, numerator, rows) pairs."""
+    n = sum(count for _, _, count in pairs)
+    x_total = math.fsum(x * count for x, _, count in pairs)
+    if n < 2 or x_total == 0:
+        return None
+    ratio = math.fsum(y * count for _, y, count in pairs) / x_total
+    residual = math.fsum(count * (y - ratio * x) ** 2 for x, y, count in pairs) / (n - 1)
+    return ratio, math.sqrt(residual / n) / (x_total / n)
+
+
+def analytic_intervals(inputs: dict[str, Any], confidence: float) -> dict[str, list[float] | None]:
+    """Wilson intervals for rates, normal intervals for means, order-statistic intervals for
+    medians, and delta-method intervals for the AI ratios and pipeline velocity."""
+    z = normal_quantile(confidence)
+    intervals: dict[str, list[float] | None] = {}
+    for metric, (successes, trials) in inputs["rates"].items():
+        intervals[metric] = wilson_interval(successes, trials, z)
+
+    relative_errors: list[float] = []
+    for metric, histogram in inputs["means"].items():
+        moments = histogram_moments(histogram)
+        if moments is None:
+            intervals[metric] = None
+            continue
+        n, mean, variance = moments
+        error = math.sqrt(variance / n)
+        intervals[metric] = [mean - z * error, mean + z * error]
+        relative_errors.append(error / mean if mean else math.inf)
+
+    for metric, histogram in inputs["medians"].items():
+        n = sum(count for _, count in histogram)
+        if n == 0:
+            intervals[metric] = None
+            continue
+        low = max(0, math.floor(n / 2 - z * math.sqrt(n) / 2))
+        high = min(n - 1, math.ceil(n / 2 + z * math.sqrt(n) / 2) - 1)
+        intervals[metric] = [histogram_value_at(histogram, low), histogram_value_at(histogram, high)]
+
+    for metric, pairs in inputs["ratios"].items():
+        moments = ratio_moments(pairs)
+        intervals[metric] = None if moments is None else [max(0.0, moments[0] - z * moments[1]), moments[0] + z * moments[1]]
+
+    hallucination = intervals["hallucination_rate"]
+    intervals["grounded_response_rate"] = (
+        None if hallucination is None else [max(0.0, 1.0 - hallucination[1]), max(0.0, 1.0 - hallucination[0])]
+    )
+
+    # Pipeline velocity = opportunities * win rate * deal size / cycle days: add relative errors in quadrature.
+    opportunities, rows = inputs["opportunities"]
+    won, closed = inputs["rates"]["opportunity_win_rate"]
+    deal = histogram_moments(inputs["means"]["avg_deal_size"])
+    cycle = histogram_moments(inputs["means"]["avg_sales_cycle_days"])
+    intervals["pipeline_velocity"] = None
+    if opportunities and won and deal is not None and cycle is not None and deal[1] and cycle[1] > 0:
+        velocity = opportunities * (won / closed) * deal[1] / cycle[1]
+        relative = math.sqrt(
+            (1 - opportunities / rows) / opportunities
+            + (1 - won / closed) / won
+            + sum(error * error for error in relative_errors)
+        )
+        intervals["pipeline_velocity"] = [max(0.0, velocity * (1 - z * relative)), velocity * (1 + z * relative)]
+    return intervals
+
+
+def compact_histogram(values: Any, counts: Any, keys: Any) -> tuple[Any, Any]:
+    """Merge a histogram sorted by ``keys`` into at most BOOTSTRAP_MAX_SUPPORT equal-count bins.
+
+    ``values`` may have several columns; each bin keeps the count-weighted
+    mean of its rows, so every bin sum (and the overall total) is preserved.
+    """
+    if len(counts) <= BOOTSTRAP_MAX_SUPPORT:
+        return values, counts
+    order = np.argsort(keys, kind="stable")
+    values, counts = values[order], counts[order]
+    before = np.cumsum(counts) - counts
+    bins = (before * BOOTSTRAP_MAX_SUPPORT // counts.sum()).astype(np.intp)
+    binned_counts = np.bincount(bins, weights=counts)
+    keep = binned_counts > 0
+    columns = [np.bincount(bins, weights=column * counts)[keep] / binned_counts[keep] for column in values.T]
+    return np.column_stack(columns), binned_counts[keep].astype(np.int64)
+
+
+def resample_histogram(rng: Any, counts: Any, size: int) -> Iterator[Any]:
+    """Row-bootstrap occurrence counts of each histogram value, in memory-bounded chunks."""
+    n = int(counts.sum())
+    probabilities = counts / n
+    step = max(1, BOOTSTRAP_MAX_CELLS // len(counts))
+    for start in range(0, size, step):
+        yield rng.multinomial(n, probabilities, size=min(step, size - start))
+
+
+def bootstrap_batch(inputs: dict[str, Any], size: int, seed: Any) -> dict[str, Any]:
+    """``size`` bootstrap replicates of every metric, as arrays (NaN where undefined)."""
+    rng = np.random.default_rng(seed)
+    replicates: dict[str, Any] = {}
+    for metric, (successes, trials) in inputs["rates"].items():
+        replicates[metric] = rng.binomial(trials, successes / trials, size) / trials if trials else None
+
+    for metric, histogram in inputs["means"].items():
+        if not histogram:
+            replicates[metric] = None
+            continue
+        values = np.array([value for value, _ in histogram], dtype=np.float64)
+        counts = np.array([count for _, count in histogram], dtype=np.int64)
+        values, counts = compact_histogram(values[:, None], counts, values)
+        n = counts.sum()
+        replicates[metric] = np.concatenate([draws @ values[:, 0] / n for draws in resample_histogram(rng, counts, size)])
+
+    for metric, histogram in inputs["medians"].items():
+        if not histogram:
+            replicates[metric] = None
+            continue
+        values = np.array([value for value, _ in histogram], dtype=np.float64)
+        counts = np.array([count for _, count in histogram], dtype=np.int64)
+        values, counts = compact_histogram(values[:, None], counts, values)
+        values = values[:, 0]
+        n = int(counts.sum())
+        medians = []
+        for draws in resample_histogram(rng, counts, size):
+            seen = np.cumsum(draws, axis=1)
+            lower = values[np.argmax(seen > (n - 1) // 2, axis=1)]
+            upper = values[np.argmax(seen > n // 2, axis=1)]
+            medians.append((lower + upper) / 2)
+        replicates[metric] = np.concatenate(medians)
+
+    for metric, pairs in inputs["ratios"].items():
+        if not pairs:
+            replicates[metric] = None
+            continue
+        table = np.array(pairs, dtype=np.float64)
+        counts = table[:, 2].astype(np.int64)
+        xy = table[:, :2]
+        total_x = (xy[:, 0] * counts).sum()
+        ratio = (xy[:, 1] * counts).sum() / total_x if total_x else 0.0
+        # Bin by residual so the rows merged together barely move the ratio.
+        xy, counts = compact_histogram(xy, counts, xy[:, 1] - ratio * xy[:, 0])
+        ratios = []
+        for draws in resample_histogram(rng, counts, size):
+            denominator = draws @ xy[:, 0]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratios.append(np.where(denominator > 0, (draws @ xy[:, 1]) / denominator, np.nan))
+        replicates[metric] = np.concatenate(ratios)
+
+    hallucination = replicates["hallucination_rate"]
+    replicates["grounded_response_rate"] = None if hallucination is None else np.maximum(0.0, 1.0 - hallucination)
+
+    # Components are resampled independently, so velocity replicates treat them as independent.
+    opportunities, rows = inputs["opportunities"]
+    parts = [replicates["opportunity_win_rate"], replicates["avg_deal_size"], replicates["avg_sales_cycle_days"]]
+    replicates["pipeline_velocity"] = None
+    if rows and all(part is not None for part in parts):
+        win, deal, cycle = parts
+        with np.errstate(divide="ignore", invalid="ignore"):
+            velocity = rng.binomial(rows, opportunities / rows, size) * win * deal / cycle
+        replicates["pipeline_velocity"] = np.where(cycle > 0, velocity, np.nan)
+    return replicates
+
+
+def bootstrap_intervals(inputs: dict[str, Any], spec: IntervalSpec) -> dict[str, list[float] | None]:
+    """Percentile bootstrap intervals from ``spec.resamples`` row resamples, batched over workers."""
+    if np is None:
+        raise ScorecardError("--intervals bootstrap requires numpy (pip install numpy); use --intervals analytic")
+    sizes = [min(BOOTSTRAP_BATCH, spec.resamples - start) for start in range(0, spec.resamples, BOOTSTRAP_BATCH)]
+    seeds = np.random.SeedSequence(spec.seed).spawn(len(sizes))
+    if spec.workers > 1 and len(sizes) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(spec.workers, len(sizes))) as pool:
+            batches = list(pool.map(bootstrap_batch, itertools.repeat(inputs), sizes, seeds))
+    else:
+        batches = [bootstrap_batch(inputs, size, seed) for size, seed in zip(sizes, seeds)]
+
+    tail = (1 - spec.confidence) / 2
+    intervals: dict[str, list[float] | None] = {}
+    for metric in batches[0]:
+        parts = [batch[metric] for batch in batches]
+        if any(part is None for part in parts):
+            intervals[metric] = None
+            continue
+        replicates = np.concatenate(parts)
+        replicates = replicates[np.isfinite(replicates)]
+        intervals[metric] = None if not replicates.size else np.quantile(replicates, [tail, 1 - tail]).tolist()
+    return intervals
+
+
+def metric_intervals(aggregator: ScorecardAggregator, spec: IntervalSpec) -> dict[str, list[float] | None]:
+    """[low, high] confidence interval per reported metric (None when undefined or a custom metric)."""
+    inputs = interval_inputs(aggregator)
+    if spec.method == "analytic":
+        intervals = analytic_intervals(inputs, spec.confidence)
+    else:
+        intervals = bootstrap_intervals(inputs, spec)
+    return {metric: intervals.get(metric) for metric in selected_metrics(aggregator.options.metrics)}
+
+
+def format_interval(metric: str, interval: list[float] | None) -> str:
+    if interval is None:
+        return "n/a"
+    return f"{format_metric(metric, interval[0])} to {format_metric(metric, interval[1])}"
+
+
+HISTORY_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS runs ("
+    "run_id INTEGER PRIMARY KEY, recorded_at TEXT NOT NULL, input TEXT NOT NULL, row_count INTEGER, payload TEXT)",
+    "CREATE TABLE IF NOT EXISTS metric_values ("
+    "run_id INTEGER NOT NULL REFERENCES runs (run_id), recorded_at TEXT NOT NULL, input TEXT NOT NULL, "
+    "metric TEXT NOT NULL, value REAL)",
+    "CREATE INDEX IF NOT EXISTS runs_input_time ON runs (input, recorded_at)",
+    "CREATE INDEX IF NOT EXISTS metric_values_series ON metric_values (input, metric, recorded_at)",
+)
+
+
+def connect_history(path: Path) -> sqlite3.Connection:
+    """Open (creating if needed) the append-only run history store."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    with conn:
+        for statement in HISTORY_SCHEMA:
+            conn.execute(statement)
+    return conn
+
+
+def record_run(
+    conn: sqlite3.Connection,
+    input_key: str,
+    recorded_at: dt.datetime,
+    metrics: dict[str, float | None],
+    targets: dict[str, float],
+    diagnostics: dict[str, Any],
+) -> int:
+    """Append one run's results; rows are never updated or deleted."""
+    stamp = recorded_at.astimezone(dt.timezone.utc).isoformat(timespec="seconds")
+    kept = {key: value for key, value in diagnostics.items() if key not in ("profile", "parse_telemetry")}
+    payload = json.dumps({"metrics": metrics, "targets": targets, "diagnostics": kept})
+    with conn:
+        run_id = conn.execute(
+            "INSERT INTO runs (recorded_at, input, row_count, payload) VALUES (?, ?, ?, ?)",
+            (stamp, input_key, diagnostics.get("row_count"), payload),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO metric_values (run_id, recorded_at, input, metric, value) VALUES (?, ?, ?, ?, ?)",
+            [(run_id, stamp, input_key, metric, value) for metric, value in metrics.items()],
+        )
+    return run_id
+
+
+def metric_series(
+    conn: sqlite3.Connection,
+    input_key: str,
+    metric: str,
+    since: str | None = None,
+    until: str | None = None,
+) -> list[tuple[str, float | None]]:
+    """(recorded_at, value) for every recorded run of ``input_key``, oldest first."""
+    query = "SELECT recorded_at, value FROM metric_values WHERE input = ? AND metric = ?"
+    params: list[Any] = [input_key, metric]
+    if since is not None:
+        query += " AND recorded_at >= ?"
+        params.append(since)
+    if until is not None:
+        query += " AND recorded_at <= ?"
+        params.append(until)
+    return conn.execute(query + " ORDER BY recorded_at, run_id", params).fetchall()
+
+
+def recorded_week(recorded_at: str) -> str:
+    return cohort_bucket(dt.datetime.fromisoformat(recorded_at).date(), "week")
+
+
+def weekly_deltas(series: list[tuple[str, float | None]]) -> list[dict[str, Any]]:
+    """Latest run per ISO week with the change from the previous week's latest run."""
+    weeks: dict[str, tuple[str, float | None]] = {}
+    for recorded_at, value in series:
+        weeks[recorded_week(recorded_at)] = (recorded_at, value)
+    rows: list[dict[str, Any]] = []
+    previous: float | None = None
+    for week, (recorded_at, value) in weeks.items():
+        delta = None if value is None or previous is None else value - previous
+        rows.append({"week": week, "recorded_at": recorded_at, "value": value, "delta": delta})
+        previous = value
+    return rows
+
+
+def history_trends(
+    conn: sqlite3.Connection,
+    input_key: str,
+    recorded_at: dt.datetime,
+    metrics: dict[str, float | None],
+) -> dict[str, Any] | None:
+    """Week-over-week deltas against the latest run recorded in an earlier ISO week."""
+    week_start = recorded_at.astimezone(dt.timezone.utc).date()
+    week_start -= dt.timedelta(days=week_start.weekday())
+    row = conn.execute(
+        "SELECT run_id, recorded_at FROM runs WHERE input = ? AND recorded_at < ? ORDER BY recorded_at DESC, run_id DESC LIMIT 1",
+        (input_key, week_start.isoformat()),
+    ).fetchone()
+    if row is None:
+        return None
+    run_id, baseline_at = row
+    previous = dict(conn.execute("SELECT metric, value FROM metric_values WHERE run_id = ?", (run_id,)))
+    deltas = {
+        metric: None if metrics.get(metric) is None or previous.get(metric) is None else metrics[metric] - previous[metric]
+        for metric in metrics
+    }
+    return {"baseline_recorded_at": baseline_at, "baseline_week": recorded_week(baseline_at), "deltas": deltas}
+
+
+def format_delta(metric: str, delta: float | None) -> str:
+    """Signed change with a direction arrow, in the metric's own units (percentage points for rates)."""
+    if delta is None:
+        return "n/a"
+    arrow = "▲" if delta > 0 else "▼" if delta < 0 else "→"
+    sign = "-" if delta < 0 else "+"
+    size = abs(delta)
+    if metric in PERCENT_METRICS:
+        return f"{arrow} {sign}{size * 100:.1f} pts"
+    if metric in DAY_METRICS:
+        return f"{arrow} {sign}{size:.1f} days"
+    if metric in CURRENCY_METRICS:
+        return f"{arrow} {sign}${size:,.2f}"
+    return f"{arrow} {sign}{size:.3f}"
+
+
+def render_metric_table(
+    metrics: dict[str, float | None],
+    targets: dict[str, float],
+    definitions: bool = True,
+    deltas: dict[str, float | None] | None = None,
+    intervals: dict[str, list[float] | None] | None = None,
+    interval_status: bool = False,
+    confidence: float = DEFAULT_CONFIDENCE,
+) -> list[str]:
+    """Metric rows with optional WoW deltas and confidence intervals; ``interval_status`` grades by interval."""
+    header = ["Metric", "Current"]
+    align = ["---", "---:"]
+    if intervals is not None:
+        header.append(f"{confidence * 100:g}% CI")
+        align.append("---:")
+    if deltas is not None:
+        header.append("WoW")
+        align.append("---:")
+    header += ["Target", "Status"]
+    align += ["---:", "---"]
+    if definitions:
+        header.append("Definition")
+        align.append("---")
+    lines = ["| " + " | ".join(header) + " |", "|" + "|".join(align) + "|"]
+
+    for key, meta in metric_definitions().items():
+        if key not in metrics:
+            continue
+        current = metrics[key]
+        target = targets.get(key)
+        interval = intervals.get(key) if intervals is not None else None
+        status = evaluate_status(key, current, target, meta["direction"], interval if interval_status else None)
+        cells = [meta["label"], format_metric(key, current)]
+        if intervals is not None:
+            cells.append(format_interval(key, interval))
+        if deltas is not None:
+            cells.append(format_delta(key, deltas.get(key)))
+        cells += [format_metric(key, target), status]
+        if definitions:
+            cells.append(meta["definition"])
+        lines.append("| " + " | ".join(cells) + " |")
+    return lines
+
+
+def render_group_sections(
+    groups: dict[str, list[dict[str, Any]]],
+    targets: dict[str, float],
+    interval_settings: dict[str, Any] | None = None,
+) -> list[str]:
+    lines: list[str] = []
+    for label, entries in groups.items():
+        lines.extend([f"## Breakdown by {label}", ""])
+        for entry in entries:
+            key = ", ".join(f"{column} = {value}" for column, value in entry["key"].items())
+            lines.extend([f"### {key} ({entry['diagnostics']['row_count']} rows)", ""])
+            lines.extend(
+                render_metric_table(
+                    entry["metrics"],
+                    targets,
+                    definitions=False,
+                    **interval_table_args(entry.get("intervals"), interval_settings),
+                )
+            )
+            lines.append("")
+    return lines
+
+
+COHORT_TABLE_BUCKETS = 12
+
+
+def render_cohort_trend(cohorts: dict[str, Any]) -> list[str]:
+    """Metric-by-bucket trend table for the latest cohort buckets."""
+    buckets = cohorts["buckets"][-COHORT_TABLE_BUCKETS:]
+    skipped = len(cohorts["buckets"]) - len(buckets)
+    lines = [f"## Cohort trend ({cohorts['anchor']} by {cohorts['period']})", ""]
+    if not buckets:
+        lines.extend([f"No rows have a {cohorts['anchor']}.", ""])
+        return lines
+    if skipped:
+        lines.extend([f"Latest {len(buckets)} of {len(cohorts['buckets'])} buckets; the JSON has the full series.", ""])
+
+    lines.append("| Metric | " + " | ".join(buckets) + " |")
+    lines.append("|---|" + "---:|" * len(buckets))
+    counts = cohorts["row_counts"][skipped:]
+    lines.append("| Rows | " + " | ".join(str(count) for count in counts) + " |")
+    for key, meta in metric_definitions().items():
+        if key not in cohorts["series"]:
+            continue
+        values = cohorts["series"][key][skipped:]
+        lines.append(f"| {meta['label']} | " + " | ".join(format_metric(key, value) for value in values) + " |")
+    lines.append("")
+    return lines
+
+
+def interval_table_args(
+    intervals: dict[str, list[float] | None] | None,
+    settings: dict[str, Any] | None,
+) -> dict[str, Any]:
+    """render_metric_table keyword arguments for a table's intervals and the run's --intervals settings."""
+    if intervals is None or settings is None:
+        return {}
+    return {
+        "intervals": intervals,
+        "interval_status": settings["status"] == "interval",
+        "confidence": settings["confidence"],
+    }
+
+
+def render_markdown(
+    input_csv: Path,
+    generated_at: str,
+    metrics: dict[str, float | None],
+    targets: dict[str, float],
+    diagnostics: dict[str, Any],
+    groups: dict[str, list[dict[str, Any]]] | None = None,
+    cohorts: dict[str, Any] | None = None,
+    input_files: list[Path] | None = None,
+    trends: dict[str, Any] | None = None,
+    intervals: dict[str, list[float] | None] | None = None,
+) -> str:
+    lines = [
+        "# Auto GTM Scorecard (CRM Export)",
+        "",
+        f"Generated: {generated_at}",
+        f"Input: `{input_csv}`" if input_files is None else f"Input: {len(input_files)} files",
+        *(f"- `{path}`" for path in input_files or ()),
+        "",
+    ]
+    if trends is not None:
+        lines.extend([f"WoW: change since the run of {trends['baseline_recorded_at']} ({trends['baseline_week']}).", ""])
+    settings = diagnostics.get("intervals")
+    if intervals is not None and settings is not None:
+        method = settings["method"] + (f", {settings['resamples']} resamples" if settings["method"] == "bootstrap" else "")
+        grading = "the interval vs. target" if settings["status"] == "interval" else "the 5% band"
+        lines.extend([f"Confidence intervals: {method}. Status uses {grading}.", ""])
+    lines.extend(
+        render_metric_table(
+            metrics,
+            targets,
+            deltas=trends["deltas"] if trends is not None else None,
+            **interval_table_args(intervals, settings),
+        )
+    )
+
+    def count(key: str) -> str:
+        # Counts over fields that --metrics left undecoded are absent, not zero.
+        return f"{diagnostics[key]:.0f}" if key in diagnostics else "n/a"
+
+    lines.extend(
+        [
+            "",
+            "## Diagnostics",
+            f"- Rows processed: {diagnostics['row_count']}",
+            f"- MQL accounts: {count('mql_accounts')}",
+            f"- SQL accounts: {count('sql_accounts')}",
+            f"- Opportunity accounts: {count('opportunity_accounts')}",
+            f"- Closed won / lost: {count('won_opportunities')} / {count('lost_opportunities')}",
+            f"- Pilot accounts: {count('pilot_accounts')}",
+            f"- Production accounts: {count('production_accounts')}",
+            f"- AI sessions / escalations: {count('ai_sessions_total')} / {count('ai_escalations_total')}",
+            f"- Audited responses / hallucinations: {count('ai_audited_responses_total')} / {count('ai_hallucinations_total')}",
+        ]
+    )
+    if diagnostics.get("fields_decoded"):
+        lines.append(f"- Fields decoded (--metrics): {', '.join(diagnostics['fields_decoded'])}")
+    dedup = diagnostics.get("dedup")
+    if dedup:
+        lines.append(
+            f"- Deduplicated: {dedup['input_rows']} input rows -> {dedup['output_rows']} rows "
+            f"({dedup['accounts']} accounts, {dedup['duplicates_dropped']} duplicates dropped)"
+        )
+    lines.append("")
+
+    percentiles = diagnostics.get("percentiles")
+    if percentiles:
+        lines.extend(
+            [
+                "## Percentiles",
+                "",
+                "| Distribution | p50 | p75 | p90 | Samples | Mode |",
+                "|---|---:|---:|---:|---:|---|",
+            ]
+        )
+        for name, entry in percentiles.items():
+            _, label, metric = PERCENTILE_REPORTS[name]
+            lines.append(
+                "| {label} | {p50} | {p75} | {p90} | {samples} | {mode} |".format(
+                    label=label,
+                    p50=format_metric(metric, entry["p50"]),
+                    p75=format_metric(metric, entry["p75"]),
+                    p90=format_metric(metric, entry["p90"]),
+                    samples=entry["samples"],
+                    mode=entry["mode"],
+                )
+            )
+        lines.append("")
+
+    if diagnostics.get("funnel"):
+        lines.extend(render_funnel(diagnostics["funnel"]))
+    if diagnostics.get("survival"):
+        lines.extend(render_survival(diagnostics["survival"]))
+    if diagnostics.get("quality"):
+        lines.extend(render_quality(diagnostics["quality"]))
+    if diagnostics.get("profile"):
+        lines.extend(render_profile(diagnostics["profile"], diagnostics["parse_telemetry"]))
+    if cohorts is not None:
+        lines.extend(render_cohort_trend(cohorts))
+    if groups:
+        lines.extend(render_group_sections(groups, targets, settings))
+
+    return "\n".join(lines)
+
+
+def resolve_group_by(values: list[str], mapping: dict[str, str], paths: list[Path]) -> tuple[tuple[str, ...], ...]:
+    """Turn --group-by arguments into CSV column specs; canonical field names go through the mapping.
+
+    Every column must appear in the header of every input file.
+    """
+    if not values:
+        return ()
+    headers = [read_input_header(path) for path in paths]
+    header = [column for column in headers[0] if all(column in other for other in headers[1:])]
+    specs: list[tuple[str, ...]] = []
+    for value in values:
+        columns = tuple(mapping.get(name, name) for name in (part.strip() for part in value.split(",")) if name)
+        if not columns:
+            raise ScorecardError(f"Empty --group-by value: {value!r}")
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise ScorecardError(f"--group-by column(s) not in CSV header: {', '.join(missing)}")
+        if columns not in specs:
+            specs.append(columns)
+    return tuple(specs)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build GTM scorecard from CRM/export CSV")
+    parser.add_argument(
+        "--csv",
+        required=True,
+        nargs="+",
+        help="Input CRM/export CSV path(s): files, globs or directories; .gz/.bz2/.zst are decompressed on the fly",
+    )
+    parser.add_argument("--out-md", required=True, help="Output markdown path")
+    parser.add_argument("--out-json", help="Optional output JSON path")
+    parser.add_argument("--mapping", help="Optional YAML/JSON file mapping canonical field names to CSV columns")
+    parser.add_argument("--targets", help="Optional YAML/JSON file with metric targets")
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="python",
+        help="Aggregation engine: row-by-row Python (default) or columnar numpy",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for sharded aggregation of large CSVs (default 1, 0 = all cores)",
+    )
+    parser.add_argument(
+        "--quantiles",
+        choices=QUANTILE_MODES,
+        default="exact",
+        help="Median/percentile computation: exact histograms (default) or bounded-memory sketches",
+    )
+    parser.add_argument(
+        "--sketch-error",
+        type=float,
+        default=DEFAULT_SKETCH_ERROR,
+        help=f"Relative error bound for --quantiles sketch (default {DEFAULT_SKETCH_ERROR})",
+    )
+    parser.add_argument(
+        "--percentiles",
+        action="store_true",
+        help="Report p50/p75/p90 for sales cycle, deal size, TTFV and TTPV",
+    )
+    parser.add_argument(
+        "--funnel",
+        action="store_true",
+        help="Add a stage-to-stage transition matrix, latency histograms and drop-off over every date field",
+    )
+    parser.add_argument(
+        "--survival",
+        action="store_true",
+        help="Add Kaplan-Meier TTFV/TTPV curves and medians that count accounts without value yet as censored",
+    )
+    parser.add_argument(
+        "--as-of",
+        help="Date --survival censors at (default: the latest signup/first value/proven value date in the export)",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="append",
+        default=[],
+        metavar="METRIC[,METRIC...]",
+        help="Report only these metrics; only the columns they (and their dependencies) need are decoded",
+    )
+    parser.add_argument(
+        "--metric-plugin",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="Python file that calls register_metric() to add custom metrics (repeatable)",
+    )
+    parser.add_argument(
+        "--intervals",
+        choices=INTERVAL_METHODS,
+        help="Add a confidence interval to every metric: NumPy row bootstrap or analytic (Wilson/normal/delta method)",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=DEFAULT_CONFIDENCE,
+        help=f"Confidence level for --intervals (default {DEFAULT_CONFIDENCE})",
+    )
+    parser.add_argument(
+        "--resamples",
+        type=int,
+        default=DEFAULT_RESAMPLES,
+        help=f"Bootstrap resamples for --intervals bootstrap (default {DEFAULT_RESAMPLES})",
+    )
+    parser.add_argument("--interval-seed", type=int, default=0, help="Random seed for --intervals bootstrap (default 0)")
+    parser.add_argument(
+        "--interval-status",
+        action="store_true",
+        help="Grade status by the interval (on-track only if it clears the target) instead of the 5%% band",
+    )
+    parser.add_argument(
+        "--group-by",
+        action="append",
+        default=[],
+        metavar="COLUMN[,COLUMN...]",
+        help="Add a per-group breakdown (repeatable; comma-join columns to group by their combination)",
+    )
+    parser.add_argument(
+        "--cohort-by",
+        choices=DATE_FIELDS,
+        help="Date field whose week/month buckets get their own metrics (trend table + JSON series)",
+    )
+    parser.add_argument(
+        "--cohort-period",
+        choices=COHORT_PERIODS,
+        default="month",
+        help="Cohort bucket size for --cohort-by (default month)",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Keep one row per account_id (the last one in the file unless --dedup-latest-by is set)",
+    )
+    parser.add_argument(
+        "--dedup-latest-by",
+        choices=DATE_FIELDS,
+        help="Keep the account row with the latest value of this date field (implies --dedup)",
+    )
+    parser.add_argument(
+        "--dedup-merge",
+        action="append",
+        default=[],
+        metavar="FIELD=POLICY",
+        help=f"Per-field merge across an account's rows, policy one of {'/'.join(DEDUP_MERGE_POLICIES)} (repeatable, implies --dedup)",
+    )
+    parser.add_argument(
+        "--dedup-partitions",
+        type=int,
+        default=0,
+        help="Spill dedup to this many on-disk hash partitions to bound memory (implies --dedup)",
+    )
+    parser.add_argument(
+        "--quarantine",
+        help="Validate mapped cells and write rows that fail (unparseable date/number, record cut off "
+        "before a mapped date/number column) to this CSV; "
+        "they are left out of the metrics",
+    )
+    parser.add_argument(
+        "--max-bad-rate",
+        type=parse_rate,
+        help=f"Abort when more than this share of rows fails validation, e.g. 0.02 or 2%% "
+        f"(checked from row {FAIL_FAST_MIN_ROWS:,} on and after the scan; implies validation)",
+    )
+    parser.add_argument(
+        "--quarantine-samples",
+        type=int,
+        default=ScorecardOptions.quarantine_samples,
+        help=f"Sample bad values kept per column for the diagnostics (default {ScorecardOptions.quarantine_samples})",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse saved aggregates and only scan rows appended since the last run",
+    )
+    parser.add_argument(
+        "--state",
+        help="Incremental state file (default: <csv>.scorecard-state.json next to the CSV)",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse decoded columns from the parsed-export cache when the CSV and mapping are unchanged (requires numpy)",
+    )
+    parser.add_argument("--cache-dir", help="Parsed-export cache directory (default: $XDG_CACHE_HOME/gtm-scorecard)")
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_CACHE_MAX_MB,
+        help=f"Evict least recently used cache entries above this size (default: {DEFAULT_CACHE_MAX_MB})",
+    )
+    parser.add_argument(
+        "--history",
+        help="Append this run to a SQLite history store and show week-over-week deltas in the Markdown",
+    )
+    parser.add_argument(
+        "--history-key",
+        help="Series name for --history runs (default: the input path); use one key per recurring export",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rebuild the scorecard whenever an input, mapping or targets file changes",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=WATCH_INTERVAL_SECONDS,
+        help=f"Seconds between --watch polls (default {WATCH_INTERVAL_SECONDS:g})",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=WATCH_DEBOUNCE_SECONDS,
+        help=f"Seconds the inputs must stay unchanged before a --watch rebuild (default {WATCH_DEBOUNCE_SECONDS:g})",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Add phase timings, throughput, peak memory and parse-failure telemetry to the diagnostics",
+    )
+    return parser.parse_args()
+
+
+def parse_rate(value: str) -> float:
+    """A share of rows: 0.02 or 2%."""
+    text = value.strip()
+    try:
+        rate = float(text[:-1]) / 100 if text.endswith("%") else float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a rate: {value!r}") from None
+    if not 0 <= rate < 1:
+        raise argparse.ArgumentTypeError(f"rate must be at least 0 and below 1 (100%): {value!r}")
+    return rate
+
+
+def build_options(args: argparse.Namespace, mapping: dict[str, str], input_paths: list[Path]) -> ScorecardOptions:
+    selection = [key.strip() for value in args.metrics for key in value.split(",") if key.strip()]
+    fields = metric_fields(selection)
+    if fields and args.cohort_by is not None and args.cohort_by not in fields:
+        fields = tuple(field for field in DEFAULT_MAPPING if field in fields or field == args.cohort_by)
+    if fields and args.funnel:
+        fields = tuple(field for field in DEFAULT_MAPPING if field in fields or field in FUNNEL_STAGES)
+    if fields and args.survival:
+        survival_fields = ("signup_date", *SURVIVAL_FIELDS.values())
+        fields = tuple(field for field in DEFAULT_MAPPING if field in fields or field in survival_fields)
+    as_of = None
+    if args.as_of is not None:
+        if not args.survival:
+            raise ScorecardError("--as-of needs --survival")
+        date = parse_date(args.as_of)
+        if date is None:
+            raise ScorecardError(f"--as-of is not a date: {args.as_of!r}")
+        as_of = date.isoformat()
+    options = ScorecardOptions(
+        quantiles=args.quantiles,
+        sketch_error=args.sketch_error,
+        percentiles=args.percentiles,
+        group_by=resolve_group_by(args.group_by, mapping, input_paths),
+        cohort_by=args.cohort_by,
+        cohort_period=args.cohort_period,
+        profile=args.profile,
+        intervals=args.intervals is not None,
+        metrics=tuple(selected_metrics(selection)) if selection else (),
+        fields=fields,
+        validate=bool(args.quarantine) or args.max_bad_rate is not None,
+        max_bad_rate=args.max_bad_rate,
+        quarantine_samples=max(0, args.quarantine_samples),
+        funnel=args.funnel,
+        survival=args.survival,
+        as_of=as_of,
+    )
+    if not 0 < options.sketch_error < 1:
+        raise ScorecardError("--sketch-error must be between 0 and 1")
+    if options.validate and (args.incremental or args.cache or args.watch):
+        raise ScorecardError("--quarantine/--max-bad-rate cannot be combined with --incremental, --cache or --watch")
+    return options
+
+
+def build_interval_spec(args: argparse.Namespace, workers: int) -> IntervalSpec | None:
+    if args.intervals is None:
+        if args.interval_status:
+            raise ScorecardError("--interval-status needs --intervals")
+        return None
+    if not 0 < args.confidence < 1:
+        raise ScorecardError("--confidence must be between 0 and 1")
+    if args.resamples < 1:
+        raise ScorecardError("--resamples must be at least 1")
+    return IntervalSpec(
+        method=args.intervals,
+        confidence=args.confidence,
+        resamples=args.resamples,
+        seed=args.interval_seed,
+        workers=workers,
+        status="interval" if args.interval_status else "band",
+    )
+
+
+def history_path(args: argparse.Namespace) -> Path | None:
+    return Path(args.history).expanduser().resolve() if args.history else None
+
+
+def build_dedup_spec(args: argparse.Namespace, workers: int) -> DedupSpec | None:
+    if not (args.dedup or args.dedup_latest_by or args.dedup_merge or args.dedup_partitions):
+        return None
+    if args.incremental or args.cache or workers > 1:
+        raise ScorecardError("--dedup options cannot be combined with --incremental, --cache or --workers")
+    return DedupSpec(
+        latest_by=args.dedup_latest_by,
+        merge=parse_dedup_merge(args.dedup_merge),
+        partitions=max(0, args.dedup_partitions),
+    )
+
+
+def aggregate_deduped(
+    paths: list[Path],
+    mapping: dict[str, str],
+    engine: str,
+    spec: DedupSpec,
+    stats: DedupStats,
+    options: ScorecardOptions,
+) -> ScorecardAggregator:
+    rows = iter_deduped_rows(paths, mapping, spec, stats, options)
+    if engine == "numpy":
+        return aggregate_columnar(iter_row_blocks(rows, block_columns(mapping, options)), mapping, options)
+    aggregator = ScorecardAggregator(mapping, options)
+    for row in rows:
+        aggregator.add_row(row)
+    return aggregator
+
+
+def scan_inputs(
+    args: argparse.Namespace,
+    input_paths: list[Path],
+    mapping: dict[str, str],
+    workers: int,
+    options: ScorecardOptions,
+    dedup: DedupSpec | None,
+    dedup_stats: DedupStats,
+) -> ScorecardAggregator:
+    """Aggregate the inputs the way the flags ask: deduplicated, cached, incremental or a plain scan."""
+    input_csv = input_paths[0]
+    if dedup is not None:
+        return aggregate_deduped(input_paths, mapping, args.engine, dedup, dedup_stats, options)
+    if args.cache:
+        if args.incremental:
+            raise ScorecardError("--cache cannot be combined with --incremental")
+        cache_dir = Path(args.cache_dir).expanduser().resolve() if args.cache_dir else default_cache_dir()
+        aggregator, hit = aggregate_cached(
+            input_paths,
+            mapping,
+            cache_dir,
+            max(0, args.cache_max_mb) << 20,
+            options=options,
+        )
+        print(f"Parsed-export cache {'hit' if hit else 'miss'} ({cache_dir})")
+        return aggregator
+    if args.incremental:
+        if len(input_paths) > 1 or is_compressed(input_csv):
+            raise ScorecardError("--incremental needs a single uncompressed CSV")
+        state_path = Path(args.state).expanduser().resolve() if args.state else default_state_path(input_csv)
+        aggregator, scanned = aggregate_csv_incremental(
+            input_csv,
+            mapping,
+            state_path,
+            engine=args.engine,
+            workers=workers,
+            options=options,
+        )
+        print(f"Incremental scan: {scanned} bytes (state: {state_path})")
+        return aggregator
+    return aggregate_inputs(input_paths, mapping, engine=args.engine, workers=workers, options=options)
+
+
+def write_scorecard(
+    aggregator: ScorecardAggregator,
+    input_paths: list[Path],
+    mapping: dict[str, str],
+    targets: dict[str, float],
+    out_md: Path,
+    out_json: Path | None,
+    engine: str,
+    workers: int,
+    timer: PhaseTimer,
+    dedup_stats: DedupStats | None = None,
+    history_path: Path | None = None,
+    history_key: str | None = None,
+    intervals: IntervalSpec | None = None,
+    quarantine: Path | None = None,
+) -> None:
+    """Render the aggregates to Markdown (and JSON); ``timer`` has already lapped the scan.
+
+    With ``history_path`` the run is appended to the history store and the
+    Markdown shows week-over-week deltas against earlier runs of the same key.
+    """
+    input_csv = input_paths[0] if len(input_paths) == 1 else Path(os.path.commonpath(input_paths))
+    input_files = input_paths if len(input_paths) > 1 else None
+
+    metrics, diagnostics = aggregator.result()
+    quality = aggregator.quality
+    if diagnostics["row_count"] == 0:
+        if quality is not None and quality.bad_rows:
+            raise ScorecardError(f"All {quality.bad_rows} data rows failed validation")
+        raise ScorecardError("CSV has no data rows")
+    if quality is not None:
+        diagnostics["quality"] = quality.summary(quarantine)
+    if dedup_stats is not None:
+        diagnostics["dedup"] = dedup_stats.summary()
+    groups = aggregator.group_results(intervals)
+    cohorts = aggregator.cohort_results()
+    interval_values = None
+    if intervals is not None:
+        interval_values = metric_intervals(aggregator, intervals)
+        diagnostics["intervals"] = intervals.settings()
+    timer.lap("results")
+    if aggregator.profile is not None:
+        diagnostics["profile"] = profile_summary(timer, aggregator.profile, diagnostics["row_count"], engine, workers)
+        diagnostics["parse_telemetry"] = aggregator.profile.telemetry(mapping)
+
+    now = dt.datetime.now(dt.timezone.utc)
+    generated_at = now.strftime("%Y-%m-%d %H:%M UTC")
+
+    trends = None
+    if history_path is not None:
+        conn = connect_history(history_path)
+        try:
+            key = history_key or str(input_csv)
+            trends = history_trends(conn, key, now, metrics)
+            record_run(conn, key, now, metrics, targets, diagnostics)
+        finally:
+            conn.close()
+
+    out_md.parent.mkdir(parents=True, exist_ok=True)
+    out_md.write_text(
+        render_markdown(
+            input_csv=input_csv,
+            input_files=input_files,
+            generated_at=generated_at,
+            metrics=metrics,
+            targets=targets,
+            diagnostics=diagnostics,
+            groups=groups,
+            cohorts=cohorts,
+            trends=trends,
+            intervals=interval_values,
+        ),
+        encoding="utf-8",
+    )
+    if aggregator.profile is not None:
+        timer.lap("render")
+        diagnostics["profile"]["phases"]["render"] = timer.phases["render"]
+
+    if out_json is not None:
+        out_json.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "generated_at": generated_at,
+            "input_csv": str(input_csv),
+            "metrics": metrics,
+            "targets": targets,
+            "diagnostics": diagnostics,
+        }
+        if input_files is not None:
+            payload["input_files"] = [str(path) for path in input_files]
+        if groups:
+            payload["groups"] = groups
+        if cohorts is not None:
+            payload["cohorts"] = cohorts
+        if interval_values is not None:
+            payload["intervals"] = interval_values
+        if trends is not None:
+            payload["trends"] = trends
+        out_json.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+WATCH_INTERVAL_SECONDS = 2.0
+WATCH_DEBOUNCE_SECONDS = 1.0
+
+
+def file_signature(path: Path | None) -> tuple[int, int] | None:
+    if path is None:
+        return None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+@dataclass
+class FileAggregate:
+    """In-memory aggregate of one watched input and the file state it covers."""
+
+    signature: tuple[int, int]
+    fingerprint: dict[str, Any]
+    aggregator: ScorecardAggregator
+
+
+class ScorecardWatcher:
+    """Keeps mapping, targets and per-file aggregates between --watch rebuilds.
+
+    Changed inputs that only grew by whole rows are folded in from the old
+    end of file; rewritten or compressed inputs are rescanned on their own.
+    A mapping change invalidates every aggregate, a targets change only
+    re-renders. Dedup spans files, so with dedup any input change rescans all.
+    """
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+        self.out_md = Path(args.out_md).expanduser().resolve()
+        self.out_json = Path(args.out_json).expanduser().resolve() if args.out_json else None
+        self.mapping_path = Path(args.mapping).expanduser().resolve() if args.mapping else None
+        self.targets_path = Path(args.targets).expanduser().resolve() if args.targets else None
+        self.mapping: dict[str, str] | None = None
+        self.targets: dict[str, float] | None = None
+        self.config_signatures: tuple[Any, Any] | None = None
+        self.options: ScorecardOptions | None = None
+        self.files: dict[Path, FileAggregate] = {}
+        self.dedup = build_dedup_spec(args, self.workers)
+        self.dedup_aggregate: tuple[dict[Path, tuple[int, int]], ScorecardAggregator, DedupStats] | None = None
+
+    def snapshot(self) -> tuple[Any, ...]:
+        """Cheap change detector: sizes and mtimes of inputs, mapping and targets."""
+        try:
+            paths = resolve_inputs(self.args.csv)
+        except ScorecardError:
+            paths = []
+        return (
+            tuple((path, file_signature(path)) for path in paths),
+            file_signature(self.mapping_path),
+            file_signature(self.targets_path),
+        )
+
+    def load_config(self) -> bool:
+        """(Re)load mapping and targets when their files changed; True if either value changed."""
+        signatures = (file_signature(self.mapping_path), file_signature(self.targets_path))
+        if signatures == self.config_signatures:
+            return False
+        self.config_signatures = signatures
+        mapping = load_mapping(self.mapping_path)
+        targets = load_targets(self.targets_path)
+        changed = mapping != self.mapping or targets != self.targets
+        if mapping != self.mapping:
+            self.files.clear()
+            self.dedup_aggregate = None
+            self.options = None
+        self.mapping, self.targets = mapping, targets
+        return changed
+
+    def refresh_file(self, path: Path, options: ScorecardOptions) -> bool:
+        """Bring one input's aggregate up to date; True if it had to be (re)scanned."""
+        signature = file_signature(path)
+        if signature is None:
+            raise ScorecardError(f"CSV not found: {path}")
+        previous = self.files.get(path)
+        if previous is not None and previous.signature == signature:
+            return False
+
+        engine, workers = self.args.engine, self.workers
+        size = signature[0]
+        if previous is not None and not is_compressed(path) and extends_fingerprint(path, previous.fingerprint):
+            if size == previous.fingerprint["size"]:
+                # Touched but not modified.
+                self.files[path] = FileAggregate(signature, previous.fingerprint, previous.aggregator)
+                return False
+            aggregator = ScorecardAggregator(self.mapping, options)
+            aggregator.merge(previous.aggregator)
+            aggregator.merge(
+                aggregate_csv(path, self.mapping, engine=engine, workers=workers, start=previous.fingerprint["size"], options=options)
+            )
+        else:
+            aggregator = aggregate_inputs([path], self.mapping, engine=engine, workers=workers, options=options)
+        fingerprint = {} if is_compressed(path) else file_fingerprint(path, size)
+        self.files[path] = FileAggregate(signature, fingerprint, aggregator)
+        return True
+
+    def rebuild(self, force: bool = False) -> bool:
+        """Refresh whatever changed and rewrite the scorecard; False if nothing did."""
+        timer = PhaseTimer()
+        config_changed = self.load_config()
+        paths = resolve_inputs(self.args.csv)
+        if self.options is None or config_changed:
+            options = build_options(self.args, self.mapping, paths)
+            if options != self.options:
+                self.files.clear()
+                self.dedup_aggregate = None
+            self.options = options
+        options = self.options
+        timer.lap("setup")
+
+        dedup_stats = None
+        if self.dedup is not None:
+            signatures = {path: file_signature(path) for path in paths}
+            rescanned = 0
+            if self.dedup_aggregate is None or self.dedup_aggregate[0] != signatures:
+                dedup_stats = DedupStats()
+                aggregator = aggregate_deduped(paths, self.mapping, self.args.engine, self.dedup, dedup_stats, options)
+                self.dedup_aggregate = (signatures, aggregator, dedup_stats)
+                rescanned = len(paths)
+            _, aggregator, dedup_stats = self.dedup_aggregate
+        else:
+            for path in set(self.files) - set(paths):
+                del self.files[path]
+            rescanned = sum(self.refresh_file(path, options) for path in paths)
+            aggregator = ScorecardAggregator(self.mapping, options)
+            for path in paths:
+                aggregator.merge(self.files[path].aggregator)
+        timer.lap("scan")
+
+        if not (force or config_changed or rescanned):
+            return False
+        write_scorecard(
+            aggregator,
+            paths,
+            self.mapping,
+            self.targets,
+            self.out_md,
+            self.out_json,
+            self.args.engine,
+            self.workers,
+            timer,
+            dedup_stats,
+            history_path(self.args),
+            self.args.history_key,
+            build_interval_spec(self.args, self.workers),
+        )
+        stamp = dt.datetime.now().strftime("%H:%M:%S")
+        print(f"[{stamp}] Scorecard rebuilt: {self.out_md} ({len(paths)} input(s), {rescanned} rescanned)", flush=True)
+        return True
+
+
+def watch_scorecard(args: argparse.Namespace) -> int:
+    """--watch: poll inputs, mapping and targets; rebuild once a burst of writes has settled."""
+    if args.incremental or args.cache:
+        raise ScorecardError("--watch keeps its own in-memory state; drop --incremental/--cache")
+    interval = max(0.1, args.watch_interval)
+    debounce = max(0.0, args.debounce)
+    watcher = ScorecardWatcher(args)
+    print(f"Watching {', '.join(args.csv)} (every {interval:g}s, debounce {debounce:g}s; Ctrl-C to stop)", flush=True)
+
+    built: tuple[Any, ...] | None = None
+    try:
+        while True:
+            current = watcher.snapshot()
+            if current != built:
+                # Wait until the inputs stop changing before rebuilding.
+                while True:
+                    time.sleep(debounce)
+                    settled = watcher.snapshot()
+                    if settled == current:
+                        break
+                    current = settled
+                try:
+                    watcher.rebuild(force=built is None)
+                except (ScorecardError, OSError, csv.Error, yaml.YAMLError, ValueError) as exc:
+                    print(f"Rebuild failed: {exc}", file=sys.stderr, flush=True)
+                built = current
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Watch stopped.")
+    return 0
+
+
+def main() -> int:
+    args = parse_args()
+    load_metric_plugins(args.metric_plugin)
+    if args.watch:
+        return watch_scorecard(args)
+    timer = PhaseTimer()
+
+    input_paths = resolve_inputs(args.csv)
+    out_md = Path(args.out_md).expanduser().resolve()
+    out_json = Path(args.out_json).expanduser().resolve() if args.out_json else None
+
+    mapping_path = Path(args.mapping).expanduser().resolve() if args.mapping else None
+    targets_path = Path(args.targets).expanduser().resolve() if args.targets else None
+
+    mapping = load_mapping(mapping_path)
+    targets = load_targets(targets_path)
+
+    workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+    options = build_options(args, mapping, input_paths)
+    dedup = build_dedup_spec(args, workers)
+    quarantine = Path(args.quarantine).expanduser().resolve() if args.quarantine else None
+
+    dedup_stats = DedupStats()
+    timer.lap("setup")
+    spool: Any = contextlib.nullcontext()
+    if quarantine is not None:
+        quarantine.parent.mkdir(parents=True, exist_ok=True)
+        spool = tempfile.TemporaryDirectory(prefix=".scorecard-quarantine-", dir=quarantine.parent)
+    with spool as spool_dir:
+        options = replace(options, quarantine_dir=spool_dir)
+        aggregator = scan_inputs(args, input_paths, mapping, workers, options, dedup, dedup_stats)
+        if aggregator.quality is not None:
+            if quarantine is not None:
+                write_quarantine(quarantine, aggregator.quality)
+                print(f"Quarantine written: {quarantine} ({aggregator.quality.bad_rows} rows)")
+            aggregator.quality.check_rate(final=True)
+    timer.lap("scan")
+
+    write_scorecard(
+        aggregator,
+        input_paths,
+        mapping,
+        targets,
+        out_md,
+        out_json,
+        args.engine,
+        workers,
+        timer,
+        dedup_stats if dedup is not None else None,
+        history_path(args),
+        args.history_key,
+        build_interval_spec(args, workers),
+        quarantine,
+    )
 
     print(f"Scorecard written: {out_md}")
     if args.out_json:
@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""Load CRM exports into a local SQLite warehouse and build scorecards with SQL aggregates."""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime as dt
+import functools
+import hashlib
+import json
+import math
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from build_scorecard_from_crm import (
+    AI_COUNTER_FIELDS,
+    BLANK_GROUP,
+    CLOSED_STATUSES,
+    COHORT_PERIODS,
+    DATE_FIELDS,
+    DEFAULT_MAPPING,
+    DEFAULT_SKETCH_ERROR,
+    LOST_STATUSES,
+    QUANTILE_MODES,
+    WON_STATUSES,
+    DateColumnParser,
+    ExactSum,
+    ScorecardAggregator,
+    ScorecardError,
+    ScorecardOptions,
+    cohort_bucket,
+    load_mapping,
+    load_targets,
+    normalize_status,
+    open_text,
+    parse_date,
+    parse_float,
+    render_markdown,
+    resolve_inputs,
+)
+
+
+TABLE = "crm_rows"
+LOAD_BATCH_ROWS = 10000
+CANONICAL_COLUMNS = (
+    "account_id",
+    *DATE_FIELDS,
+    "close_status",
+    "deal_amount",
+    *AI_COUNTER_FIELDS,
+)
+RESERVED_COLUMNS = {"load_id", *CANONICAL_COLUMNS}
+
+
+def quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def sql_list(values: set[str]) -> str:
+    return "(" + ", ".join("'" + value.replace("'", "''") + "'" for value in sorted(values)) + ")"
+
+
+def connect(path: Path | str, check_same_thread: bool = True) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.create_function(
+        "iso_week",
+        1,
+        lambda value: None if value is None else cohort_bucket(dt.date.fromisoformat(value), "week"),
+        deterministic=True,
+    )
+    return conn
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    columns = ", ".join(
+        [
+            "load_id INTEGER NOT NULL",
+            "account_id TEXT",
+            *(f"{field} TEXT" for field in DATE_FIELDS),
+            "close_status TEXT",
+            "deal_amount REAL",
+            *(f"{field} REAL" for field in AI_COUNTER_FIELDS),
+        ]
+    )
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {TABLE} ({columns})")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS loads ("
+        "load_id INTEGER PRIMARY KEY, source TEXT, sha256 TEXT UNIQUE, mapping TEXT, rows INTEGER, loaded_at TEXT)"
+    )
+
+
+def create_indexes(conn: sqlite3.Connection) -> None:
+    for field in ("account_id", *DATE_FIELDS):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {TABLE}_{field} ON {TABLE} ({field})")
+
+
+def table_columns(conn: sqlite3.Connection) -> list[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({TABLE})")]
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(functools.partial(f.read, 1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_load_rows(
+    reader: csv.DictReader,
+    load_id: int,
+    mapping: dict[str, str],
+    extras: list[str],
+) -> Iterator[tuple[Any, ...]]:
+    """Typed warehouse rows: ISO dates, normalized status, floats, stripped extra columns."""
+    parsers = {field: DateColumnParser() for field in DATE_FIELDS}
+    for row in reader:
+        dates = [parsers[field](row.get(mapping[field])) for field in DATE_FIELDS]
+        yield (
+            load_id,
+            str(row.get(mapping["account_id"]) or "").strip() or None,
+            *(None if date is None else date.isoformat() for date in dates),
+            normalize_status(row.get(mapping["close_status"])) or None,
+            parse_float(row.get(mapping["deal_amount"])),
+            *(parse_float(row.get(mapping[field])) or 0.0 for field in AI_COUNTER_FIELDS),
+            *(str(row.get(column) or "").strip() or None for column in extras),
+        )
+
+
+def load_exports(
+    conn: sqlite3.Connection,
+    paths: list[Path],
+    mapping: dict[str, str],
+    replace: bool = False,
+) -> list[tuple[Path, int | None]]:
+    """Bulk-load exports in one transaction; returns rows loaded per file (None if already loaded).
+
+    Mapped fields land in canonical columns; every other CSV column is kept
+    as a TEXT column so it can be filtered or grouped on later.
+    """
+    results: list[tuple[Path, int | None]] = []
+    with conn:
+        ensure_schema(conn)
+        if replace:
+            conn.execute(f"DELETE FROM {TABLE}")
+            conn.execute("DELETE FROM loads")
+
+        for path in paths:
+            sha256 = file_sha256(path)
+            if conn.execute("SELECT 1 FROM loads WHERE sha256 = ?", (sha256,)).fetchone():
+                results.append((path, None))
+                continue
+
+            load_id = conn.execute(
+                "INSERT INTO loads (source, sha256, mapping, rows, loaded_at) VALUES (?, ?, ?, 0, ?)",
+                (str(path), sha256, json.dumps(mapping), dt.datetime.now(dt.timezone.utc).isoformat()),
+            ).lastrowid
+
+            with open_text(path) as f:
+                reader = csv.DictReader(f)
+                mapped = set(mapping.values())
+                extras = [
+                    column
+                    for column in dict.fromkeys(reader.fieldnames or [])
+                    if column and column not in mapped and column.lower() not in RESERVED_COLUMNS
+                ]
+                existing = {column.lower() for column in table_columns(conn)}
+                for column in extras:
+                    if column.lower() not in existing:
+                        conn.execute(f"ALTER TABLE {TABLE} ADD COLUMN {quote(column)} TEXT")
+                        existing.add(column.lower())
+
+                names = ", ".join(quote(column) for column in ("load_id", *CANONICAL_COLUMNS, *extras))
+                placeholders = ", ".join("?" for _ in range(1 + len(CANONICAL_COLUMNS) + len(extras)))
+                insert = f"INSERT INTO {TABLE} ({names}) VALUES ({placeholders})"
+
+                rows = 0
+                batch: list[tuple[Any, ...]] = []
+                for values in iter_load_rows(reader, load_id, mapping, extras):
+                    batch.append(values)
+                    if len(batch) >= LOAD_BATCH_ROWS:
+                        conn.executemany(insert, batch)
+                        rows += len(batch)
+                        batch.clear()
+                if batch:
+                    conn.executemany(insert, batch)
+                    rows += len(batch)
+
+            conn.execute("UPDATE loads SET rows = ? WHERE load_id = ?", (rows, load_id))
+            results.append((path, rows))
+        create_indexes(conn)
+    return results
+
+
+def present(*fields: str) -> str:
+    return " AND ".join(f"{field} IS NOT NULL" for field in fields)
+
+
+def day_delta(start: str, end: str) -> str:
+    return f"CAST(julianday({end}) - julianday({start}) AS INTEGER)"
+
+
+# Aggregator count fields and the SQL expression summed for each.
+COUNT_COLUMNS = {
+    "mql": present("mql_date"),
+    "sql": present("sql_date"),
+    "opp": present("opportunity_date"),
+    "mql_sql": present("mql_date", "sql_date"),
+    "sql_opp": present("sql_date", "opportunity_date"),
+    "won": f"close_status IN {sql_list(WON_STATUSES)}",
+    "lost": f"close_status IN {sql_list(LOST_STATUSES)}",
+    "signups": present("signup_date"),
+    "activated": present("signup_date", "first_value_date"),
+    "pilots": present("pilot_start_date"),
+    "produced": present("pilot_start_date", "production_date"),
+}
+
+CYCLE_DAYS = day_delta("opportunity_date", "close_date")
+TTFV_DAYS = day_delta("signup_date", "first_value_date")
+TTPV_DAYS = day_delta("signup_date", "proven_value_date")
+
+# (value expression, row condition, aggregator fields fed by the value histogram);
+# only non-negative values are kept, like days_between().
+HISTOGRAMS = (
+    ("deal_amount", f"{present('opportunity_date')} AND deal_amount > 0", ("deal_sizes", "deal_size_values")),
+    (
+        CYCLE_DAYS,
+        f"close_status IN {sql_list(CLOSED_STATUSES)} AND {present('opportunity_date', 'close_date')}",
+        ("cycle_days", "cycle_day_values"),
+    ),
+    (TTFV_DAYS, present("signup_date", "first_value_date"), ("ttfv_days",)),
+    (TTPV_DAYS, present("signup_date", "proven_value_date"), ("ttpv_days",)),
+)
+
+AI_TOTALS = {
+    "ai_sessions": "ai_sessions_total",
+    "ai_escalations": "ai_escalations_total",
+    "ai_audited_responses": "ai_audited_total",
+    "ai_hallucinations": "ai_hallucinations_total",
+}
+# Doubles add integers exactly while every partial sum stays below 2**53.
+EXACT_INTEGER_SUM_LIMIT = 2.0**53
+
+
+def integral(field: str) -> str:
+    return f"{field} = CAST({field} AS INTEGER)"
+
+
+def fold_histogram(
+    conn: sqlite3.Connection,
+    keys: list[str],
+    where: str,
+    params: list[Any],
+    aggregators: dict[tuple[Any, ...], ScorecardAggregator],
+    value_sql: str,
+    condition: str,
+    fields: tuple[str, ...],
+    nonnegative: bool = True,
+) -> None:
+    """Fold a GROUP BY value histogram into the exact sums / distributions named by ``fields``."""
+    aliases = [f"k{i}" for i in range(len(keys))]
+    inner = "".join(f"{key} AS {alias}, " for key, alias in zip(keys, aliases))
+    outer = "".join(f"{alias}, " for alias in aliases)
+    query = (
+        f"SELECT {outer}v, COUNT(*) FROM (SELECT {inner}{value_sql} AS v FROM {TABLE} WHERE ({where}) AND {condition})"
+        f"{' WHERE v >= 0' if nonnegative else ''} GROUP BY {outer}v"
+    )
+    width = len(keys)
+    for row in conn.execute(query, params):
+        aggregator = aggregators[tuple(row[:width])]
+        value, count = row[width], row[width + 1]
+        # NaN counters are stored as NULL.
+        value = math.nan if value is None else float(value)
+        for field in fields:
+            target = getattr(aggregator, field)
+            if target is None:
+                continue
+            if isinstance(target, ExactSum):
+                target.add_many(value, count)
+            else:
+                target.add(value, count)
+
+
+def scan(
+    conn: sqlite3.Connection,
+    keys: list[str],
+    where: str,
+    params: list[Any],
+    options: ScorecardOptions,
+) -> dict[tuple[Any, ...], ScorecardAggregator]:
+    """Fill one aggregator per distinct ``keys`` value with SQL aggregates.
+
+    Counts, and AI totals over integer-valued counters, come from one SUM()
+    pass. Averages, medians and any remaining AI values come from GROUP BY
+    value histograms folded into the same exact sums and distributions the
+    CSV path uses, so the metrics match it exactly.
+    """
+    prefix = "".join(f"{key}, " for key in keys)
+    group_by = f" GROUP BY {', '.join(keys)}" if keys else ""
+    width = len(keys)
+
+    columns = [f"SUM({expression})" for expression in COUNT_COLUMNS.values()]
+    for field in AI_TOTALS:
+        columns += [
+            f"SUM(CASE WHEN {integral(field)} THEN {field} END)",
+            f"SUM(CASE WHEN {integral(field)} THEN ABS({field}) END)",
+            f"SUM(CASE WHEN {integral(field)} THEN 0 ELSE 1 END)",
+        ]
+
+    aggregators: dict[tuple[Any, ...], ScorecardAggregator] = {}
+    ai_sums: dict[tuple[Any, ...], list[Any]] = {}
+    for row in conn.execute(f"SELECT {prefix}COUNT(*), {', '.join(columns)} FROM {TABLE} WHERE {where}{group_by}", params):
+        key, values = tuple(row[:width]), row[width:]
+        if not values[0]:
+            continue
+        aggregator = ScorecardAggregator(DEFAULT_MAPPING, options)
+        aggregator.row_count = values[0]
+        for name, value in zip(COUNT_COLUMNS, values[1:]):
+            setattr(aggregator, name, value or 0)
+        aggregators[key] = aggregator
+        ai_sums[key] = list(values[1 + len(COUNT_COLUMNS) :])
+
+    for value_sql, condition, fields in HISTOGRAMS:
+        fold_histogram(conn, keys, where, params, aggregators, value_sql, condition, fields)
+
+    for i, (field, total_name) in enumerate(AI_TOTALS.items()):
+        sums = {key: values[3 * i : 3 * i + 3] for key, values in ai_sums.items()}
+        if any((abs_total or 0) >= EXACT_INTEGER_SUM_LIMIT for _, abs_total, _ in sums.values()):
+            fold_histogram(conn, keys, where, params, aggregators, field, "1", (total_name,), nonnegative=False)
+            continue
+        for key, (total, _, others) in sums.items():
+            aggregator = aggregators[key]
+            getattr(aggregator, total_name).add_total(float(total or 0), aggregator.row_count - (others or 0))
+        if any(others for _, _, others in sums.values()):
+            condition = f"NOT COALESCE({integral(field)}, 0)"
+            fold_histogram(conn, keys, where, params, aggregators, field, condition, (total_name,), nonnegative=False)
+    return aggregators
+
+
+def group_expression(column: str) -> str:
+    return f"COALESCE({quote(column)}, '{BLANK_GROUP}')"
+
+
+def cohort_expression(field: str, period: str) -> str:
+    return f"iso_week({field})" if period == "week" else f"substr({field}, 1, 7)"
+
+
+def query_scorecard(
+    conn: sqlite3.Connection,
+    where: str,
+    params: list[Any],
+    options: ScorecardOptions,
+) -> ScorecardAggregator:
+    """Overall aggregator for the filtered rows, with --group-by and --cohort-by children attached."""
+    total = scan(conn, [], where, params, options).get(()) or ScorecardAggregator(DEFAULT_MAPPING, options)
+    child_options = options.for_group()
+    for spec in options.group_by:
+        keys = [group_expression(column) for column in spec]
+        total.groups[spec] = {
+            tuple(str(part) for part in key): child for key, child in scan(conn, keys, where, params, child_options).items()
+        }
+    if options.cohort_by is not None:
+        anchor = options.cohort_by
+        cohorts = scan(
+            conn,
+            [cohort_expression(anchor, options.cohort_period)],
+            f"({where}) AND {anchor} IS NOT NULL",
+            params,
+            child_options,
+        )
+        total.cohorts = {key[0]: child for key, child in cohorts.items()}
+    return total
+
+
+def build_filters(
+    date_field: str,
+    since: str | None = None,
+    until: str | None = None,
+    where: str | None = None,
+) -> tuple[str, list[Any], list[str]]:
+    """SQL WHERE clause, its parameters, and a readable description of the filters."""
+    clauses: list[str] = []
+    params: list[Any] = []
+    described: list[str] = []
+    for flag, operator, value in (("since", ">=", since), ("until", "<=", until)):
+        if value is None:
+            continue
+        date = parse_date(value)
+        if date is None:
+            raise ScorecardError(f"{flag} is not a date: {value!r}")
+        clauses.append(f"{date_field} {operator} ?")
+        params.append(date.isoformat())
+        described.append(f"{date_field} {operator} {date.isoformat()}")
+    if where:
+        clauses.append(f"({where})")
+        described.append(where)
+    return " AND ".join(clauses) or "1", params, described
+
+
+def resolve_columns(values: list[str], columns: list[str]) -> tuple[tuple[str, ...], ...]:
+    """--group-by specs against the warehouse table (canonical names or stored CSV columns)."""
+    lookup = {column.lower(): column for column in columns}
+    specs: list[tuple[str, ...]] = []
+    for value in values:
+        names = [part.strip() for part in value.split(",") if part.strip()]
+        if not names:
+            raise ScorecardError(f"Empty --group-by value: {value!r}")
+        missing = [name for name in names if name.lower() not in lookup]
+        if missing:
+            raise ScorecardError(f"--group-by column(s) not in warehouse: {', '.join(missing)}")
+        spec = tuple(lookup[name.lower()] for name in names)
+        if spec not in specs:
+            specs.append(spec)
+    return tuple(specs)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local SQLite warehouse for CRM exports and scorecard queries")
+    parser.add_argument("--db", required=True, help="SQLite warehouse path (created if missing)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", help="Bulk-load CRM export CSVs into the warehouse")
+    load.add_argument("--csv", required=True, nargs="+", help="Export CSV path(s): files, globs or directories")
+    load.add_argument("--mapping", help="Optional YAML/JSON file mapping canonical field names to CSV columns")
+    load.add_argument("--replace", action="store_true", help="Drop previously loaded rows first")
+
+    scorecard = commands.add_parser("scorecard", help="Build a scorecard from warehouse rows")
+    scorecard.add_argument("--out-md", required=True, help="Output markdown path")
+    scorecard.add_argument("--out-json", help="Optional output JSON path")
+    scorecard.add_argument("--targets", help="Optional YAML/JSON file with metric targets")
+    scorecard.add_argument("--where", help="Extra SQL filter over warehouse columns, e.g. \"region = 'EMEA'\"")
+    scorecard.add_argument("--date-field", choices=DATE_FIELDS, default="mql_date", help="Date field for --since/--until")
+    scorecard.add_argument("--since", help="Keep rows whose --date-field is on or after this date")
+    scorecard.add_argument("--until", help="Keep rows whose --date-field is on or before this date")
+    scorecard.add_argument("--quantiles", choices=QUANTILE_MODES, default="exact", help="Exact medians (default) or sketches")
+    scorecard.add_argument(
+        "--sketch-error",
+        type=float,
+        default=DEFAULT_SKETCH_ERROR,
+        help=f"Relative error bound for --quantiles sketch (default {DEFAULT_SKETCH_ERROR})",
+    )
+    scorecard.add_argument("--percentiles", action="store_true", help="Report p50/p75/p90 distributions")
+    scorecard.add_argument(
+        "--group-by",
+        action="append",
+        default=[],
+        metavar="COLUMN[,COLUMN...]",
+        help="Add a per-group breakdown (repeatable; comma-join columns to group by their combination)",
+    )
+    scorecard.add_argument("--cohort-by", choices=DATE_FIELDS, help="Date field for week/month cohort metrics")
+    scorecard.add_argument("--cohort-period", choices=COHORT_PERIODS, default="month", help="Cohort bucket size")
+    return parser.parse_args()
+
+
+def run_load(args: argparse.Namespace, db_path: Path) -> int:
+    mapping = load_mapping(Path(args.mapping).expanduser().resolve() if args.mapping else None)
+    paths = resolve_inputs(args.csv)
+    conn = connect(db_path)
+    try:
+        results = load_exports(conn, paths, mapping, replace=args.replace)
+        total = conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+    finally:
+        conn.close()
+    for path, rows in results:
+        print(f"{path}: " + ("already loaded, skipped" if rows is None else f"{rows} rows loaded"))
+    print(f"Warehouse rows: {total} ({db_path})")
+    return 0
+
+
+def run_scorecard(args: argparse.Namespace, db_path: Path) -> int:
+    if not db_path.exists():
+        raise ScorecardError(f"Warehouse not found: {db_path} (run the load subcommand first)")
+    targets = load_targets(Path(args.targets).expanduser().resolve() if args.targets else None)
+    if not 0 < args.sketch_error < 1:
+        raise ScorecardError("--sketch-error must be between 0 and 1")
+
+    conn = connect(db_path)
+    try:
+        options = ScorecardOptions(
+            quantiles=args.quantiles,
+            sketch_error=args.sketch_error,
+            percentiles=args.percentiles,
+            group_by=resolve_columns(args.group_by, table_columns(conn)),
+            cohort_by=args.cohort_by,
+            cohort_period=args.cohort_period,
+        )
+        where, params, filters = build_filters(args.date_field, args.since, args.until, args.where)
+        try:
+            aggregator = query_scorecard(conn, where, params, options)
+        except sqlite3.Error as exc:
+            raise ScorecardError(f"Warehouse query failed: {exc}") from exc
+    finally:
+        conn.close()
+
+    metrics, diagnostics = aggregator.result()
+    if diagnostics["row_count"] == 0:
+        raise ScorecardError("No warehouse rows match the filters")
+    groups = aggregator.group_results()
+    cohorts = aggregator.cohort_results()
+    if filters:
+        diagnostics["filters"] = filters
+
+    generated_at = dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    out_md = Path(args.out_md).expanduser().resolve()
+    out_md.parent.mkdir(parents=True, exist_ok=True)
+    out_md.write_text(
+        render_markdown(
+            input_csv=db_path,
+            generated_at=generated_at,
+            metrics=metrics,
+            targets=targets,
+            diagnostics=diagnostics,
+            groups=groups,
+            cohorts=cohorts,
+        ),
+        encoding="utf-8",
+    )
+
+    if args.out_json:
+        out_json = Path(args.out_json).expanduser().resolve()
+        out_json.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "generated_at": generated_at,
+            "database": str(db_path),
+            "metrics": metrics,
+            "targets": targets,
+            "diagnostics": diagnostics,
+        }
+        if groups:
+            payload["groups"] = groups
+        if cohorts is not None:
+            payload["cohorts"] = cohorts
+        out_json.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    print(f"Scorecard written: {out_md}")
+    if args.out_json:
+        print(f"Metrics JSON written: {args.out_json}")
+    return 0
+
+
+def main() -> int:
+    args = parse_args()
+    db_path = Path(args.db).expanduser().resolve()
+    if args.command == "load":
+        return run_load(args, db_path)
+    return run_scorecard(args, db_path)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
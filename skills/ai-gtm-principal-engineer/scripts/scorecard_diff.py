@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""Diff two CRM exports: per-account stage, close and deal-amount changes plus scorecard metric deltas."""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from build_scorecard_from_crm import (
+    LOST_STATUSES,
+    WON_STATUSES,
+    ScorecardAggregator,
+    ScorecardError,
+    format_delta,
+    format_metric,
+    get_value,
+    iter_input_records,
+    iter_record_rows,
+    load_mapping,
+    load_metric_plugins,
+    metric_definitions,
+    row_columns,
+)
+
+# Sales stages an account can sit in, furthest first; a won/lost close_status outranks them all.
+SALES_STAGES = (("opportunity_date", "opportunity"), ("sql_date", "sql"), ("mql_date", "mql"))
+NO_STAGE = "none"
+DEFAULT_LIMIT = 50
+
+
+def account_stage(parsed: dict[str, Any]) -> str:
+    status = parsed["close_status"]
+    if status in WON_STATUSES:
+        return "closed_won"
+    if status in LOST_STATUSES:
+        return "closed_lost"
+    for key, stage in SALES_STAGES:
+        if parsed[key] is not None:
+            return stage
+    return NO_STAGE
+
+
+@dataclass
+class ExportScan:
+    """One export's scorecard aggregates, with its rows that had no account_id or repeated one."""
+
+    path: Path
+    aggregator: ScorecardAggregator
+    blank_ids: int = 0
+    duplicates: int = 0
+
+
+def iter_snapshots(scan: ExportScan, mapping: dict[str, str]) -> Iterator[tuple[str, tuple[str, float | None]]]:
+    """Fold every row of ``scan.path`` into its scorecard and yield (account_id, (stage, deal amount))."""
+    aggregator = scan.aggregator
+    records = iter_input_records(scan.path)
+    header = next(records, None) or []
+    if mapping["account_id"] not in header:
+        raise ScorecardError(f"{scan.path}: account_id column {mapping['account_id']!r} not in CSV header")
+    for row in iter_record_rows(records, header, row_columns(mapping)):
+        parsed = aggregator.parse_row(row)
+        aggregator.add_parsed(parsed)
+        account = str(get_value(row, "account_id", mapping) or "").strip()
+        if not account:
+            scan.blank_ids += 1
+            continue
+        yield account, (account_stage(parsed), parsed["deal_amount"])
+
+
+@dataclass
+class ExportDiff:
+    stages: Counter[tuple[str, str]] = field(default_factory=Counter)
+    stage_changes: list[dict[str, Any]] = field(default_factory=list)
+    amount_changes: list[dict[str, Any]] = field(default_factory=list)
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    matched: int = 0
+
+    def compare(self, account: str, old: tuple[str, float | None], new: tuple[str, float | None]) -> None:
+        self.matched += 1
+        (old_stage, old_amount), (new_stage, new_amount) = old, new
+        self.stages[(old_stage, new_stage)] += 1
+        if old_stage != new_stage:
+            self.stage_changes.append({"account_id": account, "from": old_stage, "to": new_stage, "deal_amount": new_amount})
+        if old_amount != new_amount:
+            delta = None if old_amount is None or new_amount is None else new_amount - old_amount
+            self.amount_changes.append({"account_id": account, "old": old_amount, "new": new_amount, "delta": delta})
+
+
+def diff_exports(old_path: Path, new_path: Path, mapping: dict[str, str]) -> tuple[ExportDiff, ExportScan, ExportScan, str]:
+    """Hash-join two exports on account_id in one pass over each.
+
+    The smaller file is read first into an account_id -> snapshot index.
+    The larger one is streamed and each row is compared against the index
+    as it arrives: an account that differs moves out of the index into the
+    changed set, and accounts missing from the index are kept as bare IDs.
+    Memory follows the smaller export plus the probe-only IDs. Within a
+    file the last row of an account wins, as with --dedup. Returns the diff,
+    both scans and which side ("old" or "new") was indexed.
+    """
+    old = ExportScan(old_path, ScorecardAggregator(mapping))
+    # Consecutive exports repeat most date cells, so the second scan reuses the first one's parse caches.
+    new = ExportScan(new_path, old.aggregator.spawn())
+    indexed_side = "old" if old_path.stat().st_size <= new_path.stat().st_size else "new"
+    build, probe = (old, new) if indexed_side == "old" else (new, old)
+
+    # account_id -> [snapshot, matched by a probe row with the same snapshot].
+    index: dict[str, list[Any]] = {}
+    for account, snapshot in iter_snapshots(build, mapping):
+        build.duplicates += account in index
+        index[account] = [snapshot, False]
+
+    # Matched accounts whose latest probe row differs: (indexed snapshot, probe snapshot).
+    changed: dict[str, tuple[tuple[str, float | None], tuple[str, float | None]]] = {}
+    probe_only: set[str] = set()
+    for account, snapshot in iter_snapshots(probe, mapping):
+        entry = index.get(account)
+        if entry is not None:
+            probe.duplicates += entry[1]
+            if snapshot == entry[0]:
+                entry[1] = True
+            else:
+                del index[account]
+                changed[account] = (entry[0], snapshot)
+        elif account in changed:
+            # A later row for the same account replaces the earlier one.
+            probe.duplicates += 1
+            built = changed[account][0]
+            if snapshot == built:
+                del changed[account]
+                index[account] = [built, True]
+            else:
+                changed[account] = (built, snapshot)
+        else:
+            probe.duplicates += account in probe_only
+            probe_only.add(account)
+
+    diff = ExportDiff()
+    only_built = []
+    for account, (snapshot, matched) in index.items():
+        if matched:
+            diff.compare(account, snapshot, snapshot)
+        else:
+            only_built.append(account)
+    for account, (built, probed) in changed.items():
+        if indexed_side == "old":
+            diff.compare(account, built, probed)
+        else:
+            diff.compare(account, probed, built)
+    only_built.sort()
+    only_probed = sorted(probe_only)
+    diff.added, diff.removed = (only_probed, only_built) if indexed_side == "old" else (only_built, only_probed)
+    return diff, old, new, indexed_side
+
+
+def metric_deltas(old: ScorecardAggregator, new: ScorecardAggregator) -> dict[str, dict[str, float | None]]:
+    old_metrics, _ = old.result()
+    new_metrics, _ = new.result()
+    return {
+        key: {
+            "old": old_metrics[key],
+            "new": new_metrics[key],
+            "delta": None if old_metrics[key] is None or new_metrics[key] is None else new_metrics[key] - old_metrics[key],
+        }
+        for key in new_metrics
+    }
+
+
+def build_report(old_path: Path, new_path: Path, mapping: dict[str, str]) -> dict[str, Any]:
+    diff, old, new, indexed_side = diff_exports(old_path, new_path, mapping)
+    for scan in (old, new):
+        if scan.aggregator.row_count == 0:
+            raise ScorecardError(f"{scan.path}: CSV has no data rows")
+
+    closed = [change for change in diff.stage_changes if change["to"] in ("closed_won", "closed_lost")]
+    diff.amount_changes.sort(key=lambda change: (-abs(change["delta"] or 0.0), change["account_id"]))
+    return {
+        "generated_at": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "old_csv": str(old_path),
+        "new_csv": str(new_path),
+        "indexed": indexed_side,
+        "accounts": {
+            "old": diff.matched + len(diff.removed),
+            "new": diff.matched + len(diff.added),
+            "matched": diff.matched,
+            "added": len(diff.added),
+            "removed": len(diff.removed),
+            "stage_changed": len(diff.stage_changes),
+            "closed_won": sum(change["to"] == "closed_won" for change in closed),
+            "closed_lost": sum(change["to"] == "closed_lost" for change in closed),
+            "deal_amount_changed": len(diff.amount_changes),
+            "blank_account_id_rows": {"old": old.blank_ids, "new": new.blank_ids},
+            "duplicate_rows": {"old": old.duplicates, "new": new.duplicates},
+        },
+        "stage_transitions": [
+            {"from": old_stage, "to": new_stage, "accounts": count}
+            for (old_stage, new_stage), count in sorted(diff.stages.items(), key=lambda item: (-item[1], item[0]))
+            if old_stage != new_stage
+        ],
+        "metrics": metric_deltas(old.aggregator, new.aggregator),
+        "rows": {"old": old.aggregator.row_count, "new": new.aggregator.row_count},
+        "changes": {
+            "stage": diff.stage_changes,
+            "deal_amount": diff.amount_changes,
+            "added": diff.added,
+            "removed": diff.removed,
+        },
+    }
+
+
+def format_amount(value: float | None, signed: bool = False) -> str:
+    if value is None:
+        return "n/a"
+    sign = "-" if value < 0 else "+" if signed else ""
+    return f"{sign}${abs(value):,.2f}"
+
+
+def limited(items: list[Any], limit: int) -> tuple[list[Any], list[str]]:
+    """The first ``limit`` items and a trailing note about the rest."""
+    if len(items) <= limit:
+        return items, []
+    return items[:limit], [f"... and {len(items) - limit} more (see the JSON).", ""]
+
+
+def render_markdown(report: dict[str, Any], limit: int) -> str:
+    accounts = report["accounts"]
+    lines = [
+        "# CRM Export Diff",
+        "",
+        f"Generated: {report['generated_at']}",
+        f"Old: `{report['old_csv']}` ({report['rows']['old']} rows)",
+        f"New: `{report['new_csv']}` ({report['rows']['new']} rows)",
+        "",
+        "## Accounts",
+        f"- Matched / added / removed: {accounts['matched']} / {accounts['added']} / {accounts['removed']}",
+        f"- Stage changed: {accounts['stage_changed']} (closed won {accounts['closed_won']}, closed lost {accounts['closed_lost']})",
+        f"- Deal amount changed: {accounts['deal_amount_changed']}",
+    ]
+    blank = accounts["blank_account_id_rows"]
+    if blank["old"] or blank["new"]:
+        lines.append(f"- Rows without account_id (scored, not joined): {blank['old']} old / {blank['new']} new")
+    duplicates = accounts["duplicate_rows"]
+    if duplicates["old"] or duplicates["new"]:
+        lines.append(f"- Duplicate account rows (last one compared): {duplicates['old']} old / {duplicates['new']} new")
+
+    lines.extend(["", "## Metric deltas", "", "| Metric | Old | New | Change |", "|---|---:|---:|---:|"])
+    labels = metric_definitions()
+    for key, entry in report["metrics"].items():
+        label = labels.get(key, {}).get("label", key)
+        lines.append(
+            f"| {label} | {format_metric(key, entry['old'])} | {format_metric(key, entry['new'])} | {format_delta(key, entry['delta'])} |"
+        )
+
+    if report["stage_transitions"]:
+        lines.extend(["", "## Stage moves", "", "| From | To | Accounts |", "|---|---|---:|"])
+        for entry in report["stage_transitions"]:
+            lines.append(f"| {entry['from']} | {entry['to']} | {entry['accounts']} |")
+    lines.append("")
+
+    changes = report["changes"]
+    for status, title in (("closed_won", "Closed won"), ("closed_lost", "Closed lost")):
+        closed = [change for change in changes["stage"] if change["to"] == status]
+        if not closed:
+            continue
+        shown, more = limited(closed, limit)
+        lines.extend([f"## {title}", "", "| Account | Previous stage | Deal amount |", "|---|---|---:|"])
+        lines.extend(f"| {change['account_id']} | {change['from']} | {format_amount(change['deal_amount'])} |" for change in shown)
+        lines.extend(["", *more])
+
+    if changes["deal_amount"]:
+        shown, more = limited(changes["deal_amount"], limit)
+        lines.extend(["## Deal amount changes", "", "| Account | Old | New | Change |", "|---|---:|---:|---:|"])
+        for change in shown:
+            old, new, delta = (format_amount(change["old"]), format_amount(change["new"]), format_amount(change["delta"], signed=True))
+            lines.append(f"| {change['account_id']} | {old} | {new} | {delta} |")
+        lines.extend(["", *more])
+
+    for key, title in (("added", "Added accounts"), ("removed", "Removed accounts")):
+        if changes[key]:
+            shown, more = limited(changes[key], limit)
+            lines.extend([f"## {title}", "", ", ".join(f"`{account}`" for account in shown), "", *more])
+
+    return "\n".join(lines)
+
+
+def resolve_export(value: str) -> Path:
+    path = Path(value).expanduser().resolve()
+    if not path.is_file():
+        raise ScorecardError(f"CSV not found: {path}")
+    return path
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Diff two CRM exports joined on account_id")
+    parser.add_argument("--old", required=True, help="Earlier export (CSV, optionally .gz/.bz2/.zst)")
+    parser.add_argument("--new", required=True, help="Later export")
+    parser.add_argument("--out-md", required=True, help="Output Markdown path")
+    parser.add_argument("--out-json", help="Output JSON path with every changed account")
+    parser.add_argument("--mapping", help="YAML/JSON mapping from canonical keys to CSV columns")
+    parser.add_argument(
+        "--metric-plugin",
+        action="append",
+        default=[],
+        help="Python file that registers custom metrics with register_metric() (repeatable)",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=DEFAULT_LIMIT,
+        help=f"Accounts listed per Markdown section (default {DEFAULT_LIMIT}; the JSON lists all)",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    load_metric_plugins(args.metric_plugin)
+    old_path = resolve_export(args.old)
+    new_path = resolve_export(args.new)
+    mapping = load_mapping(Path(args.mapping).expanduser().resolve() if args.mapping else None)
+
+    report = build_report(old_path, new_path, mapping)
+
+    out_md = Path(args.out_md).expanduser().resolve()
+    out_md.parent.mkdir(parents=True, exist_ok=True)
+    out_md.write_text(render_markdown(report, max(0, args.limit)), encoding="utf-8")
+    print(f"Diff written: {out_md}")
+    if args.out_json:
+        out_json = Path(args.out_json).expanduser().resolve()
+        out_json.parent.mkdir(parents=True, exist_ok=True)
+        out_json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Diff JSON written: {out_json}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Record scorecard runs in a local history store and query metric trends without rescanning exports."""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+from build_scorecard_from_crm import (
+    ScorecardError,
+    connect_history,
+    format_delta,
+    format_metric,
+    metric_definitions,
+    metric_series,
+    parse_date,
+    record_run,
+    weekly_deltas,
+)
+
+
+def parse_timestamp(value: str) -> dt.datetime:
+    """ISO timestamps, a scorecard's ``generated_at`` ("2026-01-05 09:30 UTC"), or a plain date."""
+    text = value.strip().removesuffix(" UTC")
+    try:
+        stamp = dt.datetime.fromisoformat(text)
+    except ValueError:
+        date = parse_date(text)
+        if date is None:
+            raise ScorecardError(f"Not a timestamp: {value!r}") from None
+        stamp = dt.datetime(date.year, date.month, date.day)
+    return stamp if stamp.tzinfo is not None else stamp.replace(tzinfo=dt.timezone.utc)
+
+
+def bound(value: str | None, end_of_day: bool = False) -> str | None:
+    """--since/--until as a recorded_at string bound; a bare date covers the whole day."""
+    if value is None:
+        return None
+    stamp = parse_timestamp(value)
+    if end_of_day and len(value.strip()) <= 10:
+        stamp += dt.timedelta(days=1, seconds=-1)
+    return stamp.astimezone(dt.timezone.utc).isoformat(timespec="seconds")
+
+
+def resolve_key(conn: sqlite3.Connection, key: str | None) -> str:
+    """--key, or the only recorded key when the store holds a single series."""
+    keys = [row[0] for row in conn.execute("SELECT DISTINCT input FROM runs ORDER BY input")]
+    if key is not None:
+        if key not in keys:
+            raise ScorecardError(f"No runs recorded for key {key!r}")
+        return key
+    if len(keys) == 1:
+        return keys[0]
+    if not keys:
+        raise ScorecardError("The history store has no runs yet")
+    raise ScorecardError("Several keys recorded, pass --key: " + ", ".join(keys))
+
+
+def run_deltas(series: list[tuple[str, float | None]]) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    previous: float | None = None
+    for recorded_at, value in series:
+        delta = None if value is None or previous is None else value - previous
+        rows.append({"recorded_at": recorded_at, "value": value, "delta": delta})
+        previous = value
+    return rows
+
+
+def run_record(conn: sqlite3.Connection, args: argparse.Namespace) -> int:
+    for path in args.json:
+        payload = json.loads(Path(path).expanduser().read_text(encoding="utf-8"))
+        if "metrics" not in payload or "diagnostics" not in payload:
+            raise ScorecardError(f"{path} is not a scorecard JSON (missing metrics/diagnostics)")
+        key = args.key or payload.get("input_csv") or payload.get("database") or str(path)
+        recorded_at = parse_timestamp(args.recorded_at or payload.get("generated_at") or "")
+        run_id = record_run(conn, key, recorded_at, payload["metrics"], payload.get("targets", {}), payload["diagnostics"])
+        print(f"{path}: run {run_id} recorded for {key} at {recorded_at.isoformat(timespec='seconds')}")
+    return 0
+
+
+def run_runs(conn: sqlite3.Connection, args: argparse.Namespace) -> int:
+    rows = conn.execute(
+        "SELECT input, COUNT(*), MIN(recorded_at), MAX(recorded_at) FROM runs GROUP BY input ORDER BY input"
+    ).fetchall()
+    if args.format == "json":
+        print(json.dumps([dict(zip(("key", "runs", "first", "last"), row)) for row in rows], indent=2))
+        return 0
+    print("| Key | Runs | First | Last |")
+    print("|---|---:|---|---|")
+    for key, count, first, last in rows:
+        print(f"| {key} | {count} | {first} | {last} |")
+    return 0
+
+
+def run_series(conn: sqlite3.Connection, args: argparse.Namespace) -> int:
+    key = resolve_key(conn, args.key)
+    series = metric_series(conn, key, args.metric, bound(args.since), bound(args.until, end_of_day=True))
+    rows = weekly_deltas(series) if args.weekly else run_deltas(series)
+
+    if args.format == "json":
+        print(json.dumps({"key": key, "metric": args.metric, "weekly": args.weekly, "series": rows}, indent=2))
+        return 0
+    label = metric_definitions().get(args.metric, {}).get("label", args.metric)
+    print(f"{label} ({key}, {'week over week' if args.weekly else 'run over run'})")
+    print("")
+    print("| Week | Recorded at | Value | Change |" if args.weekly else "| Recorded at | Value | Change |")
+    print("|---|---|---:|---:|" if args.weekly else "|---|---:|---:|")
+    for row in rows:
+        cells = [row["recorded_at"], format_metric(args.metric, row["value"]), format_delta(args.metric, row["delta"])]
+        if args.weekly:
+            cells.insert(0, row["week"])
+        print("| " + " | ".join(cells) + " |")
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Append-only history of scorecard runs with trend queries")
+    parser.add_argument("--db", required=True, help="SQLite history store (the --history path of build_scorecard_from_crm.py)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="Backfill runs from scorecard JSON files")
+    record.add_argument("--json", required=True, nargs="+", help="Scorecard JSON file(s) written with --out-json")
+    record.add_argument("--key", help="Series key (default: the JSON's input_csv)")
+    record.add_argument("--recorded-at", help="Run timestamp (default: the JSON's generated_at)")
+
+    runs = commands.add_parser("runs", help="List recorded keys with run counts")
+    runs.add_argument("--format", choices=("markdown", "json"), default="markdown", help="Output format")
+
+    series = commands.add_parser("series", help="Time series of one metric with deltas")
+    series.add_argument("--metric", required=True, help="Metric key, e.g. opportunity_win_rate (custom metrics too)")
+    series.add_argument("--key", help="Series key (required when several are recorded)")
+    series.add_argument("--since", help="Only runs recorded on or after this date/timestamp")
+    series.add_argument("--until", help="Only runs recorded on or before this date/timestamp")
+    series.add_argument("--weekly", action="store_true", help="Latest run per ISO week with week-over-week deltas")
+    series.add_argument("--format", choices=("markdown", "json"), default="markdown", help="Output format")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    db_path = Path(args.db).expanduser().resolve()
+    if args.command != "record" and not db_path.exists():
+        raise ScorecardError(f"History store not found: {db_path}")
+    conn = connect_history(db_path)
+    try:
+        if args.command == "record":
+            return run_record(conn, args)
+        if args.command == "runs":
+            return run_runs(conn, args)
+        return run_series(conn, args)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
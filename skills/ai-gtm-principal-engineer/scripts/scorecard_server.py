@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""Serve CRM scorecards over local HTTP, with filters, breakdowns and an LRU result cache."""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import hashlib
+import json
+import signal
+import sqlite3
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from build_scorecard_from_crm import (
+    COHORT_PERIODS,
+    DATE_FIELDS,
+    DEFAULT_SKETCH_ERROR,
+    QUANTILE_MODES,
+    ScorecardError,
+    ScorecardOptions,
+    file_signature,
+    load_mapping,
+    load_targets,
+    render_markdown,
+    resolve_inputs,
+)
+from crm_warehouse import (
+    TABLE,
+    build_filters,
+    connect,
+    ensure_schema,
+    load_exports,
+    query_scorecard,
+    quote,
+    resolve_columns,
+    table_columns,
+)
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_ENTRIES = 128
+QUERY_PARAMS = {
+    "since",
+    "until",
+    "date_field",
+    "group_by",
+    "cohort_by",
+    "cohort_period",
+    "quantiles",
+    "sketch_error",
+    "percentiles",
+}
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+class ResultCache:
+    """Least-recently-used map from (data fingerprint, query) to a finished scorecard."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.entries: OrderedDict[tuple[Any, ...], dict[str, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple[Any, ...]) -> dict[str, Any] | None:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: tuple[Any, ...], value: dict[str, Any]) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+def single(params: dict[str, list[str]], name: str, default: str | None = None) -> str | None:
+    values = params.get(name)
+    if not values:
+        return default
+    if len(values) > 1:
+        raise ScorecardError(f"Query parameter {name!r} given more than once")
+    return values[0]
+
+
+def choice(params: dict[str, list[str]], name: str, choices: tuple[str, ...], default: str | None) -> str | None:
+    value = single(params, name, default)
+    if value is not None and value not in choices:
+        raise ScorecardError(f"{name} must be one of {', '.join(choices)}: {value!r}")
+    return value
+
+
+def error_body(status: HTTPStatus, message: str) -> tuple[HTTPStatus, str, str]:
+    return status, "application/json", json.dumps({"error": message})
+
+
+class ScorecardService:
+    """Owns the loaded export data and answers scorecard queries against it.
+
+    With ``--csv`` the exports are bulk-loaded into a SQLite database (a
+    temporary file unless ``--db`` is given) and reloaded when any file's
+    size or mtime changes. With only ``--db`` an existing warehouse is served
+    as-is, and loads made by ``crm_warehouse.py`` show up on the next request.
+    The data fingerprint is the set of loaded file hashes, so a reload that
+    brings back the same bytes keeps every cached result valid.
+
+    ``lock`` covers reloads, the cache and the fields they share; queries run
+    outside it on a per-thread connection, each in one WAL read snapshot.
+    """
+
+    def __init__(
+        self,
+        csv_values: list[str],
+        db_path: Path | None,
+        mapping_path: Path | None,
+        targets_path: Path | None,
+        cache_entries: int,
+    ) -> None:
+        self.csv_values = csv_values
+        self.mapping = load_mapping(mapping_path)
+        self.targets_path = targets_path
+        self.targets = load_targets(targets_path)
+        self.targets_signature = file_signature(targets_path)
+        self.source = str(db_path) if db_path is not None else ", ".join(csv_values)
+        # Per-thread connections cannot share an in-memory database, so --csv alone loads into a temporary file.
+        self.scratch = tempfile.TemporaryDirectory(prefix="scorecard-server-") if db_path is None else None
+        self.db_path = db_path if self.scratch is None else Path(self.scratch.name) / "warehouse.db"
+        self.conn = connect(self.db_path, check_same_thread=False)
+        with self.conn:
+            ensure_schema(self.conn)
+        self.readers = threading.local()
+        self.lock = threading.Lock()
+        self.cache = ResultCache(cache_entries)
+        self.input_signature: tuple[Any, ...] | None = None
+        self.fingerprint = ""
+        self.columns: list[str] = []
+
+    def refresh(self) -> None:
+        """Reload inputs whose files changed and recompute the data fingerprint (caller holds the lock)."""
+        if self.csv_values:
+            paths = resolve_inputs(self.csv_values)
+            signature = tuple((path, file_signature(path)) for path in paths)
+            if signature != self.input_signature:
+                load_exports(self.conn, paths, self.mapping, replace=True)
+                self.input_signature = signature
+        self.fingerprint = self.data_fingerprint(self.conn)
+        self.columns = table_columns(self.conn)
+
+        signature = file_signature(self.targets_path)
+        if signature != self.targets_signature:
+            self.targets = load_targets(self.targets_path)
+            self.targets_signature = signature
+
+    def data_fingerprint(self, conn: sqlite3.Connection) -> str:
+        """Hash of the loaded file hashes and the mapping, as seen by ``conn``."""
+        loads = conn.execute("SELECT sha256 FROM loads ORDER BY sha256").fetchall()
+        digest = hashlib.sha256(json.dumps([sha for (sha,) in loads]).encode())
+        digest.update(json.dumps(self.mapping, sort_keys=True).encode())
+        return digest.hexdigest()[:16]
+
+    def reader(self) -> sqlite3.Connection:
+        """This thread's read connection to the warehouse."""
+        conn = getattr(self.readers, "conn", None)
+        if conn is None:
+            conn = self.readers.conn = connect(self.db_path)
+        return conn
+
+    def close(self) -> None:
+        self.conn.close()
+        if self.scratch is not None:
+            self.scratch.cleanup()
+
+    def parse_query(self, params: dict[str, list[str]]) -> tuple[ScorecardOptions, str, list[Any], list[str]]:
+        """Scorecard options plus the SQL filter for one request's query parameters.
+
+        Known parameters mirror the warehouse ``scorecard`` flags; any other
+        parameter names a warehouse column and keeps rows equal to one of
+        its values (``?region=EMEA&region=NA``).
+        """
+        sketch_error = single(params, "sketch_error")
+        try:
+            sketch_error = DEFAULT_SKETCH_ERROR if sketch_error is None else float(sketch_error)
+        except ValueError:
+            raise ScorecardError(f"sketch_error is not a number: {sketch_error!r}") from None
+        if not 0 < sketch_error < 1:
+            raise ScorecardError("sketch_error must be between 0 and 1")
+        options = ScorecardOptions(
+            quantiles=choice(params, "quantiles", QUANTILE_MODES, "exact"),
+            sketch_error=sketch_error,
+            percentiles=(single(params, "percentiles") or "").lower() in TRUE_VALUES,
+            group_by=resolve_columns(params.get("group_by", []), self.columns),
+            cohort_by=choice(params, "cohort_by", DATE_FIELDS, None),
+            cohort_period=choice(params, "cohort_period", COHORT_PERIODS, "month"),
+        )
+
+        where, values, filters = build_filters(
+            choice(params, "date_field", DATE_FIELDS, "mql_date"),
+            single(params, "since"),
+            single(params, "until"),
+        )
+        lookup = {column.lower(): column for column in self.columns}
+        for name in sorted(set(params) - QUERY_PARAMS):
+            column = lookup.get(name.lower())
+            if column is None or column == "load_id":
+                raise ScorecardError(f"Unknown query parameter or warehouse column: {name!r}")
+            choices = sorted(set(params[name]))
+            where += f" AND {quote(column)} IN ({', '.join('?' for _ in choices)})"
+            values += choices
+            filters.append(f"{column} in {', '.join(choices)}")
+        return options, where, values, filters
+
+    def scorecard(self, params: dict[str, list[str]]) -> dict[str, Any]:
+        """The JSON scorecard payload for a query, from the cache when the data has not changed."""
+        with self.lock:
+            self.refresh()
+            options, where, values, filters = self.parse_query(params)
+            query = (self.targets_signature, options, where, tuple(values))
+            payload = self.cache.get((self.fingerprint, *query))
+            targets = self.targets
+        if payload is not None:
+            return payload
+
+        conn = self.reader()
+        conn.execute("BEGIN")
+        try:
+            # Read the fingerprint in the query's snapshot, so a reload in between cannot mislabel the result.
+            fingerprint = self.data_fingerprint(conn)
+            aggregator = query_scorecard(conn, where, values, options)
+        finally:
+            conn.rollback()
+        metrics, diagnostics = aggregator.result()
+        if diagnostics["row_count"] == 0:
+            raise ScorecardError("No rows match the filters")
+        if filters:
+            diagnostics["filters"] = filters
+        payload = {
+            "generated_at": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+            "database": self.source,
+            "fingerprint": fingerprint,
+            "metrics": metrics,
+            "targets": targets,
+            "diagnostics": diagnostics,
+        }
+        groups = aggregator.group_results()
+        cohorts = aggregator.cohort_results()
+        if groups:
+            payload["groups"] = groups
+        if cohorts is not None:
+            payload["cohorts"] = cohorts
+        with self.lock:
+            self.cache.put((fingerprint, *query), payload)
+        return payload
+
+    def health(self) -> dict[str, Any]:
+        with self.lock:
+            self.refresh()
+            fingerprint = self.fingerprint
+            cache = {
+                "entries": len(self.cache.entries),
+                "max_entries": self.cache.max_entries,
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+            }
+        rows = self.reader().execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+        return {"status": "ok", "database": self.source, "fingerprint": fingerprint, "rows": rows, "cache": cache}
+
+
+class ScorecardHandler(BaseHTTPRequestHandler):
+    """GET /scorecard.json, /scorecard.md and /health."""
+
+    service: ScorecardService
+
+    def do_GET(self) -> None:
+        try:
+            status, content_type, body = self.respond()
+        except (ScorecardError, ValueError) as exc:
+            # Bad query parameters, e.g. ?since=not-a-date.
+            status, content_type, body = error_body(HTTPStatus.BAD_REQUEST, str(exc))
+        except sqlite3.Error as exc:
+            self.log_error("Warehouse query failed: %r", exc)
+            status, content_type, body = error_body(HTTPStatus.INTERNAL_SERVER_ERROR, f"Warehouse query failed: {exc}")
+        except Exception as exc:
+            self.log_error("Scorecard request failed: %r", exc)
+            status, content_type, body = error_body(HTTPStatus.INTERNAL_SERVER_ERROR, f"Internal error: {exc}")
+        self.send_body(status, content_type, body)
+
+    def respond(self) -> tuple[HTTPStatus, str, str]:
+        """Status, content type and body for the request's path and query."""
+        url = urlsplit(self.path)
+        params = parse_qs(url.query, keep_blank_values=True)
+        if url.path == "/health":
+            return HTTPStatus.OK, "application/json", json.dumps(self.service.health(), indent=2)
+        if url.path in ("/", "/scorecard", "/scorecard.json"):
+            return HTTPStatus.OK, "application/json", json.dumps(self.service.scorecard(params), indent=2)
+        if url.path == "/scorecard.md":
+            payload = self.service.scorecard(params)
+            markdown = render_markdown(
+                input_csv=Path(payload["database"]),
+                generated_at=payload["generated_at"],
+                metrics=payload["metrics"],
+                targets=payload["targets"],
+                diagnostics=payload["diagnostics"],
+                groups=payload.get("groups"),
+                cohorts=payload.get("cohorts"),
+            )
+            return HTTPStatus.OK, "text/markdown; charset=utf-8", markdown
+        return error_body(HTTPStatus.NOT_FOUND, f"Unknown path: {url.path}")
+
+    def send_body(self, status: HTTPStatus, content_type: str, body: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local HTTP scorecard service with a result cache")
+    parser.add_argument("--csv", nargs="+", default=[], help="Export CSV path(s): files, globs or directories")
+    parser.add_argument(
+        "--db",
+        help="SQLite warehouse to serve; with --csv its contents are replaced by the exports on start and on every reload",
+    )
+    parser.add_argument("--mapping", help="Optional YAML/JSON file mapping canonical field names to CSV columns")
+    parser.add_argument("--targets", help="Optional YAML/JSON file with metric targets")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Bind address (default {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default {DEFAULT_PORT})")
+    parser.add_argument(
+        "--cache-entries",
+        type=int,
+        default=DEFAULT_CACHE_ENTRIES,
+        help=f"Scorecard results kept in the LRU cache (default {DEFAULT_CACHE_ENTRIES})",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if not args.csv and not args.db:
+        raise ScorecardError("Pass --csv, --db, or both")
+    if args.cache_entries < 1:
+        raise ScorecardError("--cache-entries must be at least 1")
+    db_path = Path(args.db).expanduser().resolve() if args.db else None
+    if db_path is not None and not args.csv and not db_path.exists():
+        raise ScorecardError(f"Warehouse not found: {db_path} (run crm_warehouse.py load first)")
+
+    service = ScorecardService(
+        args.csv,
+        db_path,
+        Path(args.mapping).expanduser().resolve() if args.mapping else None,
+        Path(args.targets).expanduser().resolve() if args.targets else None,
+        args.cache_entries,
+    )
+    if args.csv and db_path is not None:
+        loads = service.conn.execute("SELECT COUNT(*) FROM loads").fetchone()[0]
+        if loads:
+            print(f"Replacing the {loads} load(s) already in {db_path} with the --csv exports", file=sys.stderr)
+    with service.lock:
+        service.refresh()
+    ScorecardHandler.service = service
+    # Exit through the finally below on SIGTERM too, so the temporary warehouse is removed.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    server = ThreadingHTTPServer((args.host, args.port), ScorecardHandler)
+    print(f"Serving scorecards on http://{args.host}:{server.server_port}/scorecard.json (Ctrl-C to stop)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Server stopped.")
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parents[1] / "build_scorecard_from_crm.py"
+
+HEADER = (
+    "account_id,mql_date,sql_date,opportunity_date,close_date,close_status,deal_amount,"
+    "signup_date,first_value_date,proven_value_date,pilot_start_date,production_date,"
+    "ai_sessions,ai_escalations,ai_audited_responses,ai_hallucinations"
+)
+ROWS = (
+    "a1,2025-01-02,2025-01-09,2025-01-20,2025-02-20,closed_won,1000,2025-01-01,2025-01-05,2025-01-30,2025-02-01,2025-03-01,40,2,10,1",
+    "a2,2025-01-03,2025-01-10,2025-01-21,2025-03-01,closed_lost,500,2025-01-02,,,2025-02-02,,20,1,5,0",
+    "a3,2025-01-04,,,,,,2025-01-03,2025-01-10,,,,10,0,4,0",
+)
+UNDECODED = (
+    "mql_accounts",
+    "sql_accounts",
+    "opportunity_accounts",
+    "pilot_accounts",
+    "production_accounts",
+    "ai_sessions_total",
+    "ai_escalations_total",
+    "ai_audited_responses_total",
+    "ai_hallucinations_total",
+)
+
+
+def run_scorecard(tmp_path: Path, *args: str) -> tuple[dict, str]:
+    csv_path = tmp_path / "export.csv"
+    csv_path.write_text("\n".join((HEADER, *ROWS)) + "\n", encoding="utf-8")
+    out_md, out_json = tmp_path / "scorecard.md", tmp_path / "scorecard.json"
+    subprocess.run(
+        [sys.executable, str(SCRIPT), "--csv", str(csv_path), "--out-md", str(out_md), "--out-json", str(out_json), *args],
+        check=True,
+        capture_output=True,
+    )
+    return json.loads(out_json.read_text(encoding="utf-8")), out_md.read_text(encoding="utf-8")
+
+
+def test_full_run_reports_every_diagnostic_count(tmp_path: Path) -> None:
+    payload, markdown = run_scorecard(tmp_path)
+    diagnostics = payload["diagnostics"]
+    assert diagnostics["mql_accounts"] == 3
+    assert diagnostics["production_accounts"] == 1
+    assert diagnostics["ai_sessions_total"] == 70
+    assert "n/a" not in markdown.split("## Diagnostics")[1]
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_metrics_projection_leaves_out_undecoded_counts(tmp_path: Path, engine: str) -> None:
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    payload, markdown = run_scorecard(tmp_path, "--metrics", "opportunity_win_rate", "--engine", engine)
+    diagnostics = payload["diagnostics"]
+
+    assert list(payload["metrics"]) == ["opportunity_win_rate"]
+    assert diagnostics["row_count"] == 3
+    assert diagnostics["won_opportunities"] == 1
+    assert diagnostics["lost_opportunities"] == 1
+    for key in UNDECODED:
+        assert key not in diagnostics
+
+    section = markdown.split("## Diagnostics")[1]
+    assert "- Closed won / lost: 1 / 1" in section
+    assert "- MQL accounts: n/a" in section
+    assert "- Production accounts: n/a" in section
+    assert "- AI sessions / escalations: n/a / n/a" in section